@@ -5,13 +5,13 @@ import {
   Sparkles, Clock, MessageCircle, Share2
 } from 'lucide-react';
 import { Badge } from '@/components/ui/badge';
-import type { Listing } from '@/lib/api-client';
+import type { ListingFeedItem } from '@/lib/api-client';
 import { cn } from '@/lib/utils';
 
 interface ListingCardProps {
-  listing: Listing;
+  listing: ListingFeedItem;
   onSave?: (id: string) => void;
-  onClick?: (listing: Listing) => void;
+  onClick?: (listing: ListingFeedItem) => void;
 }
 
 const conditionConfig: Record<string, { bg: string; text: string; glow?: string }> = {
@@ -92,7 +92,7 @@ export function ListingCard({ listing, onSave, onClick }: ListingCardProps) {
           {/* Image */}
           {!imageError ? (
             <motion.img
-              src={listing.images[0]}
+              src={listing.cover_image ?? listing.images?.[0]}
               alt={listing.title}
               className="w-full h-full object-cover"
               onError={() => setImageError(true)}
@@ -102,8 +102,22 @@ export interface Listing {
   updated_at?: string;
 }
 
+// Listing as served by the hyperlocal feed: the first image and a count
+// instead of the gallery. Detail-only fields may be absent.
+export interface ListingFeedItem extends Pick<Listing,
+  'id' | 'user_id' | 'title' | 'brand' | 'sku' | 'size' | 'condition' | 'authenticity_score' |
+  'is_verified' | 'price' | 'original_price' | 'price_drop_percent' | 'trade_intent' |
+  'distance_miles' | 'rank_score' | 'demand_score' | 'view_count' | 'save_count' | 'status' | 'created_at'
+> {
+  cover_image: string | null;
+  image_count: number;
+  images?: string[];
+  has_box?: boolean;
+  trade_interests?: string[];
+}
+
 export interface HyperlocalFeedResponse {
-  listings: Listing[];
+  listings: ListingFeedItem[];
   total_count: number;
   radius_miles: number;
   center_h3: string;
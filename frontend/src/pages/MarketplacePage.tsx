@@ -5,7 +5,7 @@ import {
   MapPin, Search, Flame, RefreshCw, ArrowRight, SlidersHorizontal,
   Sparkles, TrendingUp, Zap, ChevronDown, X, Filter
 } from 'lucide-react';
-import { apiClient, type Listing, type HyperlocalFeedResponse, type ActivityRibbonItem, type TradeMatch } from '@/lib/api-client';
+import { apiClient, type ListingFeedItem, type HyperlocalFeedResponse, type ActivityRibbonItem, type TradeMatch } from '@/lib/api-client';
 import { ListingCard } from '@/components/marketplace/ListingCard';
 import { ActivityRibbon } from '@/components/marketplace/ActivityRibbon';
 import { TradeMatchCard } from '@/components/marketplace/TradeMatchCard';
@@ -68,7 +68,7 @@ const heatLevelConfig: Record<string, { bg: string; glow: string; icon: React.Re
 
 export function MarketplacePage() {
   const navigate = useNavigate();
-  const [listings, setListings] = useState<Listing[]>([]);
+  const [listings, setListings] = useState<ListingFeedItem[]>([]);
   const [activityEvents, setActivityEvents] = useState<ActivityRibbonItem[]>([]);
   const [tradeMatches, setTradeMatches] = useState<TradeMatch[]>([]);
   const [isLoading, setIsLoading] = useState(true);
@@ -183,7 +183,7 @@ export function MarketplacePage() {
     );
   });
 
-  const handleListingClick = (listing: Listing) => {
+  const handleListingClick = (listing: ListingFeedItem) => {
     navigate(`/marketplace/${listing.id}`);
   };
 
@@ -0,0 +1,138 @@
+"""Compact feed v2 storage: feed event types, JSONB, generated H3 parents
+
+Revision ID: 004a_feed_v2_storage
+Revises: 004_feed_v2
+Create Date: 2024-01-15
+
+Converts the tables created by 004_feed_v2 in place:
+- feed_events.event_type/entity_type are SMALLINT positions
+  (models.types.SmallIntEnum) with lookup tables documenting the mapping.
+- feed_events H3 cells are their 64-bit integer value (models.types.H3Int)
+  instead of VARCHAR(15) hex.
+- feed_events.payload and the heat index trending_* columns are JSONB.
+- listings.h3_index_r8/r7 are generated from h3_index, so writers can no
+  longer leave them stale.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '004a_feed_v2_storage'
+down_revision = '004_feed_v2'
+branch_labels = None
+depends_on = None
+
+# Ids are positions and must match the tuples in services.models.feed_event
+FEED_EVENT_TYPES = (
+    'NEW_LISTING', 'PRICE_DROP', 'ITEM_SOLD', 'ITEM_TRADED',
+    'TRADE_REQUEST', 'SHOP_BROADCAST', 'SHOP_RESTOCK', 'FLASH_SALE',
+    'DROP_LIVE', 'DROP_SOLD_OUT', 'USER_PICKUP', 'MEETUP_COMPLETED',
+)
+FEED_ENTITY_TYPES = ('listing', 'drop', 'store', 'meetup')
+
+JSONB_COLUMNS = (
+    ('neighborhood_heat_index', 'trending_brands'),
+    ('neighborhood_heat_index', 'trending_skus'),
+    ('neighborhood_heat_index', 'trending_sizes'),
+)
+
+PARENT_RESOLUTIONS = (8, 7)
+
+TO_BIGINT = "('x' || lpad({col}, 16, '0'))::bit(64)::bigint"
+FEED_EVENT_H3_COLUMNS = ('h3_index', 'h3_index_r8', 'h3_index_r7')
+
+
+def _names_array(names) -> str:
+    return "ARRAY[{}]::text[]".format(', '.join(f"'{name}'" for name in names))
+
+
+def upgrade():
+    # Feed event/entity types are stored as SMALLINT ids (position in the list);
+    # the lookup tables document the mapping for ad-hoc SQL
+    for table_name, names in (
+        ('feed_event_types', FEED_EVENT_TYPES),
+        ('feed_entity_types', FEED_ENTITY_TYPES),
+    ):
+        lookup = op.create_table(table_name,
+            sa.Column('id', sa.SmallInteger, primary_key=True, autoincrement=False),
+            sa.Column('name', sa.String(32), nullable=False, unique=True)
+        )
+        op.bulk_insert(lookup, [{'id': i, 'name': name} for i, name in enumerate(names)])
+
+    op.execute(f"""
+        ALTER TABLE feed_events
+            ALTER COLUMN event_type TYPE smallint
+                USING array_position({_names_array(FEED_EVENT_TYPES)}, event_type::text) - 1,
+            ALTER COLUMN entity_type TYPE smallint
+                USING array_position({_names_array(FEED_ENTITY_TYPES)}, entity_type::text) - 1
+    """)
+    op.create_check_constraint('valid_feed_event_type', 'feed_events',
+                               f'event_type BETWEEN 0 AND {len(FEED_EVENT_TYPES) - 1}')
+    op.create_check_constraint('valid_feed_entity_type', 'feed_events',
+                               f'entity_type BETWEEN 0 AND {len(FEED_ENTITY_TYPES) - 1}')
+    op.execute('DROP TYPE IF EXISTS feed_event_type_enum')
+
+    op.execute('ALTER TABLE feed_events {}'.format(', '.join(
+        f'ALTER COLUMN {col} TYPE bigint USING {TO_BIGINT.format(col=col)}' for col in FEED_EVENT_H3_COLUMNS
+    )))
+
+    op.execute('ALTER TABLE feed_events ALTER COLUMN payload DROP DEFAULT')
+    op.execute('ALTER TABLE feed_events ALTER COLUMN payload TYPE jsonb USING payload::jsonb')
+    op.execute("ALTER TABLE feed_events ALTER COLUMN payload SET DEFAULT '{}'::jsonb")
+    for table_name, column in JSONB_COLUMNS:
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb")
+
+    # H3 parent of a hex-string cell: set the resolution field and fill the
+    # finer digits with 7 (unused), as h3.h3_to_parent does. IMMUTABLE so it
+    # can back generated columns.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION h3_cell_to_parent_text(cell text, res int) RETURNS text
+        LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+            SELECT to_hex(
+                (('x' || lpad(cell, 16, '0'))::bit(64)::bigint & ~(15::bigint << 52))
+                | (res::bigint << 52)
+                | ((1::bigint << ((15 - res) * 3)) - 1)
+            )
+        $$
+    """)
+    # A plain column cannot become generated in place; dropping it also drops
+    # its 004_feed_v2 indexes, which 004b_feed_v2_indexes replaces
+    for res in PARENT_RESOLUTIONS:
+        op.drop_column('listings', f'h3_index_r{res}')
+        op.add_column('listings', sa.Column(f'h3_index_r{res}', sa.String(15), sa.Computed(
+            f'h3_cell_to_parent_text(h3_index, {res})', persisted=True
+        )))
+
+
+def downgrade():
+    for res in PARENT_RESOLUTIONS:
+        op.execute(f'ALTER TABLE listings ALTER COLUMN h3_index_r{res} DROP EXPRESSION')
+        op.create_index(f'ix_listings_h3_index_r{res}', 'listings', [f'h3_index_r{res}'])
+        op.create_index(f'ix_listings_h3_r{res}_status', 'listings', [f'h3_index_r{res}', 'status'])
+    op.execute('DROP FUNCTION IF EXISTS h3_cell_to_parent_text(text, int)')
+
+    op.execute('ALTER TABLE feed_events {}'.format(', '.join(
+        f'ALTER COLUMN {col} TYPE varchar(15) USING to_hex({col})' for col in FEED_EVENT_H3_COLUMNS
+    )))
+
+    for table_name, column in JSONB_COLUMNS:
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} TYPE json USING {column}::json")
+    op.execute('ALTER TABLE feed_events ALTER COLUMN payload DROP DEFAULT')
+    op.execute('ALTER TABLE feed_events ALTER COLUMN payload TYPE json USING payload::json')
+    op.execute("ALTER TABLE feed_events ALTER COLUMN payload SET DEFAULT '{}'")
+
+    op.execute("CREATE TYPE feed_event_type_enum AS ENUM ({})".format(
+        ', '.join(f"'{name}'" for name in FEED_EVENT_TYPES)
+    ))
+    op.drop_constraint('valid_feed_entity_type', 'feed_events')
+    op.drop_constraint('valid_feed_event_type', 'feed_events')
+    op.execute(f"""
+        ALTER TABLE feed_events
+            ALTER COLUMN event_type TYPE feed_event_type_enum
+                USING ({_names_array(FEED_EVENT_TYPES)})[event_type + 1]::feed_event_type_enum,
+            ALTER COLUMN entity_type TYPE varchar(50)
+                USING ({_names_array(FEED_ENTITY_TYPES)})[entity_type + 1]
+    """)
+    op.drop_table('feed_entity_types')
+    op.drop_table('feed_event_types')
@@ -0,0 +1,106 @@
+"""Feed V2 indexes: partial ACTIVE listing indexes, BRIN and payload GIN
+
+Built with CREATE INDEX CONCURRENTLY in their own revision, so writers are
+never blocked while the indexes build:
+- Single-column listing lookups and the (column, status) composites from
+  004_feed_v2 become indexes partial on ACTIVE; sold/expired rows never
+  enter them, and user_id lookups use ix_listings_user_status.
+- listings and feed_events get a BRIN on created_at.
+- feed_events gets a payload GIN, and its expiry index only covers events
+  that expire.
+
+Revision ID: 004b_feed_v2_indexes
+Revises: 004a_feed_v2_storage
+Create Date: 2024-01-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '004b_feed_v2_indexes'
+down_revision = '004a_feed_v2_storage'
+branch_labels = None
+depends_on = None
+
+# Almost every feed/search query filters on ACTIVE
+ACTIVE = sa.text("status = 'ACTIVE'")
+
+# 004_feed_v2 listings indexes replaced by the ACTIVE-partial ones below
+# (the h3_index_r8/r7 indexes went with their columns in 004a_feed_v2_storage)
+SUPERSEDED_INDEXES = (
+    ('ix_listings_user_id', ['user_id']),
+    ('ix_listings_brand', ['brand']),
+    ('ix_listings_sku', ['sku']),
+    ('ix_listings_size', ['size']),
+    ('ix_listings_h3_index', ['h3_index']),
+    ('ix_listings_status', ['status']),
+    ('ix_listings_h3_status', ['h3_index', 'status']),
+    ('ix_listings_brand_status', ['brand', 'status']),
+    ('ix_listings_size_status', ['size', 'status']),
+    ('ix_listings_trade_intent', ['trade_intent', 'status']),
+    ('ix_listings_sku_status', ['sku', 'status']),
+    ('ix_listings_price_status', ['price', 'status']),
+)
+
+ACTIVE_INDEXES = (
+    ('ix_listings_h3_active', ['h3_index']),
+    ('ix_listings_h3_r8_active', ['h3_index_r8']),
+    ('ix_listings_h3_r7_active', ['h3_index_r7']),
+    ('ix_listings_brand_active', ['brand']),
+    ('ix_listings_size_active', ['size']),
+    ('ix_listings_trade_intent_active', ['trade_intent']),
+    ('ix_listings_sku_active', ['sku']),
+    ('ix_listings_price_active', ['price']),
+)
+
+
+def _create_index(name, table, columns, **kw):
+    op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kw)
+
+
+def _drop_index(name, table):
+    op.drop_index(name, table, postgresql_concurrently=True, if_exists=True)
+
+
+def _replace_index(name, table, columns, **kw):
+    """Build the new definition alongside the old index, then swap names"""
+    _create_index(f'{name}_new', table, columns, **kw)
+    _drop_index(name, table)
+    op.execute(f'ALTER INDEX {name}_new RENAME TO {name}')
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, columns in ACTIVE_INDEXES:
+            _create_index(name, 'listings', columns, postgresql_where=ACTIVE)
+        # created_at follows insert order, so a BRIN covers time-window scans at a fraction of a B-tree
+        _create_index('ix_listings_created_at', 'listings', ['created_at'],
+                      postgresql_using='brin', postgresql_with={'pages_per_range': 32})
+
+        _create_index('ix_feed_events_created_at', 'feed_events', ['created_at'],
+                      postgresql_using='brin', postgresql_with={'pages_per_range': 32})
+        # Payload containment lookups (payload @> '{"listing_id": ...}')
+        _create_index('ix_feed_events_payload', 'feed_events', [sa.text('payload jsonb_path_ops')],
+                      postgresql_using='gin')
+        # Most events never expire; only index the ones that do
+        _replace_index('ix_feed_events_expires', 'feed_events', ['expires_at'],
+                       postgresql_where=sa.text('expires_at IS NOT NULL'))
+
+        for name, _ in SUPERSEDED_INDEXES:
+            _drop_index(name, 'listings')
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, columns in SUPERSEDED_INDEXES:
+            _create_index(name, 'listings', columns)
+
+        _replace_index('ix_feed_events_expires', 'feed_events', ['expires_at'])
+        _drop_index('ix_feed_events_payload', 'feed_events')
+        _drop_index('ix_feed_events_created_at', 'feed_events')
+
+        _drop_index('ix_listings_created_at', 'listings')
+        for name, _ in ACTIVE_INDEXES:
+            _drop_index(name, 'listings')
@@ -0,0 +1,220 @@
+"""Compact sprint 1 storage: signals, drops and stores
+
+Revision ID: 004c_sprint1_storage
+Revises: 004b_feed_v2_indexes
+Create Date: 2025-10-12
+
+Converts the tables created by 002_sprint1_models in place:
+- signals/stores/drops ids default to the time-ordered uuidv7(), so new
+  keys land on the rightmost B-tree pages instead of scattering.
+- signals.geohash is the 12-char geohash packed into a 60-bit BIGINT
+  (models.types.GeohashInt), left-aligned so prefixes are integer ranges.
+- signal_type, drops.status and retailer_type are SMALLINT positions
+  (models.types.SmallIntEnum) with lookup tables; bounded scores are
+  SMALLINT.
+- signals.dedupe_hash is a generated sha256 of user, area, type and text.
+- stores.name_tsv is a generated tsvector for name/city search.
+- JSON columns are JSONB; wall-clock times are timestamp without zone.
+- Update-heavy tables keep 15% free space for HOT updates.
+- mv_hot_drops_by_geohash rolls up recent signal activity per drop and area.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '004c_sprint1_storage'
+down_revision = '004b_feed_v2_indexes'
+branch_labels = None
+depends_on = None
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# (table, column, enum type, lookup table, check constraint, names, default
+# name); ids are positions in names and must match the tuples in services.models
+ENUM_COLUMNS = (
+    ('signals', 'signal_type', 'signal_type_enum', 'signal_types', 'valid_signal_type',
+     ('SPOTTED', 'STOCK_CHECK', 'LINE_UPDATE', 'INTEL_REPORT', 'HEAT_CHECK', 'DROP_ALERT', 'GENERAL'), None),
+    ('drops', 'status', 'drop_status_enum', 'drop_statuses', 'valid_drop_status',
+     ('upcoming', 'live', 'sold_out', 'delayed', 'cancelled', 'ended'), 'upcoming'),
+    ('stores', 'retailer_type', 'retailer_type_enum', 'retailer_types', 'valid_retailer_type',
+     ('NIKE', 'ADIDAS', 'FOOTLOCKER', 'FINISH_LINE', 'CHAMPS', 'FOOTACTION', 'JD_SPORTS',
+      'SNEAKERSNSTUFF', 'END', 'SIZE', 'BOUTIQUE', 'CONSIGNMENT', 'OTHER'), None),
+)
+
+# (table, column, check constraint, 002_sprint1_models check)
+SMALLINT_COLUMNS = (
+    ('signals', 'reputation_score', 'positive_reputation', 'reputation_score >= 0'),
+    ('drops', 'hype_score', 'positive_hype_score', 'hype_score >= 0'),
+    ('drops', 'interest_count', 'positive_interest_count', 'interest_count >= 0'),
+)
+
+NAIVE_TIMESTAMP_COLUMNS = (
+    ('signals', 'expires_at'),
+    ('drops', 'last_checked_at'),
+    ('drop_stores', 'local_release_time'),
+)
+
+JSONB_COLUMNS = (
+    ('stores', 'social_links'),
+    ('stores', 'open_hours'),
+    ('stores', 'external_ids'),
+    ('drops', 'links'),
+)
+
+FILLFACTOR_TABLES = ('signals', 'stores', 'drops')
+
+DEDUPE_HASH = (
+    "digest(user_id::text || ':' || (geohash >> 35)::text || ':' || signal_type::text || ':' "
+    "|| btrim(lower(left(coalesce(text_content, ''), 100))), 'sha256')"
+)
+
+HOT_DROPS_MV = """
+    CREATE MATERIALIZED VIEW mv_hot_drops_by_geohash AS
+    SELECT d.id AS drop_id, s.geohash >> 35 AS geohash5,
+           count(*) AS signal_count, max(s.created_at) AS last_seen
+    FROM signals s JOIN drops d ON s.drop_id = d.id
+    WHERE s.created_at > now() - interval '7 days'
+    GROUP BY 1, 2
+"""
+
+
+def _names_array(names) -> str:
+    return "ARRAY[{}]::text[]".format(', '.join(f"'{name}'" for name in names))
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pgcrypto')
+
+    # Time-ordered UUIDv7 generator for primary keys. Pure SQL so it works
+    # without the pg_uuidv7 extension; layout follows RFC 9562.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION uuidv7() RETURNS uuid AS $$
+            SELECT encode(
+                set_bit(
+                    set_bit(
+                        overlay(
+                            uuid_send(gen_random_uuid())
+                            placing substring(int8send(floor(extract(epoch from clock_timestamp()) * 1000)::bigint) from 3)
+                            from 1 for 6
+                        ),
+                        52, 1
+                    ),
+                    53, 1
+                ),
+                'hex'
+            )::uuid
+        $$ LANGUAGE sql VOLATILE;
+    """)
+    for table_name in ('signals', 'stores', 'drops'):
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN id SET DEFAULT uuidv7()")
+
+    # Same packing as services.core.geohash_utils.gh_encode
+    op.execute(f"""
+        CREATE FUNCTION geohash_to_bigint(geohash text) RETURNS bigint
+        LANGUAGE sql IMMUTABLE STRICT AS $$
+            SELECT coalesce(sum((strpos('{GEOHASH_ALPHABET}', substr(lower(geohash), i, 1)) - 1)::bigint
+                                << (5 * (12 - i))), 0)
+            FROM generate_series(1, least(length(geohash), 12)) AS i
+        $$
+    """)
+    op.execute("ALTER TABLE signals ALTER COLUMN geohash TYPE bigint USING geohash_to_bigint(geohash)")
+    op.execute("DROP FUNCTION geohash_to_bigint(text)")
+
+    for table_name, column, enum_name, lookup_name, constraint, names, default in ENUM_COLUMNS:
+        lookup = op.create_table(lookup_name,
+            sa.Column('id', sa.SmallInteger, primary_key=True, autoincrement=False),
+            sa.Column('name', sa.String(32), nullable=False, unique=True)
+        )
+        op.bulk_insert(lookup, [{'id': i, 'name': name} for i, name in enumerate(names)])
+
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} DROP DEFAULT")
+        op.execute(f"""
+            ALTER TABLE {table_name} ALTER COLUMN {column} TYPE smallint
+            USING array_position({_names_array(names)}, {column}::text) - 1
+        """)
+        if default is not None:
+            op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} SET DEFAULT {names.index(default)}")
+        op.create_check_constraint(constraint, table_name, f'{column} BETWEEN 0 AND {len(names) - 1}')
+        op.execute(f"DROP TYPE IF EXISTS {enum_name}")
+
+    for table_name, column, constraint, _ in SMALLINT_COLUMNS:
+        op.drop_constraint(constraint, table_name)
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} TYPE smallint USING least({column}, 32767)")
+        op.create_check_constraint(constraint, table_name, f'{column} BETWEEN 0 AND 32767')
+    op.execute("ALTER TABLE drop_stores ALTER COLUMN confidence_score TYPE smallint")
+    op.create_check_constraint('valid_confidence_score', 'drop_stores', 'confidence_score BETWEEN 0 AND 100')
+
+    # Computed on write from the converted geohash/signal_type (drops ix_signals_dedupe)
+    op.drop_column('signals', 'dedupe_hash')
+    op.add_column('signals', sa.Column('dedupe_hash', sa.LargeBinary, sa.Computed(DEDUPE_HASH, persisted=True)))
+    op.create_index('ix_signals_dedupe', 'signals', ['dedupe_hash'])
+
+    op.add_column('stores', sa.Column('name_tsv', sa.dialects.postgresql.TSVECTOR, sa.Computed(
+        "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(city, ''))", persisted=True
+    )))
+
+    for table_name, column in NAIVE_TIMESTAMP_COLUMNS:
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} TYPE timestamp USING {column} AT TIME ZONE 'UTC'")
+    for table_name, column in JSONB_COLUMNS:
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb")
+
+    # Leave free space on each page so counter/updated_at bumps stay HOT
+    # updates and skip index maintenance; drop_stores is insert-mostly
+    for table_name in FILLFACTOR_TABLES:
+        op.execute(f"ALTER TABLE {table_name} SET (fillfactor = 85)")
+
+    # Refreshed by the worker so "hot drops near me" avoids the signals x
+    # drops join per request
+    op.execute(HOT_DROPS_MV)
+    # Unique index required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute('CREATE UNIQUE INDEX ix_mv_hot_drops_by_geohash ON mv_hot_drops_by_geohash (drop_id, geohash5)')
+
+
+def downgrade() -> None:
+    op.execute('DROP MATERIALIZED VIEW IF EXISTS mv_hot_drops_by_geohash')
+
+    for table_name in FILLFACTOR_TABLES:
+        op.execute(f"ALTER TABLE {table_name} RESET (fillfactor)")
+
+    for table_name, column in JSONB_COLUMNS:
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} TYPE json USING {column}::json")
+    for table_name, column in NAIVE_TIMESTAMP_COLUMNS:
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} TYPE timestamptz USING {column} AT TIME ZONE 'UTC'")
+
+    op.drop_column('stores', 'name_tsv')
+
+    op.drop_column('signals', 'dedupe_hash')
+    op.add_column('signals', sa.Column('dedupe_hash', sa.String(64), nullable=True))
+    op.create_index('ix_signals_dedupe', 'signals', ['dedupe_hash'])
+
+    op.drop_constraint('valid_confidence_score', 'drop_stores')
+    op.execute("ALTER TABLE drop_stores ALTER COLUMN confidence_score TYPE integer")
+    for table_name, column, constraint, previous_check in SMALLINT_COLUMNS:
+        op.drop_constraint(constraint, table_name)
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} TYPE integer")
+        op.create_check_constraint(constraint, table_name, previous_check)
+
+    for table_name, column, enum_name, lookup_name, constraint, names, default in ENUM_COLUMNS:
+        op.execute("CREATE TYPE {} AS ENUM ({})".format(enum_name, ', '.join(f"'{name}'" for name in names)))
+        op.drop_constraint(constraint, table_name)
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} DROP DEFAULT")
+        op.execute(f"""
+            ALTER TABLE {table_name} ALTER COLUMN {column} TYPE {enum_name}
+            USING ({_names_array(names)})[{column} + 1]::{enum_name}
+        """)
+        op.drop_table(lookup_name)
+
+    op.execute(f"""
+        CREATE FUNCTION geohash_from_bigint(value bigint) RETURNS text
+        LANGUAGE sql IMMUTABLE STRICT AS $$
+            SELECT string_agg(substr('{GEOHASH_ALPHABET}', ((value >> (5 * (12 - i))) & 31)::int + 1, 1), '' ORDER BY i)
+            FROM generate_series(1, 12) AS i
+        $$
+    """)
+    op.execute("ALTER TABLE signals ALTER COLUMN geohash TYPE varchar(12) USING geohash_from_bigint(geohash)")
+    op.execute("DROP FUNCTION geohash_from_bigint(bigint)")
+
+    for table_name in ('signals', 'stores', 'drops'):
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN id DROP DEFAULT")
+    op.execute('DROP FUNCTION IF EXISTS uuidv7()')
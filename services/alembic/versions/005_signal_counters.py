@@ -0,0 +1,64 @@
+"""Move signal engagement counters into a sidecar table
+
+Revision ID: 005_signal_counters
+Revises: 004c_sprint1_storage
+Create Date: 2025-10-12
+
+view_count, boost_count and reply_count are bumped on every view/boost.
+Keeping them in a narrow signal_counters row means each bump rewrites a
+few bytes instead of a new version of the full signals tuple.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+# revision identifiers
+revision = '005_signal_counters'
+down_revision = '004c_sprint1_storage'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('signal_counters',
+        sa.Column('signal_id', UUID(as_uuid=True), sa.ForeignKey('signals.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('view_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('boost_count', sa.SmallInteger, nullable=False, server_default='0'),
+        sa.Column('reply_count', sa.Integer, nullable=False, server_default='0'),
+        sa.CheckConstraint('view_count >= 0', name='positive_view_count'),
+        sa.CheckConstraint('boost_count BETWEEN 0 AND 32767', name='positive_boost_count'),
+        sa.CheckConstraint('reply_count >= 0', name='positive_reply_count'),
+    )
+    # Half-empty pages keep nearly every counter bump a HOT update
+    op.execute('ALTER TABLE signal_counters SET (fillfactor = 50)')
+
+    op.execute("""
+        INSERT INTO signal_counters (signal_id, view_count, boost_count, reply_count)
+        SELECT id, view_count, boost_count, reply_count FROM signals
+    """)
+
+    op.drop_constraint('positive_reply_count', 'signals')
+    op.drop_constraint('positive_view_count', 'signals')
+    op.drop_constraint('positive_boost_count', 'signals')
+    op.drop_column('signals', 'reply_count')
+    op.drop_column('signals', 'view_count')
+    op.drop_column('signals', 'boost_count')
+
+
+def downgrade() -> None:
+    op.add_column('signals', sa.Column('boost_count', sa.Integer, nullable=False, server_default='0'))
+    op.add_column('signals', sa.Column('view_count', sa.Integer, nullable=False, server_default='0'))
+    op.add_column('signals', sa.Column('reply_count', sa.Integer, nullable=False, server_default='0'))
+    op.create_check_constraint('positive_boost_count', 'signals', 'boost_count >= 0')
+    op.create_check_constraint('positive_view_count', 'signals', 'view_count >= 0')
+    op.create_check_constraint('positive_reply_count', 'signals', 'reply_count >= 0')
+
+    op.execute("""
+        UPDATE signals s
+        SET view_count = c.view_count, boost_count = c.boost_count, reply_count = c.reply_count
+        FROM signal_counters c
+        WHERE c.signal_id = s.id
+    """)
+
+    op.drop_table('signal_counters')
@@ -0,0 +1,111 @@
+"""Normalize signal tags, store features and drop regions into child tables
+
+Revision ID: 006_normalize_array_columns
+Revises: 005_signal_counters
+Create Date: 2025-10-12
+
+Replaces the ARRAY(String) columns and their GIN indexes with narrow child
+tables keyed for both directions of lookup. Changing one tag no longer
+rewrites the whole array or touches several GIN posting lists.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+
+# revision identifiers
+revision = '006_normalize_array_columns'
+down_revision = '005_signal_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Signal tags share one vocabulary
+    op.create_table('tags',
+        sa.Column('id', sa.SmallInteger, primary_key=True),
+        sa.Column('name', sa.String(64), nullable=False, unique=True),
+    )
+    op.create_table('signal_tags',
+        sa.Column('signal_id', UUID(as_uuid=True), sa.ForeignKey('signals.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('tag_id', sa.SmallInteger, sa.ForeignKey('tags.id'), primary_key=True),
+    )
+    op.create_index('ix_signal_tags_tag', 'signal_tags', ['tag_id', 'signal_id'])
+
+    op.create_table('store_features',
+        sa.Column('store_id', UUID(as_uuid=True), sa.ForeignKey('stores.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('feature', sa.String(50), primary_key=True),
+    )
+    op.create_index('ix_store_features_feature', 'store_features', ['feature', 'store_id'])
+
+    op.create_table('drop_regions',
+        sa.Column('drop_id', UUID(as_uuid=True), sa.ForeignKey('drops.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('region', sa.String(50), primary_key=True),
+    )
+    op.create_index('ix_drop_regions_region', 'drop_regions', ['region', 'drop_id'])
+
+    # Backfill from the array columns
+    op.execute("""
+        INSERT INTO tags (name)
+        SELECT DISTINCT left(u.name, 64) FROM signals s CROSS JOIN LATERAL unnest(s.tags) AS u(name)
+        ON CONFLICT (name) DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO signal_tags (signal_id, tag_id)
+        SELECT DISTINCT s.id, t.id
+        FROM signals s CROSS JOIN LATERAL unnest(s.tags) AS u(name)
+        JOIN tags t ON t.name = left(u.name, 64)
+    """)
+    op.execute("""
+        INSERT INTO store_features (store_id, feature)
+        SELECT DISTINCT s.id, left(u.feature, 50) FROM stores s CROSS JOIN LATERAL unnest(s.features) AS u(feature)
+    """)
+    op.execute("""
+        INSERT INTO drop_regions (drop_id, region)
+        SELECT DISTINCT d.id, left(u.region, 50) FROM drops d CROSS JOIN LATERAL unnest(d.regions) AS u(region)
+    """)
+
+    op.drop_index('ix_drops_regions', 'drops', if_exists=True)
+    op.drop_index('ix_stores_features', 'stores', if_exists=True)
+    op.drop_index('ix_signals_tags', 'signals', if_exists=True)
+    op.drop_column('drops', 'regions')
+    op.drop_column('stores', 'features')
+    op.drop_column('signals', 'tags')
+
+
+def downgrade() -> None:
+    op.add_column('signals', sa.Column('tags', ARRAY(sa.String), nullable=True))
+    op.add_column('stores', sa.Column('features', ARRAY(sa.String), nullable=True))
+    op.add_column('drops', sa.Column('regions', ARRAY(sa.String), nullable=True))
+
+    op.execute("""
+        UPDATE signals s SET tags = agg.names
+        FROM (
+            SELECT st.signal_id, array_agg(t.name) AS names
+            FROM signal_tags st JOIN tags t ON t.id = st.tag_id
+            GROUP BY st.signal_id
+        ) agg
+        WHERE agg.signal_id = s.id
+    """)
+    op.execute("""
+        UPDATE stores s SET features = agg.features
+        FROM (SELECT store_id, array_agg(feature) AS features FROM store_features GROUP BY store_id) agg
+        WHERE agg.store_id = s.id
+    """)
+    op.execute("""
+        UPDATE drops d SET regions = agg.regions
+        FROM (SELECT drop_id, array_agg(region) AS regions FROM drop_regions GROUP BY drop_id) agg
+        WHERE agg.drop_id = d.id
+    """)
+
+    op.execute('CREATE INDEX ix_signals_tags ON signals USING GIN (tags)')
+    op.execute('CREATE INDEX ix_stores_features ON stores USING GIN (features)')
+    op.execute('CREATE INDEX ix_drops_regions ON drops USING GIN (regions)')
+
+    op.drop_index('ix_drop_regions_region', 'drop_regions')
+    op.drop_table('drop_regions')
+    op.drop_index('ix_store_features_feature', 'store_features')
+    op.drop_table('store_features')
+    op.drop_index('ix_signal_tags_tag', 'signal_tags')
+    op.drop_table('signal_tags')
+    op.drop_table('tags')
@@ -0,0 +1,64 @@
+"""Roll up neighborhood heat metrics in a materialized view
+
+Revision ID: 007_heat_index_mv
+Revises: 006_normalize_array_columns
+Create Date: 2025-10-13
+
+update_heat_indexes used to run four count/avg queries per hex. The view
+computes the same 24h listing, save and trade-request metrics for every
+hex in one pass; the worker refreshes it concurrently and copies the rows
+into neighborhood_heat_index, so heat reads never aggregate live.
+"""
+
+from alembic import op
+
+# revision identifiers
+revision = '007_heat_index_mv'
+down_revision = '006_normalize_array_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE MATERIALIZED VIEW neighborhood_heat_index_mv AS
+        WITH listing_stats AS (
+            SELECT h3_index,
+                   count(*) FILTER (WHERE status = 'ACTIVE') AS active_listings,
+                   count(*) FILTER (WHERE created_at > now() - interval '24 hours') AS new_listings,
+                   count(*) FILTER (WHERE status = 'ACTIVE' AND created_at > now() - interval '24 hours') AS new_active_listings,
+                   avg(price) FILTER (WHERE status = 'ACTIVE') AS avg_listing_price
+            FROM listings
+            GROUP BY h3_index
+        ),
+        save_stats AS (
+            SELECT l.h3_index, count(*) AS saves
+            FROM listing_saves s JOIN listings l ON l.id = s.listing_id
+            WHERE s.created_at > now() - interval '24 hours'
+            GROUP BY l.h3_index
+        ),
+        event_stats AS (
+            SELECT to_hex(h3_index) AS h3_index, count(*) AS trade_requests  -- BIGINT cell -> listings' text form
+            FROM feed_events
+            WHERE created_at > now() - interval '24 hours' AND event_type = 4  -- TRADE_REQUEST
+            GROUP BY h3_index
+        )
+        SELECT ls.h3_index,
+               ls.active_listings,
+               ls.new_active_listings,
+               ls.new_listings / 24.0 AS listing_velocity,
+               coalesce(ss.saves, 0) / 24.0 AS save_velocity,
+               coalesce(es.trade_requests, 0) / 24.0 AS trade_request_velocity,
+               ls.avg_listing_price::float AS avg_listing_price,
+               now() AS window_end
+        FROM listing_stats ls
+        LEFT JOIN save_stats ss USING (h3_index)
+        LEFT JOIN event_stats es USING (h3_index)
+        WHERE ls.active_listings > 0 OR ls.new_listings > 0
+    """)
+    # Unique index required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute('CREATE UNIQUE INDEX ix_neighborhood_heat_index_mv ON neighborhood_heat_index_mv (h3_index)')
+
+
+def downgrade() -> None:
+    op.execute('DROP MATERIALIZED VIEW IF EXISTS neighborhood_heat_index_mv')
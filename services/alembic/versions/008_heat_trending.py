@@ -0,0 +1,81 @@
+"""Move heat index trending brands/SKUs/sizes into heat_trending
+
+Revision ID: 008_heat_trending
+Revises: 007_heat_index_mv
+Create Date: 2025-10-13
+
+The trending_* JSONB arrays were rewritten (and re-TOASTed) whole on every
+refresh and could not be range-scanned. heat_trending keeps one counter row
+per (hex, kind, key); bumps are B-tree upserts and "top N of a kind in a
+hex" reads ix_heat_trending_top in order.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+# revision identifiers
+revision = '008_heat_trending'
+down_revision = '007_heat_index_mv'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('heat_trending',
+        sa.Column('h3_index', sa.String(15), primary_key=True),
+        sa.Column('kind', sa.SmallInteger, primary_key=True),  # 0=brand, 1=sku, 2=size
+        sa.Column('key', sa.String(100), primary_key=True),
+        sa.Column('count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('label', sa.String(200), nullable=True),
+        sa.CheckConstraint('kind BETWEEN 0 AND 2', name='valid_heat_trending_kind'),
+    )
+    op.create_index('ix_heat_trending_top', 'heat_trending', ['h3_index', 'kind', sa.text('count DESC')])
+
+    # Backfill; the arrays stored score = count * 10
+    op.execute("""
+        INSERT INTO heat_trending (h3_index, kind, key, count)
+        SELECT h.h3_index, 0, left(t->>'brand', 100), max((t->>'score')::int / 10)
+        FROM neighborhood_heat_index h CROSS JOIN LATERAL jsonb_array_elements(h.trending_brands) AS t
+        WHERE t->>'brand' IS NOT NULL
+        GROUP BY 1, 3
+    """)
+    op.execute("""
+        INSERT INTO heat_trending (h3_index, kind, key, count, label)
+        SELECT h.h3_index, 1, left(t->>'sku', 100), max((t->>'score')::int / 10), max(left(t->>'name', 200))
+        FROM neighborhood_heat_index h CROSS JOIN LATERAL jsonb_array_elements(h.trending_skus) AS t
+        WHERE t->>'sku' IS NOT NULL
+        GROUP BY 1, 3
+    """)
+
+    op.drop_column('neighborhood_heat_index', 'trending_sizes')
+    op.drop_column('neighborhood_heat_index', 'trending_skus')
+    op.drop_column('neighborhood_heat_index', 'trending_brands')
+
+
+def downgrade() -> None:
+    op.add_column('neighborhood_heat_index', sa.Column('trending_brands', JSONB, nullable=True))
+    op.add_column('neighborhood_heat_index', sa.Column('trending_skus', JSONB, nullable=True))
+    op.add_column('neighborhood_heat_index', sa.Column('trending_sizes', JSONB, nullable=True))
+
+    op.execute("""
+        UPDATE neighborhood_heat_index h SET trending_brands = t.items
+        FROM (
+            SELECT h3_index, jsonb_agg(jsonb_build_object('brand', key, 'score', count * 10)
+                                       ORDER BY count DESC) AS items
+            FROM heat_trending WHERE kind = 0 GROUP BY h3_index
+        ) t
+        WHERE t.h3_index = h.h3_index
+    """)
+    op.execute("""
+        UPDATE neighborhood_heat_index h SET trending_skus = t.items
+        FROM (
+            SELECT h3_index, jsonb_agg(jsonb_build_object('sku', key, 'name', label, 'score', count * 10)
+                                       ORDER BY count DESC) AS items
+            FROM heat_trending WHERE kind = 1 GROUP BY h3_index
+        ) t
+        WHERE t.h3_index = h.h3_index
+    """)
+
+    op.drop_index('ix_heat_trending_top', 'heat_trending')
+    op.drop_table('heat_trending')
@@ -0,0 +1,41 @@
+"""Drop feed_events.display_text in favour of rendering it from the payload
+
+Revision ID: 009_feed_event_display_text
+Revises: 008_heat_trending
+Create Date: 2025-10-14
+
+The ribbon text duplicated the payload in every feed event row (and in the
+WAL/replication stream for events nobody reads). FeedEvent.display_text now
+renders it from the payload on read.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '009_feed_event_display_text'
+down_revision = '008_heat_trending'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_column('feed_events', 'display_text')
+
+
+def downgrade() -> None:
+    op.add_column('feed_events', sa.Column('display_text', sa.String(500), nullable=True))
+
+    # Backfill the factory-created types (0=NEW_LISTING, 1=PRICE_DROP, 2=ITEM_SOLD)
+    op.execute("""
+        UPDATE feed_events SET display_text = CASE event_type
+            WHEN 0 THEN CASE WHEN coalesce((payload->>'price')::numeric, 0) <> 0
+                             THEN format('New listing: %s - $%s', payload->>'title', payload->>'price')
+                             ELSE format('New listing: %s (Trade)', payload->>'title') END
+            WHEN 1 THEN format('Price drop: %s $%s → $%s (%s%% off)', payload->>'title',
+                               payload->>'old_price', payload->>'new_price',
+                               round((payload->>'drop_percent')::numeric))
+            WHEN 2 THEN format('Just sold nearby: %s', payload->>'title')
+        END
+        WHERE event_type IN (0, 1, 2)
+    """)
@@ -0,0 +1,62 @@
+"""Maintain LACES balances with a ledger insert trigger
+
+Revision ID: 010_laces_balance_trigger
+Revises: 009_feed_event_display_text
+Create Date: 2025-10-14
+
+Balances were updated in Python (read the user, add, write back), which
+races on concurrent grants and left laces_ledger.balance_after at its
+default. The BEFORE INSERT trigger applies each entry to
+users.laces_balance (the per-user running total, so reads stay O(1)) and
+stores the result in balance_after; the user row lock serializes
+concurrent entries for the same user.
+"""
+
+from alembic import op
+
+# revision identifiers
+revision = '010_laces_balance_trigger'
+down_revision = '009_feed_event_display_text'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE laces_ledger ADD COLUMN IF NOT EXISTS balance_after integer NOT NULL DEFAULT 0")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_laces_user_created ON laces_ledger (user_id, created_at DESC)")
+
+    # Backfill: walk back from the current balance through later entries
+    op.execute("""
+        UPDATE laces_ledger l SET balance_after = b.balance_after
+        FROM (
+            SELECT l.id,
+                   u.laces_balance - coalesce(sum(l.amount) OVER (
+                       PARTITION BY l.user_id ORDER BY l.created_at DESC, l.id DESC
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                   ), 0) AS balance_after
+            FROM laces_ledger l JOIN users u ON u.user_id = l.user_id
+        ) b
+        WHERE b.id = l.id
+    """)
+
+    # Balances never go below zero (same floor the grant endpoint applied)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION laces_balance_trigger() RETURNS trigger AS $$
+        BEGIN
+            UPDATE users SET laces_balance = greatest(laces_balance + NEW.amount, 0)
+            WHERE user_id = NEW.user_id
+            RETURNING laces_balance INTO NEW.balance_after;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER laces_ledger_balance
+        BEFORE INSERT ON laces_ledger
+        FOR EACH ROW EXECUTE FUNCTION laces_balance_trigger()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS laces_ledger_balance ON laces_ledger")
+    op.execute("DROP FUNCTION IF EXISTS laces_balance_trigger()")
@@ -0,0 +1,41 @@
+"""Materialize the hyperlocal feed projection of active listings
+
+Revision ID: 011_listing_feed_mv
+Revises: 010_laces_balance_trigger
+Create Date: 2025-10-14
+
+The hyperlocal feed filtered the live listings table by status/hex and
+sorted by rank on every request. listing_feed_ranked_mv holds only active,
+unexpired listings with the feed columns (prices as float8) and is indexed
+by hex and rank at each resolution; refresh_listing_feed rebuilds it
+CONCURRENTLY, which needs the unique index on id.
+"""
+
+from alembic import op
+
+# revision identifiers
+revision = '011_listing_feed_mv'
+down_revision = '010_laces_balance_trigger'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE MATERIALIZED VIEW listing_feed_ranked_mv AS
+        SELECT id, user_id, title, brand, sku, size, condition, images,
+               authenticity_score, is_verified,
+               price::float8 AS price, original_price::float8 AS original_price,
+               trade_intent, rank_score, demand_score, view_count, save_count,
+               status, created_at, h3_index, h3_index_r8, h3_index_r7
+        FROM listings
+        WHERE status = 'ACTIVE' AND (expires_at IS NULL OR expires_at > now())
+    """)
+    op.execute("CREATE UNIQUE INDEX ix_listing_feed_mv_id ON listing_feed_ranked_mv (id)")
+    op.execute("CREATE INDEX ix_listing_feed_mv_h3_rank ON listing_feed_ranked_mv (h3_index, rank_score DESC)")
+    op.execute("CREATE INDEX ix_listing_feed_mv_r8_rank ON listing_feed_ranked_mv (h3_index_r8, rank_score DESC)")
+    op.execute("CREATE INDEX ix_listing_feed_mv_r7_rank ON listing_feed_ranked_mv (h3_index_r7, rank_score DESC)")
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS listing_feed_ranked_mv")
@@ -0,0 +1,149 @@
+"""Store listing and heat index H3 cells as BIGINT
+
+Revision ID: 012_h3_bigint
+Revises: 011_listing_feed_mv
+Create Date: 2025-10-15
+
+listings, neighborhood_heat_index and heat_trending kept cells as
+VARCHAR(15) hex while feed_events already used the 64-bit value
+(models.types.H3Int). Integer keys halve the B-tree entries, compare as a
+single word and join to feed_events without to_hex. The listings parents
+stay generated columns, now from the bit-op h3_cell_to_parent_bigint.
+Both materialized views select these columns, so they are dropped and
+rebuilt around the type change.
+"""
+
+from alembic import op
+
+# revision identifiers
+revision = '012_h3_bigint'
+down_revision = '011_listing_feed_mv'
+branch_labels = None
+depends_on = None
+
+TO_BIGINT = "('x' || lpad({col}, 16, '0'))::bit(64)::bigint"
+
+HEAT_INDEX_MV = """
+    CREATE MATERIALIZED VIEW neighborhood_heat_index_mv AS
+    WITH listing_stats AS (
+        SELECT h3_index,
+               count(*) FILTER (WHERE status = 'ACTIVE') AS active_listings,
+               count(*) FILTER (WHERE created_at > now() - interval '24 hours') AS new_listings,
+               count(*) FILTER (WHERE status = 'ACTIVE' AND created_at > now() - interval '24 hours') AS new_active_listings,
+               avg(price) FILTER (WHERE status = 'ACTIVE') AS avg_listing_price
+        FROM listings
+        GROUP BY h3_index
+    ),
+    save_stats AS (
+        SELECT l.h3_index, count(*) AS saves
+        FROM listing_saves s JOIN listings l ON l.id = s.listing_id
+        WHERE s.created_at > now() - interval '24 hours'
+        GROUP BY l.h3_index
+    ),
+    event_stats AS (
+        SELECT {event_hex} AS h3_index, count(*) AS trade_requests
+        FROM feed_events
+        WHERE created_at > now() - interval '24 hours' AND event_type = 4  -- TRADE_REQUEST
+        GROUP BY h3_index
+    )
+    SELECT ls.h3_index,
+           ls.active_listings,
+           ls.new_active_listings,
+           ls.new_listings / 24.0 AS listing_velocity,
+           coalesce(ss.saves, 0) / 24.0 AS save_velocity,
+           coalesce(es.trade_requests, 0) / 24.0 AS trade_request_velocity,
+           ls.avg_listing_price::float AS avg_listing_price,
+           now() AS window_end
+    FROM listing_stats ls
+    LEFT JOIN save_stats ss USING (h3_index)
+    LEFT JOIN event_stats es USING (h3_index)
+    WHERE ls.active_listings > 0 OR ls.new_listings > 0
+"""
+
+LISTING_FEED_MV = """
+    CREATE MATERIALIZED VIEW listing_feed_ranked_mv AS
+    SELECT id, user_id, title, brand, sku, size, condition, images,
+           authenticity_score, is_verified,
+           price::float8 AS price, original_price::float8 AS original_price,
+           trade_intent, rank_score, demand_score, view_count, save_count,
+           status, created_at, h3_index, h3_index_r8, h3_index_r7
+    FROM listings
+    WHERE status = 'ACTIVE' AND (expires_at IS NULL OR expires_at > now())
+"""
+
+
+def _drop_views() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS listing_feed_ranked_mv")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS neighborhood_heat_index_mv")
+
+
+def _create_views(event_hex: str) -> None:
+    op.execute(HEAT_INDEX_MV.format(event_hex=event_hex))
+    op.execute("CREATE UNIQUE INDEX ix_neighborhood_heat_index_mv ON neighborhood_heat_index_mv (h3_index)")
+    op.execute(LISTING_FEED_MV)
+    op.execute("CREATE UNIQUE INDEX ix_listing_feed_mv_id ON listing_feed_ranked_mv (id)")
+    op.execute("CREATE INDEX ix_listing_feed_mv_h3_rank ON listing_feed_ranked_mv (h3_index, rank_score DESC)")
+    op.execute("CREATE INDEX ix_listing_feed_mv_r8_rank ON listing_feed_ranked_mv (h3_index_r8, rank_score DESC)")
+    op.execute("CREATE INDEX ix_listing_feed_mv_r7_rank ON listing_feed_ranked_mv (h3_index_r7, rank_score DESC)")
+
+
+def _add_listing_parents(parent_fn: str, col_type: str) -> None:
+    for res in (8, 7):
+        op.execute(f"""
+            ALTER TABLE listings ADD COLUMN h3_index_r{res} {col_type}
+            GENERATED ALWAYS AS ({parent_fn}(h3_index, {res})) STORED
+        """)
+        op.execute(f"""
+            CREATE INDEX ix_listings_h3_r{res}_active ON listings (h3_index_r{res})
+            WHERE status = 'ACTIVE'
+        """)
+
+
+def upgrade() -> None:
+    # Same bit operations as h3_cell_to_parent_text, without the hex round trip
+    op.execute("""
+        CREATE OR REPLACE FUNCTION h3_cell_to_parent_bigint(cell bigint, res int) RETURNS bigint
+        LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+            SELECT (cell & ~(15::bigint << 52))
+                   | (res::bigint << 52)
+                   | ((1::bigint << ((15 - res) * 3)) - 1)
+        $$
+    """)
+
+    _drop_views()
+
+    # Generated parents can't change expression in place; drop (with their
+    # indexes) and re-add once h3_index is converted
+    op.execute("ALTER TABLE listings DROP COLUMN h3_index_r8, DROP COLUMN h3_index_r7")
+    op.execute(f"ALTER TABLE listings ALTER COLUMN h3_index TYPE bigint USING {TO_BIGINT.format(col='h3_index')}")
+    _add_listing_parents('h3_cell_to_parent_bigint', 'bigint')
+
+    op.execute(f"""
+        ALTER TABLE neighborhood_heat_index
+            ALTER COLUMN h3_index TYPE bigint USING {TO_BIGINT.format(col='h3_index')},
+            ALTER COLUMN h3_index_r8 TYPE bigint USING {TO_BIGINT.format(col='h3_index_r8')},
+            ALTER COLUMN h3_index_r7 TYPE bigint USING {TO_BIGINT.format(col='h3_index_r7')}
+    """)
+    op.execute(f"ALTER TABLE heat_trending ALTER COLUMN h3_index TYPE bigint USING {TO_BIGINT.format(col='h3_index')}")
+
+    _create_views(event_hex='h3_index')
+
+
+def downgrade() -> None:
+    _drop_views()
+
+    op.execute("ALTER TABLE heat_trending ALTER COLUMN h3_index TYPE varchar(15) USING to_hex(h3_index)")
+    op.execute("""
+        ALTER TABLE neighborhood_heat_index
+            ALTER COLUMN h3_index TYPE varchar(15) USING to_hex(h3_index),
+            ALTER COLUMN h3_index_r8 TYPE varchar(15) USING to_hex(h3_index_r8),
+            ALTER COLUMN h3_index_r7 TYPE varchar(15) USING to_hex(h3_index_r7)
+    """)
+
+    op.execute("ALTER TABLE listings DROP COLUMN h3_index_r8, DROP COLUMN h3_index_r7")
+    op.execute("ALTER TABLE listings ALTER COLUMN h3_index TYPE varchar(15) USING to_hex(h3_index)")
+    _add_listing_parents('h3_cell_to_parent_text', 'varchar(15)')
+
+    _create_views(event_hex='to_hex(h3_index)')
+
+    op.execute("DROP FUNCTION IF EXISTS h3_cell_to_parent_bigint(bigint, int)")
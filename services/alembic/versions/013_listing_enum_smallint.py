@@ -0,0 +1,166 @@
+"""Store listing and LACES ledger enums as SMALLINT ids
+
+Revision ID: 013_listing_enum_smallint
+Revises: 012_h3_bigint
+Create Date: 2025-10-15
+
+listings.condition/size_type/trade_intent/status/visibility and
+laces_ledger.transaction_type were Postgres ENUMs, compared through the
+enum's sort order and repeated in every composite and partial index on
+status. They become SMALLINT positions (models.types.SmallIntEnum), with
+lookup tables holding the id -> name map as for feed_event_types. The
+ACTIVE-partial indexes and the two materialized views reference status,
+so they are rebuilt with status = 0.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '013_listing_enum_smallint'
+down_revision = '012_h3_bigint'
+branch_labels = None
+depends_on = None
+
+# (table, column, enum type, lookup table, names, default name); ids are
+# positions in names and must match the tuples in services.models
+ENUM_COLUMNS = (
+    ('listings', 'condition', 'condition_enum', 'listing_conditions',
+     ('DS', 'VNDS', 'EXCELLENT', 'GOOD', 'FAIR', 'BEAT'), None),
+    ('listings', 'size_type', 'size_type_enum', 'listing_size_types',
+     ('MENS', 'WOMENS', 'GS', 'PS', 'TD', 'UNISEX'), 'MENS'),
+    ('listings', 'trade_intent', 'trade_intent_enum', 'listing_trade_intents',
+     ('SALE', 'TRADE', 'BOTH'), 'SALE'),
+    ('listings', 'status', 'listing_status_enum', 'listing_statuses',
+     ('ACTIVE', 'PENDING', 'SOLD', 'TRADED', 'EXPIRED', 'DELETED'), 'ACTIVE'),
+    ('listings', 'visibility', 'listing_visibility_enum', 'listing_visibilities',
+     ('public', 'local', 'followers', 'private'), 'public'),
+    ('laces_ledger', 'transaction_type', 'transaction_type_enum', 'laces_transaction_types',
+     ('DAILY_STIPEND', 'BOOST_SENT', 'BOOST_RECEIVED', 'SIGNAL_REWARD', 'ADMIN_ADD', 'ADMIN_REMOVE',
+      'PURCHASE', 'REFUND', 'CONTEST_REWARD', 'CHECKOUT_TASK_PURCHASE', 'CHECKOUT_TASK_REFUND',
+      'POST_REWARD', 'CHECKIN_REWARD', 'STREAK_BONUS'), None),
+)
+
+ACTIVE_INDEXES = (
+    ('ix_listings_h3_active', 'h3_index'),
+    ('ix_listings_h3_r8_active', 'h3_index_r8'),
+    ('ix_listings_h3_r7_active', 'h3_index_r7'),
+    ('ix_listings_brand_active', 'brand'),
+    ('ix_listings_size_active', 'size'),
+    ('ix_listings_trade_intent_active', 'trade_intent'),
+    ('ix_listings_sku_active', 'sku'),
+    ('ix_listings_price_active', 'price'),
+)
+
+HEAT_INDEX_MV = """
+    CREATE MATERIALIZED VIEW neighborhood_heat_index_mv AS
+    WITH listing_stats AS (
+        SELECT h3_index,
+               count(*) FILTER (WHERE status = {active}) AS active_listings,
+               count(*) FILTER (WHERE created_at > now() - interval '24 hours') AS new_listings,
+               count(*) FILTER (WHERE status = {active} AND created_at > now() - interval '24 hours') AS new_active_listings,
+               avg(price) FILTER (WHERE status = {active}) AS avg_listing_price
+        FROM listings
+        GROUP BY h3_index
+    ),
+    save_stats AS (
+        SELECT l.h3_index, count(*) AS saves
+        FROM listing_saves s JOIN listings l ON l.id = s.listing_id
+        WHERE s.created_at > now() - interval '24 hours'
+        GROUP BY l.h3_index
+    ),
+    event_stats AS (
+        SELECT h3_index, count(*) AS trade_requests
+        FROM feed_events
+        WHERE created_at > now() - interval '24 hours' AND event_type = 4  -- TRADE_REQUEST
+        GROUP BY h3_index
+    )
+    SELECT ls.h3_index,
+           ls.active_listings,
+           ls.new_active_listings,
+           ls.new_listings / 24.0 AS listing_velocity,
+           coalesce(ss.saves, 0) / 24.0 AS save_velocity,
+           coalesce(es.trade_requests, 0) / 24.0 AS trade_request_velocity,
+           ls.avg_listing_price::float AS avg_listing_price,
+           now() AS window_end
+    FROM listing_stats ls
+    LEFT JOIN save_stats ss USING (h3_index)
+    LEFT JOIN event_stats es USING (h3_index)
+    WHERE ls.active_listings > 0 OR ls.new_listings > 0
+"""
+
+LISTING_FEED_MV = """
+    CREATE MATERIALIZED VIEW listing_feed_ranked_mv AS
+    SELECT id, user_id, title, brand, sku, size, condition, images,
+           authenticity_score, is_verified,
+           price::float8 AS price, original_price::float8 AS original_price,
+           trade_intent, rank_score, demand_score, view_count, save_count,
+           status, created_at, h3_index, h3_index_r8, h3_index_r7
+    FROM listings
+    WHERE status = {active} AND (expires_at IS NULL OR expires_at > now())
+"""
+
+
+def _drop_dependents() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS listing_feed_ranked_mv")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS neighborhood_heat_index_mv")
+    for name, _ in ACTIVE_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _create_dependents(active: str) -> None:
+    for name, column in ACTIVE_INDEXES:
+        op.execute(f"CREATE INDEX {name} ON listings ({column}) WHERE status = {active}")
+
+    op.execute(HEAT_INDEX_MV.format(active=active))
+    op.execute("CREATE UNIQUE INDEX ix_neighborhood_heat_index_mv ON neighborhood_heat_index_mv (h3_index)")
+    op.execute(LISTING_FEED_MV.format(active=active))
+    op.execute("CREATE UNIQUE INDEX ix_listing_feed_mv_id ON listing_feed_ranked_mv (id)")
+    op.execute("CREATE INDEX ix_listing_feed_mv_h3_rank ON listing_feed_ranked_mv (h3_index, rank_score DESC)")
+    op.execute("CREATE INDEX ix_listing_feed_mv_r8_rank ON listing_feed_ranked_mv (h3_index_r8, rank_score DESC)")
+    op.execute("CREATE INDEX ix_listing_feed_mv_r7_rank ON listing_feed_ranked_mv (h3_index_r7, rank_score DESC)")
+
+
+def _names_array(names) -> str:
+    return "ARRAY[{}]::text[]".format(', '.join(f"'{name}'" for name in names))
+
+
+def upgrade() -> None:
+    _drop_dependents()
+
+    for table_name, column, enum_name, lookup_name, names, default in ENUM_COLUMNS:
+        lookup = op.create_table(lookup_name,
+            sa.Column('id', sa.SmallInteger, primary_key=True, autoincrement=False),
+            sa.Column('name', sa.String(32), nullable=False, unique=True)
+        )
+        op.bulk_insert(lookup, [{'id': i, 'name': name} for i, name in enumerate(names)])
+
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} DROP DEFAULT")
+        op.execute(f"""
+            ALTER TABLE {table_name} ALTER COLUMN {column} TYPE smallint
+            USING array_position({_names_array(names)}, {column}::text) - 1
+        """)
+        if default is not None:
+            op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} SET DEFAULT {names.index(default)}")
+        op.create_check_constraint(f'valid_{column}', table_name, f'{column} BETWEEN 0 AND {len(names) - 1}')
+        op.execute(f"DROP TYPE IF EXISTS {enum_name}")
+
+    _create_dependents(active='0')
+
+
+def downgrade() -> None:
+    _drop_dependents()
+
+    for table_name, column, enum_name, lookup_name, names, default in ENUM_COLUMNS:
+        op.execute("CREATE TYPE {} AS ENUM ({})".format(enum_name, ', '.join(f"'{name}'" for name in names)))
+        op.drop_constraint(f'valid_{column}', table_name)
+        op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} DROP DEFAULT")
+        op.execute(f"""
+            ALTER TABLE {table_name} ALTER COLUMN {column} TYPE {enum_name}
+            USING ({_names_array(names)})[{column} + 1]::{enum_name}
+        """)
+        if default is not None:
+            op.execute(f"ALTER TABLE {table_name} ALTER COLUMN {column} SET DEFAULT '{default}'")
+        op.drop_table(lookup_name)
+
+    _create_dependents(active="'ACTIVE'")
@@ -0,0 +1,44 @@
+"""Make the listing rank and save-count indexes partial on ACTIVE
+
+Revision ID: 014_listing_active_rank_indexes
+Revises: 013_listing_enum_smallint
+Create Date: 2025-10-15
+
+ix_listings_rank_score and ix_listings_save_count covered every listing,
+so sold/traded/expired/deleted rows (most of the table once listings age
+out) were walked past by every "top N by rank/saves" scan. Only ACTIVE
+listings (status = 0) are ranked, so both become partial. expires_at is
+still filtered at query time, since now() can't appear in a predicate.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '014_listing_active_rank_indexes'
+down_revision = '013_listing_enum_smallint'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    active = sa.text('status = 0')  # ACTIVE
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_listings_rank_active', 'listings', [sa.text('rank_score DESC')],
+                        postgresql_where=active, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_listings_save_count_active', 'listings', [sa.text('save_count DESC')],
+                        postgresql_where=active, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_listings_rank_score', 'listings', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_listings_save_count', 'listings', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_listings_rank_score', 'listings', [sa.text('rank_score DESC')],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_listings_save_count', 'listings', [sa.text('save_count DESC')],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_listings_save_count_active', 'listings', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_listings_rank_active', 'listings', postgresql_concurrently=True, if_exists=True)
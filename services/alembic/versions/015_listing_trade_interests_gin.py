@@ -0,0 +1,32 @@
+"""GIN index on active listings' trade interests
+
+Revision ID: 015_listing_trade_interests_gin
+Revises: 014_listing_active_rank_indexes
+Create Date: 2025-10-15
+
+Finding listings that want a SKU/brand (Listing.wants_any, i.e.
+trade_interests && ARRAY[...]) scanned every listing. The GIN index is
+partial on ACTIVE (status = 0), the only listings offered for trade.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '015_listing_trade_interests_gin'
+down_revision = '014_listing_active_rank_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_listings_trade_interests', 'listings', ['trade_interests'],
+                        postgresql_using='gin', postgresql_where=sa.text('status = 0'),  # ACTIVE
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_listings_trade_interests', 'listings', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,169 @@
+"""Hourly per-hex activity rollup behind the heat index view
+
+Revision ID: 016_heat_index_hourly
+Revises: 015_listing_trade_interests_gin
+Create Date: 2025-10-15
+
+neighborhood_heat_index_mv rescanned every listing, the last day of
+listing_saves (joined back to listings) and feed_events on each refresh.
+heat_index_hourly keeps one row of counts per (hex, hour), bumped by
+statement-level triggers with one grouped upsert per INSERT/UPDATE
+statement: new listings, saves, TRADE_REQUEST events and view_count
+increases (from the counter flush). The view now sums the last 24 buckets
+per hex and only reads ACTIVE listings for the live counts and prices.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '016_heat_index_hourly'
+down_revision = '015_listing_trade_interests_gin'
+branch_labels = None
+depends_on = None
+
+# (trigger, table, event, counter column, grouped SELECT of (h3_index, count))
+HOURLY_TRIGGERS = (
+    ('heat_hourly_listings', 'listings', 'INSERT', 'listings',
+     "SELECT h3_index, count(*) FROM new_rows GROUP BY h3_index"),
+    ('heat_hourly_saves', 'listing_saves', 'INSERT', 'saves',
+     "SELECT l.h3_index, count(*) FROM new_rows s JOIN listings l ON l.id = s.listing_id GROUP BY l.h3_index"),
+    ('heat_hourly_trade_requests', 'feed_events', 'INSERT', 'trade_requests',
+     "SELECT h3_index, count(*) FROM new_rows WHERE event_type = 4 GROUP BY h3_index"),  # TRADE_REQUEST
+    ('heat_hourly_views', 'listings', 'UPDATE', 'views',
+     "SELECT n.h3_index, sum(n.view_count - o.view_count) FROM new_rows n JOIN old_rows o USING (id) "
+     "WHERE n.view_count > o.view_count GROUP BY n.h3_index"),
+)
+
+HEAT_INDEX_MV = """
+    CREATE MATERIALIZED VIEW neighborhood_heat_index_mv AS
+    WITH listing_stats AS (
+        SELECT h3_index, count(*) AS active_listings, avg(price) AS avg_listing_price
+        FROM listings
+        WHERE status = 0  -- ACTIVE
+        GROUP BY h3_index
+    ),
+    hourly AS (
+        SELECT h3_index, sum(listings) AS new_listings, sum(saves) AS saves,
+               sum(trade_requests) AS trade_requests, sum(views) AS views
+        FROM heat_index_hourly
+        WHERE bucket > now() - interval '24 hours'
+        GROUP BY h3_index
+    )
+    SELECT h3_index,
+           coalesce(ls.active_listings, 0) AS active_listings,
+           coalesce(h.new_listings, 0) AS new_listings,
+           coalesce(h.new_listings, 0) / 24.0 AS listing_velocity,
+           coalesce(h.saves, 0) / 24.0 AS save_velocity,
+           coalesce(h.trade_requests, 0) / 24.0 AS trade_request_velocity,
+           coalesce(h.views, 0) / 24.0 AS view_velocity,
+           ls.avg_listing_price::float AS avg_listing_price,
+           now() AS window_end
+    FROM listing_stats ls
+    FULL JOIN hourly h USING (h3_index)
+    WHERE ls.active_listings > 0 OR h.new_listings > 0
+"""
+
+# As of 013_listing_enum_smallint
+PREVIOUS_HEAT_INDEX_MV = """
+    CREATE MATERIALIZED VIEW neighborhood_heat_index_mv AS
+    WITH listing_stats AS (
+        SELECT h3_index,
+               count(*) FILTER (WHERE status = 0) AS active_listings,
+               count(*) FILTER (WHERE created_at > now() - interval '24 hours') AS new_listings,
+               count(*) FILTER (WHERE status = 0 AND created_at > now() - interval '24 hours') AS new_active_listings,
+               avg(price) FILTER (WHERE status = 0) AS avg_listing_price
+        FROM listings
+        GROUP BY h3_index
+    ),
+    save_stats AS (
+        SELECT l.h3_index, count(*) AS saves
+        FROM listing_saves s JOIN listings l ON l.id = s.listing_id
+        WHERE s.created_at > now() - interval '24 hours'
+        GROUP BY l.h3_index
+    ),
+    event_stats AS (
+        SELECT h3_index, count(*) AS trade_requests
+        FROM feed_events
+        WHERE created_at > now() - interval '24 hours' AND event_type = 4  -- TRADE_REQUEST
+        GROUP BY h3_index
+    )
+    SELECT ls.h3_index,
+           ls.active_listings,
+           ls.new_active_listings,
+           ls.new_listings / 24.0 AS listing_velocity,
+           coalesce(ss.saves, 0) / 24.0 AS save_velocity,
+           coalesce(es.trade_requests, 0) / 24.0 AS trade_request_velocity,
+           ls.avg_listing_price::float AS avg_listing_price,
+           now() AS window_end
+    FROM listing_stats ls
+    LEFT JOIN save_stats ss USING (h3_index)
+    LEFT JOIN event_stats es USING (h3_index)
+    WHERE ls.active_listings > 0 OR ls.new_listings > 0
+"""
+
+
+def upgrade() -> None:
+    op.create_table('heat_index_hourly',
+        sa.Column('h3_index', sa.BigInteger, primary_key=True),  # Resolution 9 cell (models.types.H3Int)
+        sa.Column('bucket', sa.DateTime(timezone=True), primary_key=True),  # Start of the hour
+        sa.Column('listings', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('saves', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('trade_requests', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('views', sa.Integer, nullable=False, server_default='0'),
+    )
+
+    # Backfill the last week from the source tables (views were never logged)
+    op.execute("""
+        INSERT INTO heat_index_hourly (h3_index, bucket, listings, saves, trade_requests)
+        SELECT h3_index, bucket, sum(listings), sum(saves), sum(trade_requests)
+        FROM (
+            SELECT h3_index, date_trunc('hour', created_at) AS bucket, 1 AS listings, 0 AS saves, 0 AS trade_requests
+            FROM listings WHERE created_at > now() - interval '7 days'
+            UNION ALL
+            SELECT l.h3_index, date_trunc('hour', s.created_at), 0, 1, 0
+            FROM listing_saves s JOIN listings l ON l.id = s.listing_id
+            WHERE s.created_at > now() - interval '7 days'
+            UNION ALL
+            SELECT h3_index, date_trunc('hour', created_at), 0, 0, 1
+            FROM feed_events WHERE created_at > now() - interval '7 days' AND event_type = 4
+        ) activity
+        GROUP BY h3_index, bucket
+    """)
+
+    for name, table_name, event, counter, counts in HOURLY_TRIGGERS:
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION {name}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                INSERT INTO heat_index_hourly AS hh (h3_index, bucket, {counter})
+                SELECT c.h3_index, date_trunc('hour', now()), c.n
+                FROM ({counts}) AS c (h3_index, n)
+                ON CONFLICT (h3_index, bucket) DO UPDATE SET {counter} = hh.{counter} + EXCLUDED.{counter};
+                RETURN NULL;
+            END
+            $$
+        """)
+        transition = 'OLD TABLE AS old_rows NEW TABLE AS new_rows' if event == 'UPDATE' else 'NEW TABLE AS new_rows'
+        op.execute(f"""
+            CREATE TRIGGER {name} AFTER {event} ON {table_name}
+            REFERENCING {transition}
+            FOR EACH STATEMENT EXECUTE FUNCTION {name}()
+        """)
+
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS neighborhood_heat_index_mv")
+    op.execute(HEAT_INDEX_MV)
+    # Unique index required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute("CREATE UNIQUE INDEX ix_neighborhood_heat_index_mv ON neighborhood_heat_index_mv (h3_index)")
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS neighborhood_heat_index_mv")
+    op.execute(PREVIOUS_HEAT_INDEX_MV)
+    op.execute("CREATE UNIQUE INDEX ix_neighborhood_heat_index_mv ON neighborhood_heat_index_mv (h3_index)")
+
+    for name, table_name, _, _, _ in HOURLY_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table_name}")
+        op.execute(f"DROP FUNCTION IF EXISTS {name}()")
+
+    op.drop_table('heat_index_hourly')
@@ -0,0 +1,33 @@
+"""Index LACES ledger entries by transaction type
+
+Revision ID: 017_laces_type_index
+Revises: 016_heat_index_hourly
+Create Date: 2025-10-15
+
+The model declares ix_laces_type_created, but no revision created it, so
+type-filtered ledger reads (stipend checks, history by type) scanned the
+user's entries. transaction_type is a SMALLINT id since
+013_listing_enum_smallint (laces_transaction_types holds the names), so
+the key is (smallint, timestamptz).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '017_laces_type_index'
+down_revision = '016_heat_index_hourly'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_laces_type_created', 'laces_ledger', ['transaction_type', sa.text('created_at DESC')],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_laces_type_created', 'laces_ledger', postgresql_concurrently=True, if_exists=True)
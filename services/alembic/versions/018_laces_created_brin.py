@@ -0,0 +1,33 @@
+"""BRIN index on laces_ledger.created_at
+
+Revision ID: 018_laces_created_brin
+Revises: 017_laces_type_index
+Create Date: 2025-10-15
+
+The ledger is append-only, so created_at follows physical order and a BRIN
+covers time-window scans (stipend/analytics ranges over all users) at a
+fraction of a B-tree's size and write cost, as ix_listings_created_at and
+ix_feed_events_created_at already do. Per-user history keeps the
+ix_laces_user_created B-tree.
+"""
+
+from alembic import op
+
+# revision identifiers
+revision = '018_laces_created_brin'
+down_revision = '017_laces_type_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_laces_created_at', 'laces_ledger', ['created_at'],
+                        postgresql_using='brin', postgresql_with={'pages_per_range': 32},
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_laces_created_at', 'laces_ledger', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,63 @@
+"""Generated cover_image/image_count columns on listings for feed reads
+
+Revision ID: 019_listing_cover_image
+Revises: 018_laces_created_brin
+Create Date: 2025-10-15
+
+Feed cards only show the first photo, but listing_feed_ranked_mv copied
+the whole images array into every row and the feed serialized all of it.
+cover_image (images[1]) and image_count are stored generated columns, so
+the view carries one URL and a count instead of the gallery. The
+at_least_one_image CHECK compares image_count instead of calling
+array_length, which also stops empty arrays from passing (array_length
+of '{}' is NULL).
+"""
+
+from alembic import op
+
+# revision identifiers
+revision = '019_listing_cover_image'
+down_revision = '018_laces_created_brin'
+branch_labels = None
+depends_on = None
+
+LISTING_FEED_MV = """
+    CREATE MATERIALIZED VIEW listing_feed_ranked_mv AS
+    SELECT id, user_id, title, brand, sku, size, condition, {images},
+           authenticity_score, is_verified,
+           price::float8 AS price, original_price::float8 AS original_price,
+           trade_intent, rank_score, demand_score, view_count, save_count,
+           status, created_at, h3_index, h3_index_r8, h3_index_r7
+    FROM listings
+    WHERE status = 0  -- ACTIVE
+      AND (expires_at IS NULL OR expires_at > now())
+"""
+
+
+def _recreate_feed_view(images: str) -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS listing_feed_ranked_mv")
+    op.execute(LISTING_FEED_MV.format(images=images))
+    op.execute("CREATE UNIQUE INDEX ix_listing_feed_mv_id ON listing_feed_ranked_mv (id)")
+    op.execute("CREATE INDEX ix_listing_feed_mv_h3_rank ON listing_feed_ranked_mv (h3_index, rank_score DESC)")
+    op.execute("CREATE INDEX ix_listing_feed_mv_r8_rank ON listing_feed_ranked_mv (h3_index_r8, rank_score DESC)")
+    op.execute("CREATE INDEX ix_listing_feed_mv_r7_rank ON listing_feed_ranked_mv (h3_index_r7, rank_score DESC)")
+
+
+def upgrade() -> None:
+    op.execute("""
+        ALTER TABLE listings
+            ADD COLUMN cover_image varchar GENERATED ALWAYS AS (images[1]) STORED,
+            ADD COLUMN image_count smallint GENERATED ALWAYS AS (cardinality(images)::smallint) STORED
+    """)
+    op.execute("ALTER TABLE listings DROP CONSTRAINT IF EXISTS at_least_one_image")
+    op.create_check_constraint('at_least_one_image', 'listings', 'image_count >= 1')
+
+    _recreate_feed_view(images='cover_image, image_count')
+
+
+def downgrade() -> None:
+    _recreate_feed_view(images='images')
+
+    op.drop_constraint('at_least_one_image', 'listings')
+    op.create_check_constraint('at_least_one_image', 'listings', 'array_length(images, 1) >= 1')
+    op.execute("ALTER TABLE listings DROP COLUMN cover_image, DROP COLUMN image_count")
@@ -0,0 +1,90 @@
+"""Move trade match participants into a child table
+
+Revision ID: 020_trade_match_participants
+Revises: 019_listing_cover_image
+Create Date: 2025-10-15
+
+trade_matches kept each side of a trade in the participants JSON, mirrored
+into user_ids/listing_ids arrays with GIN indexes so "my matches" and "is
+there already a match for these listings" could be filtered at all. Every
+match then loaded and scanned the JSON in Python to find the user's role.
+trade_match_participants holds one row per side, indexed by
+(user_id, match_id) and (offers_listing_id, match_id); the JSON, the
+mirror arrays and their GIN indexes are dropped.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+
+# revision identifiers
+revision = '020_trade_match_participants'
+down_revision = '019_listing_cover_image'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('trade_match_participants',
+        sa.Column('match_id', UUID(as_uuid=True), sa.ForeignKey('trade_matches.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('role_index', sa.SmallInteger, primary_key=True),
+        sa.Column('user_id', UUID(as_uuid=True), nullable=False),
+        sa.Column('offers_listing_id', UUID(as_uuid=True), nullable=True),
+        sa.Column('wants_listing_id', UUID(as_uuid=True), nullable=True),
+        sa.Column('offers_title', sa.String(200), nullable=True),
+        sa.Column('wants_title', sa.String(200), nullable=True),
+    )
+
+    # Backfill from the JSON, keeping each side's position in the loop
+    op.execute("""
+        INSERT INTO trade_match_participants
+            (match_id, role_index, user_id, offers_listing_id, wants_listing_id, offers_title, wants_title)
+        SELECT m.id, p.ord - 1, (p.role->>'user_id')::uuid,
+               nullif(p.role->>'offers_listing_id', '')::uuid, nullif(p.role->>'wants_listing_id', '')::uuid,
+               left(p.role->>'offers_title', 200), left(p.role->>'wants_title', 200)
+        FROM trade_matches m
+        CROSS JOIN LATERAL json_array_elements(m.participants) WITH ORDINALITY AS p(role, ord)
+    """)
+    op.create_index('ix_trade_match_participants_user', 'trade_match_participants', ['user_id', 'match_id'])
+    op.create_index('ix_trade_match_participants_offers', 'trade_match_participants',
+                    ['offers_listing_id', 'match_id'])
+
+    op.drop_index('ix_trade_matches_users', 'trade_matches', if_exists=True)
+    op.drop_index('ix_trade_matches_listings', 'trade_matches', if_exists=True)
+    op.drop_column('trade_matches', 'listing_ids')
+    op.drop_column('trade_matches', 'user_ids')
+    op.drop_column('trade_matches', 'participants')
+
+
+def downgrade() -> None:
+    op.add_column('trade_matches', sa.Column('participants', sa.JSON, nullable=True))
+    op.add_column('trade_matches', sa.Column('user_ids', ARRAY(UUID(as_uuid=True)), nullable=True))
+    op.add_column('trade_matches', sa.Column('listing_ids', ARRAY(UUID(as_uuid=True)), nullable=True))
+
+    op.execute("""
+        UPDATE trade_matches m
+        SET participants = agg.participants, user_ids = agg.user_ids, listing_ids = agg.listing_ids
+        FROM (
+            SELECT match_id,
+                   json_agg(json_build_object(
+                       'user_id', user_id, 'offers_listing_id', offers_listing_id,
+                       'wants_listing_id', wants_listing_id, 'offers_title', offers_title,
+                       'wants_title', wants_title
+                   ) ORDER BY role_index) AS participants,
+                   array_agg(user_id ORDER BY role_index) AS user_ids,
+                   array_agg(offers_listing_id ORDER BY role_index) AS listing_ids
+            FROM trade_match_participants
+            GROUP BY match_id
+        ) agg
+        WHERE agg.match_id = m.id
+    """)
+    op.execute("UPDATE trade_matches SET participants = '[]', user_ids = '{}', listing_ids = '{}' WHERE participants IS NULL")
+    for column in ('participants', 'user_ids', 'listing_ids'):
+        op.alter_column('trade_matches', column, nullable=False)
+
+    op.execute('CREATE INDEX ix_trade_matches_users ON trade_matches USING GIN (user_ids)')
+    op.execute('CREATE INDEX ix_trade_matches_listings ON trade_matches USING GIN (listing_ids)')
+
+    op.drop_index('ix_trade_match_participants_offers', 'trade_match_participants')
+    op.drop_index('ix_trade_match_participants_user', 'trade_match_participants')
+    op.drop_table('trade_match_participants')
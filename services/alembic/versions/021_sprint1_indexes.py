@@ -0,0 +1,167 @@
+"""Rebuild sprint 1 indexes on signals, drops and stores
+
+Revision ID: 021_sprint1_indexes
+Revises: 020_trade_match_participants
+Create Date: 2025-10-15
+
+002_sprint1_models built plain B-tree/GiST indexes inside its transaction.
+They are replaced here with CREATE INDEX CONCURRENTLY, so writers are not
+blocked while they build:
+- signals: the geohash/time index gains DESC order and INCLUDE columns
+  (and covers plain geohash lookups); reputation is a BRIN; dedupe lookups
+  use a hash index; visibility gets one partial index per value.
+- stores: retailer lookups are partial on is_active; name search uses the
+  name_tsv GIN; external_ids gets a jsonb_path_ops GIN.
+- drops: status lookups become partial upcoming/live indexes with INCLUDE
+  columns; brand lookups use ix_drops_brand_release.
+- Geography points use SP-GiST where PostGIS supports it.
+Indexes whose definition changes are built under a temporary name and
+swapped in, so lookups keep an index throughout.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '021_sprint1_indexes'
+down_revision = '020_trade_match_participants'
+branch_labels = None
+depends_on = None
+
+
+# Buffer GIN inserts in a pending list and merge posting lists in bulk
+GIN_PENDING_LIST = {'fastupdate': 'on', 'gin_pending_list_limit': 16384}  # 16MB
+
+# Replaced by the leading column of a composite or by partial indexes
+SUPERSEDED_INDEXES = (
+    ('ix_signals_geohash', 'signals', ['geohash']),
+    ('ix_signals_visibility_time', 'signals', ['visibility', 'created_at']),
+    ('ix_stores_name_search', 'stores', [sa.text('lower(name)')]),
+    ('ix_drops_brand', 'drops', ['brand']),
+    ('ix_drops_status', 'drops', ['status']),
+    ('ix_drops_status_release', 'drops', ['status', 'release_at']),
+)
+
+
+def _point_index_method():
+    """Pick the index method for geography point columns.
+
+    SP-GiST builds smaller, faster indexes for non-overlapping points but only
+    has geography opclasses from PostGIS 3.0 on; older servers keep GiST.
+    """
+    if context.is_offline_mode():
+        return 'spgist'
+    version = op.get_bind().execute(sa.text('SELECT postgis_lib_version()')).scalar()
+    return 'spgist' if int(version.split('.')[0]) >= 3 else 'gist'
+
+
+def _create_index(name, table, columns, **kw):
+    op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kw)
+
+
+def _drop_index(name, table):
+    op.drop_index(name, table, postgresql_concurrently=True, if_exists=True)
+
+
+def _replace_index(name, table, columns, **kw):
+    """Build the new definition alongside the old index, then swap names"""
+    _create_index(f'{name}_new', table, columns, **kw)
+    _drop_index(name, table)
+    op.execute(f'ALTER INDEX {name}_new RENAME TO {name}')
+
+
+def _replaced_indexes(spatial_method):
+    """(name, table, columns, new options, 002_sprint1_models options)"""
+    return (
+        ('ix_signals_geohash_time', 'signals', ['geohash', sa.text('created_at DESC')],
+         {'postgresql_include': ['id', 'signal_type', 'reputation_score', 'user_id']}, {}),
+        ('ix_signals_reputation', 'signals', ['reputation_score'],
+         {'postgresql_using': 'brin', 'postgresql_with': {'pages_per_range': 32}}, {}),
+        ('ix_signals_dedupe', 'signals', ['dedupe_hash'], {'postgresql_using': 'hash'}, {}),  # Equality-only lookups
+        ('ix_stores_retailer_active', 'stores', ['retailer_type'],
+         {'postgresql_where': sa.text('is_active')}, {}),
+        ('ix_signals_geom', 'signals', ['geom'], {'postgresql_using': spatial_method}, {'postgresql_using': 'gist'}),
+        ('ix_stores_geom', 'stores', ['geom'], {'postgresql_using': spatial_method}, {'postgresql_using': 'gist'}),
+    )
+
+
+# 002_sprint1_models columns for the indexes above whose columns change
+PREVIOUS_COLUMNS = {
+    'ix_signals_geohash_time': ['geohash', 'created_at'],
+    'ix_stores_retailer_active': ['retailer_type', 'is_active'],
+}
+
+
+def upgrade():
+    """Rebuild Sprint 1 indexes"""
+    spatial_method = _point_index_method()
+
+    # Keep the visibility map fresh so the INCLUDE indexes stay index-only
+    op.execute('ALTER TABLE signals SET (autovacuum_vacuum_scale_factor = 0.05)')
+    op.execute('ALTER TABLE drops SET (autovacuum_vacuum_scale_factor = 0.05)')
+
+    # Session-level so they carry into the autocommit block and the CLUSTER
+    # below (SET LOCAL would end with the first transaction). The memory also
+    # keeps PostGIS's presorted spatial build in RAM.
+    op.execute("SET maintenance_work_mem = '2GB'")
+    op.execute('SET max_parallel_maintenance_workers = 4')
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        # One partial index per visibility instead of a low-cardinality leading column
+        _create_index('ix_signals_public_time', 'signals', [sa.text('created_at DESC')],
+                      postgresql_where=sa.text("visibility = 'public'"))
+        _create_index('ix_signals_local_time', 'signals', [sa.text('created_at DESC')],
+                      postgresql_where=sa.text("visibility = 'local'"))
+        _create_index('ix_signals_followers_time', 'signals', [sa.text('created_at DESC')],
+                      postgresql_where=sa.text("visibility = 'followers'"))
+
+        _create_index('ix_stores_name_tsv', 'stores', ['name_tsv'], postgresql_using='gin',
+                      postgresql_with=GIN_PENDING_LIST)  # Full-text name/city search
+        # Containment lookups (external_ids @> '{"nike_store_id": ...}')
+        _create_index('ix_stores_external_ids', 'stores', [sa.text('external_ids jsonb_path_ops')],
+                      postgresql_using='gin', postgresql_with=GIN_PENDING_LIST)
+
+        _create_index('ix_drops_upcoming_release', 'drops', ['release_at'],
+                      postgresql_where=sa.text('status = 0'),  # upcoming
+                      postgresql_include=['id', 'brand', 'name', 'image_url'])
+        _create_index('ix_drops_live_release', 'drops', ['release_at'],
+                      postgresql_where=sa.text('status = 1'),  # live
+                      postgresql_include=['id', 'brand', 'name', 'image_url'])
+
+        for name, table, _ in SUPERSEDED_INDEXES:
+            _drop_index(name, table)
+
+        # Spatial indexes are the slowest to build, so they go last
+        for name, table, columns, options, _ in _replaced_indexes(spatial_method):
+            _replace_index(name, table, columns, **options)
+
+    # One-time physical reorder so "nearby + recent" reads hit fewer pages.
+    # New rows drift from this order over time (UUIDv7 keys keep them roughly
+    # time-ordered); re-pack periodically with
+    #   pg_repack --table=signals --order-by='geohash, created_at DESC'
+    # which, unlike CLUSTER, does not hold an exclusive lock.
+    op.execute('CLUSTER signals USING ix_signals_geohash_time')
+
+    op.execute('RESET max_parallel_maintenance_workers')
+    op.execute('RESET maintenance_work_mem')
+
+
+def downgrade():
+    """Restore the 002_sprint1_models indexes"""
+    with op.get_context().autocommit_block():
+        for name, table, columns in SUPERSEDED_INDEXES:
+            _create_index(name, table, columns)
+
+        _drop_index('ix_drops_live_release', 'drops')
+        _drop_index('ix_drops_upcoming_release', 'drops')
+        _drop_index('ix_stores_external_ids', 'stores')
+        _drop_index('ix_stores_name_tsv', 'stores')
+        _drop_index('ix_signals_followers_time', 'signals')
+        _drop_index('ix_signals_local_time', 'signals')
+        _drop_index('ix_signals_public_time', 'signals')
+
+        for name, table, columns, _, previous in _replaced_indexes('gist'):
+            _replace_index(name, table, PREVIOUS_COLUMNS.get(name, columns), **previous)
+
+    op.execute('ALTER TABLE drops RESET (autovacuum_vacuum_scale_factor)')
+    op.execute('ALTER TABLE signals RESET (autovacuum_vacuum_scale_factor)')
@@ -0,0 +1,74 @@
+"""
+Haversine kernels for services.core.geospatial, JIT-compiled with numba when
+it is installed and plain Python/NumPy otherwise. Distances are in meters.
+"""
+import math
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+HAS_NUMBA = njit is not None
+
+EARTH_RADIUS_M = 6371000.0
+
+
+def _haversine_py(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = (math.sin(delta_lat / 2) ** 2 +
+         math.cos(lat1_rad) * math.cos(lat2_rad) *
+         math.sin(delta_lon / 2) ** 2)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_M * c
+
+
+def _haversine_batch_py(lats1, lons1, lats2, lons2, out):
+    lats1_rad = np.radians(lats1)
+    lats2_rad = np.radians(lats2)
+    a = (np.sin((lats2_rad - lats1_rad) / 2) ** 2 +
+         np.cos(lats1_rad) * np.cos(lats2_rad) *
+         np.sin(np.radians(lons2 - lons1) / 2) ** 2)
+    out[:] = EARTH_RADIUS_M * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+if HAS_NUMBA:
+    _haversine = njit(fastmath=True, cache=True)(_haversine_py)
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _haversine_batch(lats1, lons1, lats2, lons2, out):
+        for i in prange(out.shape[0]):
+            out[i] = _haversine(lats1[i], lons1[i], lats2[i], lons2[i])
+
+    # Compile (or load from cache) at import so the first request doesn't pay for it
+    _haversine(0.0, 0.0, 0.0, 0.0)
+    _haversine_batch(np.zeros(1), np.zeros(1), np.zeros(1), np.zeros(1), np.empty(1))
+else:
+    _haversine = _haversine_py
+    _haversine_batch = _haversine_batch_py
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great circle distance in meters between two points"""
+    return _haversine(float(lat1), float(lon1), float(lat2), float(lon2))
+
+
+def haversine_distance_batch(lats1, lons1, lats2, lons2, out: np.ndarray = None) -> np.ndarray:
+    """
+    Pairwise great circle distances in meters between 1-D coordinate arrays
+    (scalars broadcast, e.g. one origin against many points), written into
+    out (allocated if not given).
+    """
+    lats1, lons1, lats2, lons2 = (np.ascontiguousarray(x, dtype=np.float64)
+                                  for x in np.broadcast_arrays(*np.atleast_1d(lats1, lons1, lats2, lons2)))
+    if out is None:
+        out = np.empty(lats1.shape[0], dtype=np.float64)
+    _haversine_batch(lats1, lons1, lats2, lons2, out)
+    return out
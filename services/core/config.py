@@ -1,5 +1,7 @@
-from pydantic_settings import BaseSettings
-from typing import Optional
+from functools import lru_cache
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import List, Optional, Union
 
 
 class Settings(BaseSettings):
@@ -22,7 +24,9 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
     # CORS
-    CORS_ORIGINS: str = "http://localhost:5177,http://localhost:3000"
+    # Union with str so a comma-separated env value reaches _split_cors_origins
+    # instead of failing JSON decoding; always a list once loaded
+    CORS_ORIGINS: Union[List[str], str] = ["http://localhost:5177", "http://localhost:3000"]
 
     # Environment
     ENVIRONMENT: str = "development"
@@ -46,9 +50,17 @@ class Settings(BaseSettings):
     ENABLE_METRICS: bool = True
     METRICS_PORT: int = 9090
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    @field_validator("CORS_ORIGINS", mode="before")
+    @classmethod
+    def _split_cors_origins(cls, v):
+        if isinstance(v, str):
+            return [origin.strip() for origin in v.split(",") if origin.strip()]
+        return v
 
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True)
 
-settings = Settings()
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Settings are read from the environment/.env once, on first use"""
+    return Settings()
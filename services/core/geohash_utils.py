@@ -2,26 +2,73 @@
 Geohash utilities for spatial aggregation and clustering
 """
 import geohash2
+import h3
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime, timedelta
+from functools import lru_cache
 import math
 
+import numpy as np
+
+from services.core._geo_numba import haversine_distance_batch
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_GEOHASH_BITS = {char: bits for bits, char in enumerate(GEOHASH_BASE32)}
+GEOHASH_INT_PRECISION = 12  # 12 chars x 5 bits = 60-bit integer
+
+# Half the diagonal of a geohash cell at the equator, by precision (km). Cells
+# only narrow towards the poles, so this bounds center-to-corner everywhere.
+_CELL_HALF_DIAG_KM = (
+    None, 3536.0, 699.6, 110.5, 21.85, 3.46, 0.682, 0.108, 0.0213, 0.00337, 0.00067, 0.000105, 0.0000208,
+)
+
+
+def gh_encode(geohash: str) -> int:
+    """Pack a geohash into an integer, left-aligned to 60 bits"""
+    value = 0
+    for char in geohash:
+        value = (value << 5) | _GEOHASH_BITS[char]
+    return value << (5 * (GEOHASH_INT_PRECISION - len(geohash)))
+
+
+def gh_decode(value: int, precision: int = GEOHASH_INT_PRECISION) -> str:
+    """Unpack a 60-bit geohash integer back to its first `precision` chars"""
+    value >>= 5 * (GEOHASH_INT_PRECISION - precision)
+    chars = []
+    for _ in range(precision):
+        chars.append(GEOHASH_BASE32[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def gh_prefix_range(prefix: str) -> Tuple[int, int]:
+    """Inclusive integer range covering every geohash that starts with prefix.
+
+    Use as ``WHERE geohash BETWEEN lo AND hi`` instead of a string LIKE.
+    """
+    lo = gh_encode(prefix)
+    return lo, lo | ((1 << (5 * (GEOHASH_INT_PRECISION - len(prefix)))) - 1)
+
+
+# Heatmap requests decode the same few thousand cells over and over
+@lru_cache(maxsize=65536)
+def _decode_cached(geohash: str) -> Tuple[float, float]:
+    lat, lng = geohash2.decode(geohash)
+    return float(lat), float(lng)
+
+
+@lru_cache(maxsize=65536)
+def _decode_exactly_cached(geohash: str) -> Tuple[float, float, float, float]:
+    return geohash2.decode_exactly(geohash)
+
+
 class GeohashUtils:
     """Utility functions for geohash operations"""
     
-    # Precision levels for different zoom levels
-    PRECISION_LEVELS = {
-        1: 1,   # Country level (~5000km)
-        2: 2,   # Large region (~1250km)  
-        3: 3,   # Region (~160km)
-        4: 4,   # Large city (~40km)
-        5: 5,   # City (~5km)
-        6: 6,   # District (~1.2km)
-        7: 7,   # Neighborhood (~150m)
-        8: 8,   # Block (~40m)
-        9: 9,   # Building (~5m)
-        10: 10  # Room (~1m)
-    }
+    # Geohash precision per map zoom level 0-18. Cell sizes by precision:
+    # 2 ~1250km, 3 ~160km, 4 ~40km, 5 ~5km (city), 6 ~1.2km (district),
+    # 7 ~150m (neighborhood), 8 ~40m (block), 9 ~5m, 10 ~1m
+    ZOOM_TO_PRECISION = (2, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10)
     
     @staticmethod
     def encode(latitude: float, longitude: float, precision: int = 7) -> str:
@@ -31,42 +78,32 @@ class GeohashUtils:
     @staticmethod
     def decode(geohash: str) -> Tuple[float, float]:
         """Decode geohash to coordinates (lat, lng)"""
-        lat, lng = geohash2.decode(geohash)
-        return float(lat), float(lng)
+        return _decode_cached(geohash)
     
     @staticmethod
     def get_precision_for_zoom(zoom_level: int) -> int:
         """Get appropriate geohash precision for map zoom level"""
-        # Map zoom levels (1-18) to geohash precision (1-10)
-        if zoom_level <= 2:
-            return 2
-        elif zoom_level <= 4:
-            return 3
-        elif zoom_level <= 6:
-            return 4
-        elif zoom_level <= 8:
-            return 5
-        elif zoom_level <= 10:
-            return 6
-        elif zoom_level <= 12:
-            return 7
-        elif zoom_level <= 14:
-            return 8
-        elif zoom_level <= 16:
-            return 9
-        else:
-            return 10
+        return GeohashUtils.ZOOM_TO_PRECISION[min(max(zoom_level, 0), 18)]
     
     @staticmethod
     def get_neighbors(geohash: str) -> List[str]:
         """Get all 8 neighboring geohashes"""
-        return geohash2.neighbors(geohash)
+        lat, lng, lat_err, lng_err = _decode_exactly_cached(geohash)
+        neighbors = []
+        for dlat in (-1, 0, 1):
+            n_lat = lat + dlat * 2 * lat_err
+            if not -90 < n_lat < 90:
+                continue  # No cells past the poles
+            for dlng in (-1, 0, 1):
+                if dlat or dlng:
+                    n_lng = (lng + dlng * 2 * lng_err + 180) % 360 - 180
+                    neighbors.append(geohash2.encode(n_lat, n_lng, precision=len(geohash)))
+        return neighbors
     
     @staticmethod
     def get_bounding_box(geohash: str) -> Dict[str, float]:
         """Get bounding box for geohash"""
-        lat, lng = geohash2.decode(geohash)
-        lat_err, lng_err = geohash2.decode_exact(geohash)[2:]
+        lat, lng, lat_err, lng_err = _decode_exactly_cached(geohash)
         
         return {
             'min_lat': lat - lat_err,
@@ -78,7 +115,7 @@ class GeohashUtils:
     @staticmethod
     def is_within_bbox(geohash: str, bbox: List[float]) -> bool:
         """Check if geohash center is within bounding box [min_lng, min_lat, max_lng, max_lat]"""
-        lat, lng = geohash2.decode(geohash)
+        lat, lng = _decode_cached(geohash)
         min_lng, min_lat, max_lng, max_lat = bbox
         
         return min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
@@ -99,40 +136,80 @@ class GeohashUtils:
         
         return R * c
     
+    @staticmethod
+    def distance_km_many(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """Haversine distance in km from one point to arrays of points, in one batch kernel call"""
+        return haversine_distance_batch(lat, lng, lats, lngs) / 1000
+    
     @staticmethod
     def geohashes_within_radius(center_lat: float, center_lng: float, radius_km: float, precision: int = 7) -> List[str]:
-        """Get all geohashes within radius of center point"""
-        # Approximate degree per km (varies by latitude)
-        lat_per_km = 1.0 / 111.0
-        lng_per_km = 1.0 / (111.0 * math.cos(math.radians(center_lat)))
-        
-        # Calculate bounding box
-        lat_delta = radius_km * lat_per_km
-        lng_delta = radius_km * lng_per_km
-        
-        min_lat = center_lat - lat_delta
-        max_lat = center_lat + lat_delta
-        min_lng = center_lng - lng_delta
-        max_lng = center_lng + lng_delta
-        
-        # Generate geohashes in bounding box
-        geohashes = set()
-        
-        # Sample points within bounding box
-        lat_steps = int((lat_delta * 2) / (lat_per_km * 0.1)) + 1
-        lng_steps = int((lng_delta * 2) / (lng_per_km * 0.1)) + 1
+        """Get all geohashes whose cell overlaps the radius around the center point.
+
+        Walks outward from the center cell over neighbors, so the cost scales
+        with the number of cells returned rather than a sampled grid.
+        """
+        reach_km = radius_km + _CELL_HALF_DIAG_KM[precision]
+        seed = GeohashUtils.encode(center_lat, center_lng, precision)
+        visited = {seed}
+        frontier = [seed]
+        result = []
         
-        for i in range(lat_steps):
-            for j in range(lng_steps):
-                lat = min_lat + (i * (max_lat - min_lat) / lat_steps)
-                lng = min_lng + (j * (max_lng - min_lng) / lng_steps)
-                
-                # Check if point is within radius
-                if GeohashUtils.distance_km(center_lat, center_lng, lat, lng) <= radius_km:
-                    geohash = GeohashUtils.encode(lat, lng, precision)
-                    geohashes.add(geohash)
+        # Expand one ring at a time so each ring's distances are a single numpy call
+        while frontier:
+            centers = np.array([GeohashUtils.decode(geohash) for geohash in frontier])
+            inside = GeohashUtils.distance_km_many(center_lat, center_lng, centers[:, 0], centers[:, 1]) <= reach_km
+            
+            next_frontier = []
+            for geohash in (geohash for geohash, keep in zip(frontier, inside) if keep):
+                result.append(geohash)
+                for neighbor in GeohashUtils.get_neighbors(geohash):
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
         
-        return list(geohashes)
+        return result
+
+def _intern(ids: Dict[str, int], name: str) -> int:
+    """Small-int id for name, assigned in first-seen order"""
+    code = ids.get(name)
+    if code is None:
+        code = ids[name] = len(ids)
+    return code
+
+
+class _PairCounts:
+    """Counts of interned names per bucket slot, as flat arrays sorted by slot"""
+    
+    def __init__(self, slots, codes, ids: Dict[str, int], num_slots: int):
+        self.names = list(ids)
+        width = max(len(ids), 1)
+        pairs, self.counts = np.unique(
+            np.asarray(slots, dtype=np.int64) * width + np.asarray(codes, dtype=np.int64),
+            return_counts=True
+        )
+        self.codes = pairs % width
+        # Slot s owns entries bounds[s]:bounds[s + 1]
+        self.bounds = np.searchsorted(pairs // width, np.arange(num_slots + 1))
+    
+    def as_dict(self, slot: int) -> Dict[str, int]:
+        start, end = self.bounds[slot], self.bounds[slot + 1]
+        return {
+            self.names[code]: count
+            for code, count in zip(self.codes[start:end].tolist(), self.counts[start:end].tolist())
+        }
+    
+    def top(self, slot: int, limit: int) -> List[str]:
+        """Names with the highest counts in a slot, ties in first-seen order"""
+        start, end = self.bounds[slot], self.bounds[slot + 1]
+        codes = self.codes[start:end]
+        # One sort key: higher count first, then lower (earlier) code
+        rank = -self.counts[start:end] * len(self.names) + codes
+        if len(rank) > limit:
+            keep = np.argpartition(rank, limit - 1)[:limit]
+            codes, rank = codes[keep], rank[keep]
+        return [self.names[code] for code in codes[np.argsort(rank)].tolist()]
+
 
 class SignalAggregator:
     """Aggregate signals by geohash for heatmap generation"""
@@ -154,12 +231,58 @@ class SignalAggregator:
         Returns:
             Dictionary mapping geohash -> aggregated data
         """
-        aggregated = {}
+        def bucket_of(signal: Dict) -> Optional[str]:
+            if 'geohash' in signal:
+                return signal['geohash'][:precision]
+            if 'lat' in signal and 'lng' in signal:
+                return GeohashUtils.encode(signal['lat'], signal['lng'], precision)
+            return None
+        
+        return SignalAggregator._aggregate(signals, 'geohash', bucket_of, GeohashUtils.decode, time_window_hours)
+    
+    @staticmethod
+    def aggregate_by_h3(
+        signals: List[Dict],
+        resolution: int = 9,
+        time_window_hours: Optional[int] = None
+    ) -> Dict[str, Dict]:
+        """
+        Aggregate signals by H3 cells, same bucket shape as aggregate_by_geohash
+        
+        Signals carrying a finer 'h3_index' are rolled up with h3_to_parent,
+        which is exact, instead of being re-encoded from coordinates.
+        
+        Returns:
+            Dictionary mapping h3_index -> aggregated data
+        """
+        def bucket_of(signal: Dict) -> Optional[str]:
+            cell = signal.get('h3_index')
+            if cell and h3.h3_get_resolution(cell) >= resolution:
+                return h3.h3_to_parent(cell, resolution)
+            if 'lat' in signal and 'lng' in signal:
+                return h3.geo_to_h3(signal['lat'], signal['lng'], resolution)
+            return None
+        
+        return SignalAggregator._aggregate(signals, 'h3_index', bucket_of, h3.h3_to_geo, time_window_hours)
+    
+    @staticmethod
+    def _aggregate(signals: List[Dict], key: str, bucket_of, center_of, time_window_hours: Optional[int]) -> Dict[str, Dict]:
+        """Shared bucketing; bucket_of maps a signal to its cell, center_of a cell to (lat, lng)"""
         cutoff_time = None
         
         if time_window_hours:
             cutoff_time = datetime.utcnow() - timedelta(hours=time_window_hours)
         
+        # Group first, then aggregate each group in bulk: numeric totals with
+        # one bincount over bucket slots, categorical counts by interning the
+        # names to small ints and counting (slot, id) pairs with np.unique
+        slot_of = {}  # cell -> position in groups
+        groups = []
+        slots = []
+        reputations = []
+        type_ids, type_codes = {}, []
+        brand_ids, brand_slots, brand_codes = {}, [], []
+        tag_ids, tag_slots, tag_codes = {}, [], []
         for signal in signals:
             # Filter by time window if specified
             if cutoff_time and signal.get('created_at'):
@@ -169,80 +292,58 @@ class SignalAggregator:
                 if signal_time < cutoff_time:
                     continue
             
-            # Get geohash at desired precision
-            if 'geohash' in signal:
-                geohash = signal['geohash'][:precision]
-            elif 'lat' in signal and 'lng' in signal:
-                geohash = GeohashUtils.encode(signal['lat'], signal['lng'], precision)
-            else:
+            cell = bucket_of(signal)
+            if cell is None:
                 continue
-            
-            # Initialize bucket if not exists
-            if geohash not in aggregated:
-                lat, lng = GeohashUtils.decode(geohash)
-                aggregated[geohash] = {
-                    'geohash': geohash,
-                    'lat': lat,
-                    'lng': lng,
-                    'signal_count': 0,
-                    'total_reputation': 0,
-                    'signal_types': {},
-                    'brands': {},
-                    'tags': [],
-                    'sample_signals': []
-                }
-            
-            bucket = aggregated[geohash]
-            
-            # Aggregate data
-            bucket['signal_count'] += 1
-            bucket['total_reputation'] += signal.get('reputation_score', 0)
-            
-            # Count signal types
-            signal_type = signal.get('signal_type', 'GENERAL')
-            bucket['signal_types'][signal_type] = bucket['signal_types'].get(signal_type, 0) + 1
-            
-            # Count brands
-            brand = signal.get('brand')
-            if brand:
-                bucket['brands'][brand] = bucket['brands'].get(brand, 0) + 1
-            
-            # Collect tags
-            tags = signal.get('tags', [])
-            if tags:
-                bucket['tags'].extend(tags)
-            
-            # Store sample signals (limit to 3 per bucket)
-            if len(bucket['sample_signals']) < 3:
-                bucket['sample_signals'].append({
-                    'id': signal.get('id'),
-                    'text_content': signal.get('text_content', '')[:100],
-                    'signal_type': signal.get('signal_type'),
-                    'reputation_score': signal.get('reputation_score', 0),
-                    'created_at': signal.get('created_at')
-                })
+            slot = slot_of.get(cell)
+            if slot is None:
+                slot = slot_of[cell] = len(groups)
+                groups.append([])
+            groups[slot].append(signal)
+            slots.append(slot)
+            reputations.append(signal.get('reputation_score', 0))
+            type_codes.append(_intern(type_ids, signal.get('signal_type', 'GENERAL')))
+            if signal.get('brand'):
+                brand_slots.append(slot)
+                brand_codes.append(_intern(brand_ids, signal['brand']))
+            for tag in signal.get('tags') or ():
+                tag_slots.append(slot)
+                tag_codes.append(_intern(tag_ids, tag))
         
-        # Post-process aggregated data
-        for bucket in aggregated.values():
-            # Calculate average reputation
-            if bucket['signal_count'] > 0:
-                bucket['avg_reputation'] = bucket['total_reputation'] / bucket['signal_count']
-            else:
-                bucket['avg_reputation'] = 0
-            
-            # Get top tags (limit to 5)
-            tag_counts = {}
-            for tag in bucket['tags']:
-                tag_counts[tag] = tag_counts.get(tag, 0) + 1
-            
-            bucket['top_tags'] = sorted(
-                tag_counts.keys(), 
-                key=lambda x: tag_counts[x], 
-                reverse=True
-            )[:5]
+        slots = np.array(slots, dtype=np.intp)
+        totals = np.bincount(slots, weights=np.array(reputations, dtype=np.float64), minlength=len(groups))
+        type_counts = _PairCounts(slots, type_codes, type_ids, len(groups))
+        brand_counts = _PairCounts(brand_slots, brand_codes, brand_ids, len(groups))
+        tag_counts = _PairCounts(tag_slots, tag_codes, tag_ids, len(groups))
+        
+        aggregated = {}
+        for cell, slot in slot_of.items():
+            members = groups[slot]
+            lat, lng = center_of(cell)
+            total_reputation = int(totals[slot])
             
-            # Clean up raw tags list
-            del bucket['tags']
+            aggregated[cell] = {
+                key: cell,
+                'lat': lat,
+                'lng': lng,
+                'signal_count': len(members),
+                'total_reputation': total_reputation,
+                'signal_types': type_counts.as_dict(slot),
+                'brands': brand_counts.as_dict(slot),
+                # Sample signals (limit to 3 per bucket)
+                'sample_signals': [
+                    {
+                        'id': signal.get('id'),
+                        'text_content': signal.get('text_content', '')[:100],
+                        'signal_type': signal.get('signal_type'),
+                        'reputation_score': signal.get('reputation_score', 0),
+                        'created_at': signal.get('created_at')
+                    }
+                    for signal in members[:3]
+                ],
+                'avg_reputation': total_reputation / len(members),
+                'top_tags': tag_counts.top(slot, 5),
+            }
         
         return aggregated
     
@@ -251,9 +352,12 @@ class SignalAggregator:
         """Filter aggregated data by bounding box"""
         filtered = {}
         
-        for geohash, data in aggregated.items():
-            if GeohashUtils.is_within_bbox(geohash, bbox):
-                filtered[geohash] = data
+        min_lng, min_lat, max_lng, max_lat = bbox
+        
+        for cell, data in aggregated.items():
+            # Bucket centers are already decoded, so this works for geohash and H3 keys
+            if min_lat <= data['lat'] <= max_lat and min_lng <= data['lng'] <= max_lng:
+                filtered[cell] = data
         
         return filtered
     
@@ -1,7 +1,21 @@
 import math
 import geohash2 as geohash
+import numpy as np
 from typing import Tuple
 
+from services.core._geo_numba import haversine, haversine_distance_batch
+
+# (lat, lon) size in degrees of a geohash cell, by precision. Precision p has
+# 5p bits, interleaved starting with longitude, so lon gets the odd bit.
+GEOHASH_CELL_DEGREES = tuple(
+    (180.0 / 2 ** (5 * p // 2), 360.0 / 2 ** ((5 * p + 1) // 2)) for p in range(13)
+)
+
+# Most cells bbox_to_geohashes returns; larger boxes get coarser cells
+MAX_BBOX_GEOHASHES = 4096
+
+_BASE32_LUT = np.frombuffer(b'0123456789bcdefghjkmnpqrstuvwxyz', dtype=np.uint8)
+
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -12,23 +26,13 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
         lat2, lon2: Coordinates of second point
 
     Returns:
-        Distance in meters
+        Distance in meters (an array if any argument is an array)
     """
-    R = 6371000  # Earth radius in meters
-
-    # Convert to radians
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
+    if isinstance(lat1, np.ndarray) or isinstance(lat2, np.ndarray):
+        return haversine_distance_batch(lat1, lon1, lat2, lon2)
 
-    # Haversine formula
-    a = (math.sin(delta_lat / 2) ** 2 +
-         math.cos(lat1_rad) * math.cos(lat2_rad) *
-         math.sin(delta_lon / 2) ** 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-    return R * c
+    # Compiled with numba when available
+    return haversine(lat1, lon1, lat2, lon2)
 
 
 def encode_geohash(lat: float, lon: float, precision: int = 6) -> str:
@@ -36,6 +40,45 @@ def encode_geohash(lat: float, lon: float, precision: int = 6) -> str:
     return geohash.encode(lat, lon, precision=precision)
 
 
+def _spread_bits(x: np.ndarray) -> np.ndarray:
+    """Move bit k of each (up to 32-bit) value to bit 2k"""
+    x = (x | (x << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    x = (x | (x << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    x = (x | (x << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    x = (x | (x << np.uint64(2))) & np.uint64(0x3333333333333333)
+    x = (x | (x << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return x
+
+
+def encode_geohash_vec(lats, lons, precision: int = 6) -> np.ndarray:
+    """
+    Encode arrays of coordinates to geohashes in a few array operations.
+
+    Quantizes lat/lon to the cell grid, interleaves the bits (longitude
+    first) and maps each 5-bit group through the base32 alphabet.
+
+    Returns:
+        Array of geohash strings, same length as the inputs
+    """
+    lat_bits = 5 * precision // 2
+    lon_bits = 5 * precision - lat_bits
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+
+    lat_cells = np.clip(np.floor((lats + 90) / 180 * 2 ** lat_bits), 0, 2 ** lat_bits - 1).astype(np.uint64)
+    lon_cells = np.clip(np.floor((lons + 180) / 360 * 2 ** lon_bits), 0, 2 ** lon_bits - 1).astype(np.uint64)
+
+    # The most significant bit is always longitude's
+    if lon_bits > lat_bits:
+        code = _spread_bits(lon_cells) | (_spread_bits(lat_cells) << np.uint64(1))
+    else:
+        code = (_spread_bits(lon_cells) << np.uint64(1)) | _spread_bits(lat_cells)
+
+    shifts = np.arange(5 * (precision - 1), -1, -5, dtype=np.uint64)
+    chars = _BASE32_LUT[(code[:, None] >> shifts) & np.uint64(31)]
+    return np.ascontiguousarray(chars).view(f'S{precision}').ravel().astype(str)
+
+
 def decode_geohash(gh: str) -> Tuple[float, float]:
     """Decode geohash to (latitude, longitude)"""
     lat, lon = geohash.decode(gh)
@@ -49,36 +92,48 @@ def get_geohash_neighbors(gh: str) -> list[str]:
 
 def bbox_to_geohashes(min_lat: float, min_lon: float,
                       max_lat: float, max_lon: float,
-                      precision: int = 6) -> list[str]:
+                      precision: int = 6, max_cells: int = MAX_BBOX_GEOHASHES) -> list[str]:
     """
-    Get all geohashes within a bounding box.
+    Get all geohashes within a bounding box. A bbox needing more than
+    max_cells cells at the requested precision is covered with coarser
+    cells instead, at the finest precision that fits.
 
     Args:
         min_lat, min_lon: Southwest corner
         max_lat, max_lon: Northeast corner
         precision: Geohash precision level
+        max_cells: Most cells to return
 
     Returns:
         List of geohash strings
     """
-    geohashes = set()
+    # Precision 1 is at most 32 cells, so the loop always ends
+    while True:
+        dlat, dlon = GEOHASH_CELL_DEGREES[precision]
 
-    # Sample points within the bbox and get their geohashes
-    lat_step = (max_lat - min_lat) / 20
-    lon_step = (max_lon - min_lon) / 20
+        # Integer row/column range of the cells the bbox touches
+        first_row = max(math.floor((min_lat + 90) / dlat), 0)
+        last_row = min(math.floor((max_lat + 90) / dlat), round(180 / dlat) - 1)
+        first_col = max(math.floor((min_lon + 180) / dlon), 0)
+        last_col = min(math.floor((max_lon + 180) / dlon), round(360 / dlon) - 1)
 
-    lat = min_lat
-    while lat <= max_lat:
-        lon = min_lon
-        while lon <= max_lon:
-            gh = encode_geohash(lat, lon, precision)
-            geohashes.add(gh)
-            lon += lon_step
-        lat += lat_step
+        cell_count = max(last_row - first_row + 1, 0) * max(last_col - first_col + 1, 0)
+        if cell_count <= max_cells or precision == 1:
+            break
+        precision -= 1
 
-    return list(geohashes)
+    # Encode each cell once, at its center
+    rows, cols = np.meshgrid(np.arange(first_row, last_row + 1), np.arange(first_col, last_col + 1),
+                             indexing='ij')
+    return encode_geohash_vec(-90 + (rows.ravel() + 0.5) * dlat,
+                              -180 + (cols.ravel() + 0.5) * dlon, precision).tolist()
 
 
 def validate_coordinates(lat: float, lon: float) -> bool:
     """Validate latitude and longitude values"""
     return -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def validate_coordinates_vec(lats, lons) -> np.ndarray:
+    """Boolean mask of valid latitude/longitude pairs, for batch input (NaN is invalid)"""
+    return (np.abs(np.asarray(lats, dtype=np.float64)) <= 90) & (np.abs(np.asarray(lons, dtype=np.float64)) <= 180)
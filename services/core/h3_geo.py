@@ -10,8 +10,15 @@ Resolution Guide:
 """
 
 import h3
-from typing import List, Tuple, Dict, Set
+import h3.api.numpy_int as h3_int
+import numpy as np
+from typing import Iterable, List, Tuple, Dict, Set
 from functools import lru_cache
+from itertools import repeat
+
+from services.core.geospatial import haversine_distance_batch
+
+METERS_PER_MILE = 1609.344
 
 # Default resolution for micro-location grid (~0.25 mile)
 DEFAULT_RESOLUTION = 9
@@ -34,6 +41,9 @@ RADIUS_TO_KRING = {
     5.0: 13,   # ~5 mile radius
 }
 
+# Rings at least this wide are compacted before being used as a SQL IN list
+COMPACT_MIN_K = 7
+
 
 def coords_to_h3(lat: float, lng: float, resolution: int = DEFAULT_RESOLUTION) -> str:
     """
@@ -50,6 +60,50 @@ def coords_to_h3(lat: float, lng: float, resolution: int = DEFAULT_RESOLUTION) -
     return h3.geo_to_h3(lat, lng, resolution)
 
 
+def coords_to_h3_vec(lats, lngs, resolution: int = DEFAULT_RESOLUTION) -> np.ndarray:
+    """
+    Convert many coordinates to H3 cells in one pass, kept as uint64 so no
+    string is allocated per cell (see h3_to_strings).
+    
+    Args:
+        lats: Latitudes in decimal degrees
+        lngs: Longitudes in decimal degrees
+        resolution: H3 resolution (0-15)
+        
+    Returns:
+        uint64 array of cells, in input order
+    """
+    lats = np.asarray(lats, dtype=np.float64).tolist()
+    lngs = np.asarray(lngs, dtype=np.float64).tolist()
+    return np.fromiter(map(h3_int.geo_to_h3, lats, lngs, repeat(resolution)), dtype=np.uint64, count=len(lats))
+
+
+# H3 cell layout: resolution in bits 52-55, then one 3-bit digit per
+# resolution 1-15; digits past the cell's resolution are all ones (7)
+_H3_RES_SHIFT = 52
+_H3_RES_MASK = np.uint64(0xF << _H3_RES_SHIFT)
+
+
+def h3_to_parent_vec(cells, parent_resolution: int) -> np.ndarray:
+    """
+    Parents of many uint64 cells (each at parent_resolution or finer) with
+    bit operations over the whole array: set the resolution field and mark
+    the digits below it unused.
+    
+    Returns:
+        uint64 array of parent cells
+    """
+    unused_digits = np.uint64((1 << (3 * (15 - parent_resolution))) - 1)
+    resolution_bits = np.uint64(parent_resolution << _H3_RES_SHIFT)
+    return (np.asarray(cells, dtype=np.uint64) & ~_H3_RES_MASK) | resolution_bits | unused_digits
+
+
+def h3_to_strings(cells) -> List[str]:
+    """Hex strings (the usual H3 index form) for uint64 cells"""
+    return list(map('{:x}'.format, np.asarray(cells, dtype=np.uint64).tolist()))
+
+
+@lru_cache(maxsize=131072)
 def h3_to_coords(h3_index: str) -> Tuple[float, float]:
     """
     Get center coordinates of an H3 hex.
@@ -63,20 +117,47 @@ def h3_to_coords(h3_index: str) -> Tuple[float, float]:
     return h3.h3_to_geo(h3_index)
 
 
-def get_hex_boundary(h3_index: str) -> List[Tuple[float, float]]:
+@lru_cache(maxsize=32768)
+def get_hex_boundary(h3_index: str) -> Tuple[Tuple[float, float], ...]:
     """
     Get polygon boundary coordinates for an H3 hex.
     Useful for rendering hex zones on maps.
+    Cached, since map tiles re-render the same hexes.
     
     Args:
         h3_index: H3 hex index string
         
     Returns:
-        List of (lat, lng) tuples forming the hex boundary
+        Tuple of (lat, lng) tuples forming the hex boundary
     """
     return h3.h3_to_geo_boundary(h3_index)
 
 
+@lru_cache(maxsize=100_000)
+def get_hex_geojson_ring(h3_index: str) -> Tuple[Tuple[float, float], ...]:
+    """
+    Get the closed GeoJSON ring ((lng, lat) pairs) of an H3 hex.
+    Cached like get_hex_boundary, for map features.
+    
+    Args:
+        h3_index: H3 hex index string
+        
+    Returns:
+        Tuple of (lng, lat) tuples, first point repeated at the end
+    """
+    return h3.h3_to_geo_boundary(h3_index, geo_json=True)
+
+
+def get_kring_size(radius_miles: float) -> int:
+    """K-ring size covering a radius at resolution 9"""
+    return RADIUS_TO_KRING.get(radius_miles, int(radius_miles * 2.5))
+
+
+@lru_cache(maxsize=16384)
+def _k_ring(center_hex: str, k: int) -> Tuple[str, ...]:
+    return tuple(h3.k_ring(center_hex, k))
+
+
 def get_radius_hexes(
     lat: float, 
     lng: float, 
@@ -85,7 +166,8 @@ def get_radius_hexes(
 ) -> List[str]:
     """
     Get all H3 hexes within a radius of a point.
-    Uses k-ring expansion for efficient coverage.
+    Uses k-ring expansion for efficient coverage; rings are cached per
+    (center, k), so repeated polls from one spot skip the traversal.
     
     Args:
         lat: Center latitude
@@ -98,11 +180,65 @@ def get_radius_hexes(
     """
     center_hex = h3.geo_to_h3(lat, lng, resolution)
     
-    # Get appropriate k-ring size for radius
-    k = RADIUS_TO_KRING.get(radius_miles, int(radius_miles * 2.5))
-    
     # k_ring returns a set of all hexes within k steps
-    return list(h3.k_ring(center_hex, k))
+    return list(_k_ring(center_hex, get_kring_size(radius_miles)))
+
+
+@lru_cache(maxsize=4096)
+def _compacted_k_ring(center_hex: str, k: int, min_resolution: int) -> Tuple[Tuple[int, Tuple[str, ...]], ...]:
+    by_resolution: Dict[int, Set[str]] = {}
+    for hex_id in h3.compact(set(_k_ring(center_hex, k))):
+        resolution = h3.h3_get_resolution(hex_id)
+        if resolution < min_resolution:
+            by_resolution.setdefault(min_resolution, set()).update(h3.h3_to_children(hex_id, min_resolution))
+        else:
+            by_resolution.setdefault(resolution, set()).add(hex_id)
+    return tuple((resolution, tuple(hexes)) for resolution, hexes in sorted(by_resolution.items()))
+
+
+def get_radius_hexes_compacted(
+    lat: float,
+    lng: float,
+    radius_miles: float,
+    min_resolution: int = 7
+) -> Dict[int, List[str]]:
+    """
+    Get the resolution 9 radius cover compacted to the fewest cells.
+    Complete groups of 7 children are replaced by their parent, so a wide
+    radius becomes a short IN list per parent-resolution column
+    (h3_index / h3_index_r8 / h3_index_r7) with the same exact coverage.
+    
+    Args:
+        lat: Center latitude
+        lng: Center longitude
+        radius_miles: Radius in miles
+        min_resolution: Coarsest resolution with a column to filter on
+        
+    Returns:
+        Dict of resolution -> hex indices at that resolution
+    """
+    center_hex = h3.geo_to_h3(lat, lng, DEFAULT_RESOLUTION)
+    compacted = _compacted_k_ring(center_hex, get_kring_size(radius_miles), min_resolution)
+    return {resolution: list(hexes) for resolution, hexes in compacted}
+
+
+def get_hex_ring_distances(h3_index: str, k: int) -> Dict[str, int]:
+    """
+    Get every hex within k steps mapped to its grid distance from the center,
+    from a single k_ring_distances call.
+    
+    Args:
+        h3_index: Center hex index
+        k: Maximum ring distance
+        
+    Returns:
+        Dict of hex index -> ring distance (0 for the center)
+    """
+    return {
+        hex_id: distance
+        for distance, ring in enumerate(h3.k_ring_distances(h3_index, k))
+        for hex_id in ring
+    }
 
 
 def get_hex_ring(h3_index: str, k: int = 1) -> List[str]:
@@ -130,7 +266,12 @@ def get_hex_neighbors(h3_index: str) -> List[str]:
     Returns:
         List of 6 neighboring hex indices
     """
-    return list(h3.hex_ring(h3_index, 1))
+    return list(_hex_neighbors(h3_index))
+
+
+@lru_cache(maxsize=32768)
+def _hex_neighbors(h3_index: str) -> Tuple[str, ...]:
+    return tuple(h3.hex_ring(h3_index, 1))
 
 
 def get_parent_hex(h3_index: str, parent_resolution: int) -> str:
@@ -259,21 +400,19 @@ def hexes_to_geojson(hex_list: List[str]) -> Dict:
     Returns:
         GeoJSON dict with MultiPolygon geometry
     """
-    features = []
-    for hex_id in hex_list:
-        boundary = h3.h3_to_geo_boundary(hex_id, geo_json=True)
-        features.append({
-            "type": "Feature",
-            "properties": {"h3_index": hex_id},
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [boundary]
-            }
-        })
+    # Cached boundaries in one pass, then one literal per feature
+    boundaries = map(get_hex_geojson_ring, hex_list)
     
     return {
         "type": "FeatureCollection",
-        "features": features
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {"h3_index": hex_id},
+                "geometry": {"type": "Polygon", "coordinates": [boundary]},
+            }
+            for hex_id, boundary in zip(hex_list, boundaries)
+        ]
     }
 
 
@@ -297,30 +436,46 @@ def get_resolution_for_radius(radius_miles: float) -> int:
         return 6
 
 
-def estimate_distance_miles(h3_index_1: str, h3_index_2: str) -> float:
+def estimate_distances_miles(h3_index: str, h3_indexes: List[str]) -> np.ndarray:
     """
-    Estimate distance between two hex centers in miles.
+    Estimate distances from one hex center to many, in one batch kernel call.
     
     Args:
-        h3_index_1: First hex index
-        h3_index_2: Second hex index
+        h3_index: Origin hex index
+        h3_indexes: Hex indices to measure to
         
     Returns:
-        Approximate distance in miles
+        Array of approximate distances in miles, in input order
     """
-    from math import radians, sin, cos, sqrt, atan2
-    
-    lat1, lng1 = h3.h3_to_geo(h3_index_1)
-    lat2, lng2 = h3.h3_to_geo(h3_index_2)
+    lat, lng = h3_to_coords(h3_index)
+    coords = np.array([h3_to_coords(hex_id) for hex_id in h3_indexes], dtype=np.float64).reshape(-1, 2)
     
-    # Haversine formula
-    R = 3959  # Earth's radius in miles
-    
-    lat1, lng1, lat2, lng2 = map(radians, [lat1, lng1, lat2, lng2])
-    dlat = lat2 - lat1
-    dlng = lng2 - lng1
+    return haversine_distance_batch(lat, lng, coords[:, 0], coords[:, 1]) / METERS_PER_MILE
+
+
+def prewarm_geo_caches(centers: Iterable[Tuple[float, float]], k: int = 13,
+                       resolutions: Iterable[int] = (6, 7, 8, 9, 10)) -> int:
+    """
+    Populate the area and coordinate caches ahead of the first feed query:
+    hex areas for the given resolutions and h3_to_coords for the k-ring of
+    each center's resolution 9 hex.
     
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlng/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
+    Returns:
+        Number of hexes warmed
+    """
+    for resolution in resolutions:
+        get_hex_area_km2(resolution)
     
-    return R * c
+    warmed = 0
+    for lat, lng in centers:
+        for hex_id in _k_ring(coords_to_h3(lat, lng), k):
+            h3_to_coords(hex_id)
+            warmed += 1
+    return warmed
+
+
+def clear_geo_caches():
+    """Drop all memoized H3 lookups (for tests)"""
+    for cached in (h3_to_coords, get_hex_boundary, get_hex_geojson_ring, _hex_neighbors, get_hex_area_km2,
+                   _k_ring, _compacted_k_ring):
+        cached.cache_clear()
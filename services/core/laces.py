@@ -26,10 +26,7 @@ def boost_post(
     if not post:
         raise ValueError("Post not found")
 
-    # Deduct Laces from user
-    user.laces_balance -= BOOST_COST
-
-    # Record the transaction in the LacesLedger
+    # Record the transaction in the LacesLedger (its trigger deducts the balance)
     ledger_entry = laces_models.LacesLedger(
         user_id=user_id,
         related_post_id=post_id,
@@ -51,14 +48,13 @@ def add_laces_to_user(
     db: Session,
     user_id: int,
     amount: int,
-    transaction_type: str = "admin_add",
+    transaction_type: str = "ADMIN_ADD",
 ):
     user = db.query(user_models.User).filter(user_models.User.id == user_id).first()
     if not user:
         raise ValueError("User not found")
 
-    user.laces_balance += amount
-
+    # The ledger trigger credits the balance
     ledger_entry = laces_models.LacesLedger(
         user_id=user_id,
         amount=amount,
@@ -0,0 +1,57 @@
+import geohash2
+
+from services.core.geohash_utils import GeohashUtils, gh_encode, gh_decode, gh_prefix_range
+
+
+def test_gh_encode_round_trip():
+    """Tests that packed geohashes decode back to the original string."""
+    geohash = geohash2.encode(42.3601, -71.0589, precision=12)
+
+    assert gh_decode(gh_encode(geohash)) == geohash
+    assert gh_decode(gh_encode(geohash), precision=5) == geohash[:5]
+    assert gh_encode(geohash) < 1 << 60
+
+
+def test_gh_encode_preserves_order():
+    """Tests that integer order matches lexicographic geohash order."""
+    geohashes = sorted(geohash2.encode(lat, -71.0, precision=12) for lat in (42.1, 42.2, 42.3, 42.4))
+
+    assert sorted(geohashes, key=gh_encode) == geohashes
+
+
+def test_gh_prefix_range():
+    """Tests that a prefix range contains exactly the geohashes with that prefix."""
+    lo, hi = gh_prefix_range('drt2z')
+
+    assert lo <= gh_encode('drt2zp2mr4ey') <= hi
+    assert lo <= gh_encode('drt2z') <= hi
+    assert not lo <= gh_encode('drt30000000') <= hi
+    assert gh_decode(lo) == 'drt2z0000000'
+    assert gh_decode(hi) == 'drt2zzzzzzzz'
+
+
+def test_geohashes_within_radius_covers_circle():
+    """Tests that every point inside the radius falls in a returned cell."""
+    cells = set(GeohashUtils.geohashes_within_radius(40.7128, -74.0060, 2.0, precision=6))
+
+    for i in range(-10, 11):
+        for j in range(-10, 11):
+            lat, lng = 40.7128 + i * 0.0018, -74.0060 + j * 0.0024
+            if GeohashUtils.distance_km(40.7128, -74.0060, lat, lng) <= 2.0:
+                assert GeohashUtils.encode(lat, lng, 6) in cells
+    assert len(cells) < 120
+
+
+def test_aggregate_by_h3_rolls_up_to_parent():
+    """Tests that fine H3 cells and raw coordinates land in the same parent bucket."""
+    import h3
+    from services.core.geohash_utils import SignalAggregator
+
+    signals = [
+        {'lat': 40.7128, 'lng': -74.0060, 'signal_type': 'SPOTTED'},
+        {'h3_index': h3.geo_to_h3(40.7128, -74.0060, 10), 'signal_type': 'SPOTTED'},
+    ]
+    aggregated = SignalAggregator.aggregate_by_h3(signals, resolution=8)
+
+    assert list(aggregated) == [h3.geo_to_h3(40.7128, -74.0060, 8)]
+    assert aggregated[h3.geo_to_h3(40.7128, -74.0060, 8)]['signal_count'] == 2
@@ -0,0 +1,46 @@
+import geohash2
+import numpy as np
+
+from services.core.geospatial import (
+    bbox_to_geohashes, encode_geohash_vec, validate_coordinates, validate_coordinates_vec
+)
+
+
+def test_encode_geohash_vec_matches_geohash2():
+    """Tests that the vectorized encoder agrees with geohash2 at every precision."""
+    rng = np.random.default_rng(7)
+    lats = rng.uniform(-90, 90, 500)
+    lons = rng.uniform(-180, 180, 500)
+
+    for precision in range(1, 13):
+        expected = [geohash2.encode(lat, lon, precision=precision) for lat, lon in zip(lats, lons)]
+        assert encode_geohash_vec(lats, lons, precision).tolist() == expected
+
+
+def test_bbox_to_geohashes_covers_bbox():
+    """Tests that every point inside the bbox falls in a returned cell, with no duplicates."""
+    cells = bbox_to_geohashes(40.70, -74.02, 40.75, -73.95, precision=6)
+    lats, lons = np.meshgrid(np.linspace(40.70, 40.75, 60), np.linspace(-74.02, -73.95, 60))
+
+    assert len(cells) == len(set(cells))
+    assert set(encode_geohash_vec(lats.ravel(), lons.ravel(), 6)) <= set(cells)
+
+
+def test_bbox_to_geohashes_coarsens_large_bbox():
+    """Tests that a bbox too large for max_cells is covered by fewer, coarser cells."""
+    cells = bbox_to_geohashes(25.0, -125.0, 49.0, -67.0, precision=6, max_cells=1000)
+    lats, lons = np.meshgrid(np.linspace(25.0, 49.0, 60), np.linspace(-125.0, -67.0, 60))
+    precision = len(cells[0])
+
+    assert len(cells) <= 1000
+    assert precision < 6 and all(len(cell) == precision for cell in cells)
+    assert set(encode_geohash_vec(lats.ravel(), lons.ravel(), precision)) <= set(cells)
+
+
+def test_validate_coordinates_vec_matches_scalar():
+    """Tests that the batch mask agrees with validate_coordinates, edges and NaN included."""
+    lats = np.array([0.0, 90.0, -90.0, 90.5, 45.0, np.nan, -91.0])
+    lons = np.array([0.0, 180.0, -180.0, 0.0, 180.1, 0.0, 10.0])
+
+    expected = [validate_coordinates(lat, lon) for lat, lon in zip(lats, lons)]
+    assert validate_coordinates_vec(lats, lons).tolist() == expected
@@ -0,0 +1,18 @@
+import h3
+import numpy as np
+
+from services.core.h3_geo import coords_to_h3_vec, h3_to_parent_vec, h3_to_strings
+
+
+def test_coords_to_h3_vec_and_parents_match_h3():
+    """Tests that the batch cell and parent helpers agree with h3's scalar API."""
+    rng = np.random.default_rng(3)
+    lats = rng.uniform(-85, 85, 500)
+    lngs = rng.uniform(-180, 180, 500)
+
+    cells = coords_to_h3_vec(lats, lngs, 9)
+    expected = [h3.geo_to_h3(lat, lng, 9) for lat, lng in zip(lats, lngs)]
+    assert h3_to_strings(cells) == expected
+
+    for resolution in (0, 5, 7, 8, 9):
+        assert h3_to_strings(h3_to_parent_vec(cells, resolution)) == [h3.h3_to_parent(c, resolution) for c in expected]
@@ -0,0 +1,13 @@
+import numpy as np
+
+from services.core.ranking import PROXIMITY_WEIGHT, fused_scores, rank_candidates
+
+
+def test_rank_candidates_fuses_proximity():
+    """Tests that proximity adds up to PROXIMITY_WEIGHT points and ranking orders by the fused score."""
+    distances = np.array([0.0, 0.5, 1.0, 2.0, 0.25])
+    rank_scores = np.array([10.0, 30.0, 52.0, 55.0, 10.0])
+
+    expected = rank_scores + PROXIMITY_WEIGHT * np.maximum(0.0, 1.0 - distances / 1.0)
+    np.testing.assert_allclose(fused_scores(distances, rank_scores, 1.0), expected)
+    assert rank_candidates(distances, rank_scores, 1.0).tolist() == [3, 2, 0, 1, 4]
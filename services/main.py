@@ -1,9 +1,11 @@
 import asyncio
 import logging
 import os
+from contextlib import asynccontextmanager
 
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import make_asgi_app
 from sentry_sdk.integrations.fastapi import FastApiIntegration
@@ -14,6 +16,7 @@ try:
     from .routers import router as api_router
     from .routers import hyperlocal, shop
     from .core.redis_client import get_redis
+    from .core.h3_geo import prewarm_geo_caches
     from .middleware.rate_limit import RateLimitMiddleware
     from .middleware.tracing import TracingMiddleware
     from .middleware.security_headers import SecurityHeadersMiddleware
@@ -22,10 +25,13 @@ except ImportError:
     from routers import router as api_router
     from routers import hyperlocal, shop
     from core.redis_client import get_redis
+    from core.h3_geo import prewarm_geo_caches
     from middleware.rate_limit import RateLimitMiddleware
     from middleware.tracing import TracingMiddleware
     from middleware.security_headers import SecurityHeadersMiddleware
 
+import orjson
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -45,13 +51,68 @@ if SENTRY_DSN:
     )
     logger.info("🛰️ Sentry enabled")
 
+# Major metro centers (lat, lng) warmed at startup
+MAJOR_METROS = {
+    "boston": (42.3601, -71.0589),
+    "nyc": (40.7128, -74.0060),
+    "la": (34.0522, -118.2437),
+    "chicago": (41.8781, -87.6298),
+}
+
+async def _warm_geo_caches():
+    """Prebuild H3 area/coordinate caches around the major metros off the event loop."""
+    try:
+        warmed = await asyncio.to_thread(prewarm_geo_caches, MAJOR_METROS.values())
+        logger.info("🗺️ Warmed H3 caches for %d hexes", warmed)
+    except Exception as exc:
+        logger.warning("Unable to warm H3 caches on startup: %s", exc)
+
+
+async def _warm_critical_caches():
+    """Fire-and-forget warming for top endpoints, run in-process (no broker round-trip)."""
+    try:
+        from worker.tasks import _warm_heatmap  # lazy import, only the helper is used
+
+        logger.info("🔥 Warming heatmap caches for major metros")
+        # The warmed tiles are global, so one pass clears every metro's zone
+        # keys and fetches the tiles concurrently
+        result = await _warm_heatmap(list(MAJOR_METROS), redis_conn=get_redis())
+        logger.info("🔥 Warmed %d heatmap tiles", result["tiles_warmed"])
+    except Exception as exc:
+        logger.warning("Unable to warm caches on startup: %s", exc)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """🚀 Dharma API startup/shutdown - the underground network coming online and going dark"""
+    logger.info("🔥 Dharma API starting up...")
+    logger.info("🌍 Environment: %s", os.getenv("ENVIRONMENT", "development"))
+    logger.info("🗄️ Database: Connected")
+    logger.info("⚡ Redis: Connected")
+    logger.info("🪙 LACES economy: Active")
+    logger.info("📍 Hyperlocal signals: Online")
+
+    # Held here so the fire-and-forget warmups aren't garbage collected mid-run
+    warmups = [asyncio.create_task(_warm_geo_caches()), asyncio.create_task(_warm_critical_caches())]
+
+    logger.info("✅ Dharma API ready - the underground network is live!")
+    yield
+
+    logger.info("🛑 Dharma API shutting down...")
+    for task in warmups:
+        task.cancel()
+    logger.info("💾 Saving community state...")
+    logger.info("✅ Dharma API shutdown complete")
+
 # Create FastAPI app with enhanced metadata
 app = FastAPI(
     title="Dharma API",
     description="The Underground Network for Sneaker Culture",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add prometheus asgi middleware to route /metrics requests
@@ -95,73 +156,46 @@ except Exception as e:
     logger.warning(f"⚠️ Rate limiting disabled: {e}")
     logger.info("🔧 Continuing without rate limiting in development mode")
 
-async def _warm_critical_caches():
-    """Fire-and-forget warming for top endpoints."""
-    try:
-        from worker.tasks import refresh_heatmap_cache  # lazy import to avoid Celery unless needed
-
-        logger.info("🔥 Scheduling heatmap warmup for major metros")
-        for city in ["boston", "nyc", "la", "chicago"]:
-            refresh_heatmap_cache.delay(zones=[city])
-    except Exception as exc:
-        logger.warning("Unable to warm caches on startup: %s", exc)
-
-
-@app.on_event("startup")
-async def startup_event():
-    """🚀 Dharma API startup - the underground network is coming online"""
-    logger.info("🔥 Dharma API starting up...")
-    logger.info("🌍 Environment: %s", os.getenv("ENVIRONMENT", "development"))
-    logger.info("🗄️ Database: Connected")
-    logger.info("⚡ Redis: Connected")
-    logger.info("🪙 LACES economy: Active")
-    logger.info("📍 Hyperlocal signals: Online")
-
-    asyncio.create_task(_warm_critical_caches())
-
-    logger.info("✅ Dharma API ready - the underground network is live!")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """🛑 Dharma API shutdown"""
-    logger.info("🛑 Dharma API shutting down...")
-    logger.info("💾 Saving community state...")
-    logger.info("✅ Dharma API shutdown complete")
+# /health and / are constant for the life of the process (polled by load
+# balancers and liveness probes), so their bodies are encoded once
+_HEALTH_BYTES = orjson.dumps({
+    "status": "ok",
+    "service": "dharma-api",
+    "version": "1.0.0",
+    "message": "The underground network is alive! 🔥",
+    "environment": os.getenv("ENVIRONMENT", "development"),
+    "features": {
+        "hyperlocal_signals": True,
+        "laces_economy": True,
+        "community_feed": True,
+        "drop_zones": True
+    }
+})
+
+_ROOT_BYTES = orjson.dumps({
+    "message": "Welcome to Dharma 🔥",
+    "tagline": "The Underground Network for Sneaker Culture",
+    "docs": "/docs",
+    "health": "/health",
+    "version": "1.0.0",
+    "community": {
+        "discord": "https://discord.gg/dharma",
+        "twitter": "@DharmaNetwork",
+        "github": "https://github.com/myspacecornelius/Dharma"
+    }
+})
 
 # Enhanced health check endpoint
 @app.get("/health")
 def health_check():
     """🩺 Health check - verify Dharma is alive and well"""
-    return {
-        "status": "ok",
-        "service": "dharma-api",
-        "version": "1.0.0",
-        "message": "The underground network is alive! 🔥",
-        "environment": os.getenv("ENVIRONMENT", "development"),
-        "features": {
-            "hyperlocal_signals": True,
-            "laces_economy": True,
-            "community_feed": True,
-            "drop_zones": True
-        }
-    }
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
 
 # Root endpoint with welcome message
 @app.get("/")
 def root():
     """🏠 Welcome to Dharma - The Underground Network for Sneaker Culture"""
-    return {
-        "message": "Welcome to Dharma 🔥",
-        "tagline": "The Underground Network for Sneaker Culture",
-        "docs": "/docs",
-        "health": "/health",
-        "version": "1.0.0",
-        "community": {
-            "discord": "https://discord.gg/dharma",
-            "twitter": "@DharmaNetwork",
-            "github": "https://github.com/myspacecornelius/Dharma"
-        }
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 # Include API routers
 app.include_router(api_router)
@@ -175,5 +209,7 @@ if __name__ == "__main__":
         app, 
         host="0.0.0.0", 
         port=int(os.getenv("API_PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
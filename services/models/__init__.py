@@ -9,22 +9,23 @@ from services.models.subscription import Subscription
 from services.models.location import Location
 from services.models.laces import LacesLedger
 from services.models.session import UserSession
-from services.models.signal import Signal
-from services.models.drop import Drop, Store, DropStore
+from services.models.signal import Signal, SignalCounters, Tag
+from services.models.drop import Drop, Store, DropStore, DropRegion, StoreFeature
 from services.models.dropzone import DropZone, DropZoneMember, DropZoneCheckIn
 from services.models.heat_map_tile import HeatMapTile
 
 # Feed v2 models
 from services.models.listing import Listing, ListingSave
 from services.models.feed_event import FeedEvent
-from services.models.heat_index import NeighborhoodHeatIndex
-from services.models.trade_match import TradeMatch, UserWishlist
+from services.models.heat_index import NeighborhoodHeatIndex, HeatTrending, HeatIndexHourly
+from services.models.trade_match import TradeMatch, TradeMatchParticipant, UserWishlist
 
 __all__ = [
     "Base", "User", "Post", "Like", "Save", "Release", "Subscription", 
-    "Location", "LacesLedger", "UserSession", "Signal", "Drop", "Store", "DropStore",
+    "Location", "LacesLedger", "UserSession", "Signal", "SignalCounters", "Tag", "Drop", "Store", "DropStore",
+    "DropRegion", "StoreFeature",
     "DropZone", "DropZoneMember", "DropZoneCheckIn", "HeatMapTile",
     # Feed v2
-    "Listing", "ListingSave", "FeedEvent", "NeighborhoodHeatIndex", 
-    "TradeMatch", "UserWishlist"
+    "Listing", "ListingSave", "FeedEvent", "NeighborhoodHeatIndex", "HeatTrending", "HeatIndexHourly",
+    "TradeMatch", "TradeMatchParticipant", "UserWishlist"
 ]
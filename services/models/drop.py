@@ -1,11 +1,12 @@
-import uuid
 from datetime import datetime
 from typing import List
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, DECIMAL, JSON, Index, CheckConstraint, Enum
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from sqlalchemy import Column, String, Integer, SmallInteger, Boolean, DateTime, ForeignKey, Text, DECIMAL, Index, CheckConstraint, Computed, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID, ARRAY, TSVECTOR
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.associationproxy import association_proxy
 from services.database import Base
+from services.models.types import SmallIntEnum
 
 class DropStatus:
     """Drop status constants"""
@@ -16,14 +17,26 @@ class DropStatus:
     CANCELLED = 'cancelled'
     ENDED = 'ended'
 
+# Stored as SMALLINT ids (positions), mirrored in the drop_statuses table
+DROP_STATUSES = (
+    DropStatus.UPCOMING, DropStatus.LIVE, DropStatus.SOLD_OUT,
+    DropStatus.DELAYED, DropStatus.CANCELLED, DropStatus.ENDED,
+)
+
+# Stored as SMALLINT ids (positions), mirrored in the retailer_types table
+RETAILER_TYPES = (
+    'NIKE', 'ADIDAS', 'FOOTLOCKER', 'FINISH_LINE', 'CHAMPS', 'FOOTACTION',
+    'JD_SPORTS', 'SNEAKERSNSTUFF', 'END', 'SIZE', 'BOUTIQUE', 'CONSIGNMENT', 'OTHER',
+)
+
 class Drop(Base):
     __tablename__ = 'drops'
     
     # Core identity
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuidv7()"))  # Time-ordered
     
     # Product information
-    brand = Column(String(100), nullable=False, index=True)
+    brand = Column(String(100), nullable=False)  # Indexed via ix_drops_brand_release
     sku = Column(String(100), nullable=True, index=True)
     name = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
@@ -38,29 +51,25 @@ class Drop(Base):
     images = Column(ARRAY(String), nullable=True)  # Multiple product images
     
     # Status and metadata
-    status = Column(
-        Enum('upcoming', 'live', 'sold_out', 'delayed', 'cancelled', 'ended', name='drop_status_enum'),
-        nullable=False, default='upcoming', index=True
-    )
+    status = Column(SmallIntEnum(DROP_STATUSES), nullable=False, default='upcoming')  # Indexed via ix_drops_upcoming_release / ix_drops_live_release
     
     # Geographic and channel information
-    regions = Column(ARRAY(String), nullable=True)  # ['US', 'EU', 'ASIA']
     release_type = Column(String(50), nullable=True)  # 'FCFS', 'RAFFLE', 'SHOCK_DROP', 'EXCLUSIVE'
     
     # External links and data
-    links = Column(JSON, nullable=True)  # {official_url, raffle_links, purchase_links}
+    links = Column(JSONB, nullable=True)  # {official_url, raffle_links, purchase_links}
     original_source = Column(String(100), nullable=True)  # 'SNKRS', 'Shopify', 'Manual'
     external_id = Column(String(100), nullable=True)  # ID from external source
     
     # Community engagement
-    hype_score = Column(Integer, default=0, nullable=False)  # Community-driven hype rating
-    interest_count = Column(Integer, default=0, nullable=False)  # Number of users interested
+    hype_score = Column(SmallInteger, default=0, nullable=False)  # Community-driven hype rating
+    interest_count = Column(SmallInteger, default=0, nullable=False)  # Number of users interested
     signal_count = Column(Integer, default=0, nullable=False)  # Related signals count
     
     # Temporal tracking
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
-    last_checked_at = Column(DateTime(timezone=True), nullable=True)  # Last external sync
+    last_checked_at = Column(DateTime(timezone=False), nullable=True)  # Last external sync (naive UTC)
     
     # Admin flags
     is_featured = Column(Boolean, default=False, nullable=False)
@@ -68,15 +77,21 @@ class Drop(Base):
     
     # Relationships
     stores = relationship("Store", secondary="drop_stores", back_populates="drops")
+    region_links = relationship("DropRegion", lazy="selectin", cascade="all, delete-orphan")
     # signals = relationship("Signal", back_populates="drop")  # Will add when Signal is integrated
     
+    # Geographic availability, e.g. ['US', 'EU', 'ASIA'] (rows in drop_regions)
+    regions = association_proxy("region_links", "region", creator=lambda region: DropRegion(region=region))
+    
     # Constraints and Indexes
     __table_args__ = (
         # Performance indexes
         Index('ix_drops_brand_release', brand, release_at),
-        Index('ix_drops_status_release', status, release_at),
+        Index('ix_drops_upcoming_release', release_at, postgresql_where=text("status = 0"),  # upcoming
+              postgresql_include=['id', 'brand', 'name', 'image_url']),
+        Index('ix_drops_live_release', release_at, postgresql_where=text("status = 1"),  # live
+              postgresql_include=['id', 'brand', 'name', 'image_url']),
         Index('ix_drops_hype_release', hype_score.desc(), release_at),
-        Index('ix_drops_regions', regions, postgresql_using='gin'),
         Index('ix_drops_featured_release', is_featured, release_at.desc()),
         
         # Search indexes
@@ -84,10 +99,11 @@ class Drop(Base):
         Index('ix_drops_external', original_source, external_id),
         
         # Data quality constraints
-        CheckConstraint('hype_score >= 0', name='positive_hype_score'),
-        CheckConstraint('interest_count >= 0', name='positive_interest_count'),
+        CheckConstraint('hype_score BETWEEN 0 AND 32767', name='positive_hype_score'),
+        CheckConstraint('interest_count BETWEEN 0 AND 32767', name='positive_interest_count'),
         CheckConstraint('signal_count >= 0', name='positive_signal_count'),
         CheckConstraint('retail_price >= 0', name='positive_retail_price'),
+        CheckConstraint('status BETWEEN 0 AND 5', name='valid_drop_status'),
     )
     
     def is_upcoming(self) -> bool:
@@ -150,7 +166,7 @@ class Drop(Base):
             "retail_price": float(self.retail_price) if self.retail_price else None,
             "image_url": self.image_url,
             "status": self.status,
-            "regions": self.regions,
+            "regions": list(self.regions),
             "release_type": self.release_type,
             "links": self.links,
             "hype_score": self.hype_score,
@@ -166,7 +182,7 @@ class Store(Base):
     __tablename__ = 'stores'
     
     # Core identity
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuidv7()"))  # Time-ordered
     name = Column(String(200), nullable=False)
     slug = Column(String(100), unique=True, nullable=False, index=True)
     
@@ -179,24 +195,18 @@ class Store(Base):
     postal_code = Column(String(20), nullable=True)
     
     # Store classification
-    retailer_type = Column(
-        Enum('NIKE', 'ADIDAS', 'FOOTLOCKER', 'FINISH_LINE', 'CHAMPS', 'FOOTACTION', 
-             'JD_SPORTS', 'SNEAKERSNSTUFF', 'END', 'SIZE', 'BOUTIQUE', 'CONSIGNMENT', 
-             'OTHER', name='retailer_type_enum'),
-        nullable=False, index=True
-    )
+    retailer_type = Column(SmallIntEnum(RETAILER_TYPES), nullable=False, index=True)
     
     # Store details
     phone = Column(String(20), nullable=True)
     website_url = Column(String(500), nullable=True)
-    social_links = Column(JSON, nullable=True)  # {instagram, twitter, etc}
+    social_links = Column(JSONB, nullable=True)  # {instagram, twitter, etc}
     
     # Operating information
-    open_hours = Column(JSON, nullable=True)  # Weekly schedule
+    open_hours = Column(JSONB, nullable=True)  # Weekly schedule
     timezone = Column(String(50), nullable=True)
     
     # Store features and policies
-    features = Column(ARRAY(String), nullable=True)  # ['FCFS', 'RAFFLE', 'RESERVATION', 'APP_ONLY']
     release_methods = Column(ARRAY(String), nullable=True)  # How they handle releases
     
     # Community and verification
@@ -205,7 +215,10 @@ class Store(Base):
     signal_count = Column(Integer, default=0, nullable=False)  # Signals from this store
     
     # External integration
-    external_ids = Column(JSON, nullable=True)  # {nike_store_id, footlocker_id, etc}
+    external_ids = Column(JSONB, nullable=True)  # {nike_store_id, footlocker_id, etc}
+    
+    # Full-text search document over name and city, maintained by Postgres
+    name_tsv = Column(TSVECTOR, Computed("to_tsvector('english', coalesce(name, '') || ' ' || coalesce(city, ''))", persisted=True))
     
     # Metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -213,20 +226,28 @@ class Store(Base):
     
     # Relationships
     drops = relationship("Drop", secondary="drop_stores", back_populates="stores")
+    feature_links = relationship("StoreFeature", lazy="selectin", cascade="all, delete-orphan")
     # signals = relationship("Signal", back_populates="store")  # Will add when Signal is integrated
     
+    # Store features, e.g. ['FCFS', 'RAFFLE', 'RESERVATION', 'APP_ONLY'] (rows in store_features)
+    features = association_proxy("feature_links", "feature", creator=lambda feature: StoreFeature(feature=feature))
+    
     # Constraints and Indexes
     __table_args__ = (
         # Geospatial indexes (will convert to proper PostGIS later)
         Index('ix_stores_city_retailer', city, retailer_type),
-        Index('ix_stores_retailer_active', retailer_type, is_active),
-        Index('ix_stores_features', features, postgresql_using='gin'),
+        Index('ix_stores_retailer_active', retailer_type, postgresql_where=text('is_active')),
         
         # Search indexes
-        Index('ix_stores_name_search', func.lower(name)),
+        Index('ix_stores_name_tsv', name_tsv, postgresql_using='gin',
+              postgresql_with={'fastupdate': 'on', 'gin_pending_list_limit': 16384}),
+        Index('ix_stores_external_ids', external_ids, postgresql_using='gin',
+              postgresql_ops={'external_ids': 'jsonb_path_ops'},
+              postgresql_with={'fastupdate': 'on', 'gin_pending_list_limit': 16384}),
         
         # Data quality constraints
         CheckConstraint('signal_count >= 0', name='positive_signal_count'),
+        CheckConstraint('retailer_type BETWEEN 0 AND 12', name='valid_retailer_type'),
     )
     
     def add_signal(self):
@@ -267,7 +288,7 @@ class Store(Base):
             "retailer_type": self.retailer_type,
             "phone": self.phone,
             "website_url": self.website_url,
-            "features": self.features,
+            "features": list(self.features),
             "release_methods": self.get_release_methods_display(),
             "is_verified": self.is_verified,
             "is_active": self.is_active,
@@ -283,7 +304,7 @@ class DropStore(Base):
     store_id = Column(UUID(as_uuid=True), ForeignKey('stores.id'), primary_key=True)
     
     # Store-specific drop information
-    local_release_time = Column(DateTime(timezone=True), nullable=True)  # Store's local release time
+    local_release_time = Column(DateTime(timezone=False), nullable=True)  # Store's local wall-clock release time
     allocation = Column(Integer, nullable=True)  # Expected stock at this store
     release_method = Column(String(50), nullable=True)  # How this store is releasing
     registration_url = Column(String(500), nullable=True)  # Store-specific registration link
@@ -294,4 +315,31 @@ class DropStore(Base):
     
     # Source tracking
     source = Column(String(100), nullable=True)  # How we learned about this drop at this store
-    confidence_score = Column(Integer, default=50, nullable=False)  # 0-100 confidence in accuracy
\ No newline at end of file
+    confidence_score = Column(SmallInteger, default=50, nullable=False)  # 0-100 confidence in accuracy
+    
+    __table_args__ = (
+        CheckConstraint('confidence_score BETWEEN 0 AND 100', name='valid_confidence_score'),
+    )
+
+
+class DropRegion(Base):
+    """Region a drop releases in"""
+    __tablename__ = 'drop_regions'
+    
+    drop_id = Column(UUID(as_uuid=True), ForeignKey('drops.id', ondelete="CASCADE"), primary_key=True)
+    region = Column(String(50), primary_key=True)
+    
+    __table_args__ = (
+        Index('ix_drop_regions_region', region, drop_id),
+    )
+
+class StoreFeature(Base):
+    """Feature or release policy offered by a store"""
+    __tablename__ = 'store_features'
+    
+    store_id = Column(UUID(as_uuid=True), ForeignKey('stores.id', ondelete="CASCADE"), primary_key=True)
+    feature = Column(String(50), primary_key=True)
+    
+    __table_args__ = (
+        Index('ix_store_features_feature', feature, store_id),
+    )
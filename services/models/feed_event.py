@@ -4,11 +4,15 @@ Every action becomes a feed event for real-time updates without heavy recomputin
 """
 
 import uuid
-from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Index, Enum
-from sqlalchemy.dialects.postgresql import UUID, JSON
+from datetime import datetime, timezone
+from typing import Optional
+import h3
+from sqlalchemy import Column, DateTime, Index, CheckConstraint, text, or_
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from services.database import Base
+from services.models.types import H3Int, SmallIntEnum
+import orjson
 
 
 class FeedEventType:
@@ -26,6 +30,27 @@ class FeedEventType:
     USER_PICKUP = 'USER_PICKUP'           # User picked up release
     MEETUP_COMPLETED = 'MEETUP_COMPLETED' # Local exchange completed
 
+# Stored as SMALLINT ids (positions), mirrored in the feed_event_types table
+FEED_EVENT_TYPES = (
+    FeedEventType.NEW_LISTING, FeedEventType.PRICE_DROP, FeedEventType.ITEM_SOLD, FeedEventType.ITEM_TRADED,
+    FeedEventType.TRADE_REQUEST, FeedEventType.SHOP_BROADCAST, FeedEventType.SHOP_RESTOCK, FeedEventType.FLASH_SALE,
+    FeedEventType.DROP_LIVE, FeedEventType.DROP_SOLD_OUT, FeedEventType.USER_PICKUP, FeedEventType.MEETUP_COMPLETED,
+)
+
+# Mirrored in the feed_entity_types table
+FEED_ENTITY_TYPES = ('listing', 'drop', 'store', 'meetup')
+
+# Activity ribbon text, rendered from the payload when read
+_DISPLAY_TEXT = {
+    FeedEventType.NEW_LISTING: lambda p: (f"New listing: {p['title']} - ${p['price']}" if p.get('price')
+                                          else f"New listing: {p['title']} (Trade)"),
+    FeedEventType.PRICE_DROP: lambda p: (f"Price drop: {p['title']} ${p['old_price']} → ${p['new_price']} "
+                                         f"({p['drop_percent']:.0f}% off)"),
+    FeedEventType.ITEM_SOLD: lambda p: f"Just sold nearby: {p['title']}",
+    FeedEventType.SHOP_RESTOCK: lambda p: f"Restock at {p['store_name']}: {p['product_name']}",
+    FeedEventType.DROP_LIVE: lambda p: f"Drop live: {p['drop_name']}",
+}
+
 
 class FeedEvent(Base):
     """
@@ -42,30 +67,22 @@ class FeedEvent(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
     # Event classification
-    event_type = Column(
-        Enum(
-            'NEW_LISTING', 'PRICE_DROP', 'ITEM_SOLD', 'ITEM_TRADED',
-            'TRADE_REQUEST', 'SHOP_BROADCAST', 'SHOP_RESTOCK', 'FLASH_SALE',
-            'DROP_LIVE', 'DROP_SOLD_OUT', 'USER_PICKUP', 'MEETUP_COMPLETED',
-            name='feed_event_type_enum'
-        ),
-        nullable=False, index=True
-    )
+    event_type = Column(SmallIntEnum(FEED_EVENT_TYPES), nullable=False)
     
     # Entity reference (polymorphic)
-    entity_type = Column(String(50), nullable=False, index=True)  # 'listing', 'drop', 'store', 'meetup'
-    entity_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    entity_type = Column(SmallIntEnum(FEED_ENTITY_TYPES), nullable=False)  # 'listing', 'drop', 'store', 'meetup'
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
     
     # Actor (user who triggered event, if applicable)
-    user_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+    user_id = Column(UUID(as_uuid=True), nullable=True)
     
-    # Location - H3 indexed for geographic filtering
-    h3_index = Column(String(15), nullable=False, index=True)  # Resolution 9
-    h3_index_r8 = Column(String(15), nullable=True, index=True)  # Resolution 8
-    h3_index_r7 = Column(String(15), nullable=True, index=True)  # Resolution 7
+    # Location - H3 indexed for geographic filtering, stored as BIGINT cells
+    h3_index = Column(H3Int, nullable=False)  # Resolution 9
+    h3_index_r8 = Column(H3Int, nullable=True)  # Resolution 8
+    h3_index_r7 = Column(H3Int, nullable=True)  # Resolution 7
     
     # Event payload (flexible JSON for event-specific data)
-    payload = Column(JSON, nullable=False, default=dict)
+    payload = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
     """
     Payload examples by event type:
     
@@ -114,14 +131,12 @@ class FeedEvent(Base):
         }
     """
     
-    # Display text (pre-computed for activity ribbon)
-    display_text = Column(String(500), nullable=True)
-    
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     expires_at = Column(DateTime(timezone=True), nullable=True)  # For time-limited events
     
-    # Indexes for efficient querying
+    # Indexes for efficient querying. Single-column lookups on h3/type/
+    # entity/user use the leading column of these, so none are declared
     __table_args__ = (
         # Primary feed query: events in area, sorted by time
         Index('ix_feed_events_h3_time', h3_index, created_at.desc()),
@@ -139,21 +154,47 @@ class FeedEvent(Base):
         Index('ix_feed_events_user_time', user_id, created_at.desc()),
         
         # Cleanup: expired events
-        Index('ix_feed_events_expires', expires_at),
+        Index('ix_feed_events_expires', expires_at, postgresql_where=text('expires_at IS NOT NULL')),
+        
+        # Time-window scans (append-only, so BRIN)
+        Index('ix_feed_events_created_at', created_at, postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
+        Index('ix_feed_events_payload', payload, postgresql_using='gin', postgresql_ops={'payload': 'jsonb_path_ops'}),
+        
+        # Data quality constraints
+        CheckConstraint('event_type BETWEEN 0 AND 11', name='valid_feed_event_type'),
+        CheckConstraint('entity_type BETWEEN 0 AND 3', name='valid_feed_entity_type'),
     )
     
-    def set_h3_indexes(self, lat: float, lng: float):
-        """Set H3 indexes at multiple resolutions from coordinates"""
-        import h3
-        self.h3_index = h3.geo_to_h3(lat, lng, 9)
-        self.h3_index_r8 = h3.geo_to_h3(lat, lng, 8)
-        self.h3_index_r7 = h3.geo_to_h3(lat, lng, 7)
+    def set_h3_indexes(self, lat: float = None, lng: float = None):
+        """Set H3 indexes at multiple resolutions from coordinates or the existing resolution 9 index"""
+        if lat is not None and lng is not None:
+            self.h3_index = h3.geo_to_h3(lat, lng, 9)
+        
+        # Parents are bit operations on the cell, no re-projection
+        self.h3_index_r8 = h3.h3_to_parent(self.h3_index, 8)
+        self.h3_index_r7 = h3.h3_to_parent(self.h3_index, 7)
+    
+    @property
+    def display_text(self) -> Optional[str]:
+        """Activity ribbon text for this event, None for types without one"""
+        render = _DISPLAY_TEXT.get(self.event_type)
+        if render is None or not self.payload:
+            return None
+        try:
+            return render(self.payload)
+        except KeyError:
+            return None
+    
+    @classmethod
+    def active_filter(cls):
+        """SQL filter for unexpired events, evaluated by Postgres against now()"""
+        return or_(cls.expires_at.is_(None), cls.expires_at > func.now())
     
     def is_expired(self) -> bool:
-        """Check if event has expired"""
+        """Check if an already-loaded event has expired (queries should use active_filter)"""
         if not self.expires_at:
             return False
-        return datetime.utcnow() > self.expires_at
+        return datetime.now(timezone.utc) > self.expires_at
     
     def to_ribbon_item(self) -> dict:
         """Convert to activity ribbon display format"""
@@ -167,6 +208,18 @@ class FeedEvent(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
     
+    def to_ribbon_json(self) -> bytes:
+        """
+        Ribbon item encoded once and reused, e.g. for every pub/sub publish
+        of the event. Events are immutable once stored, so call this after
+        flush/commit (when id and created_at are set).
+        """
+        cached = getattr(self, '_ribbon_json', None)
+        if cached is None:
+            cached = orjson.dumps(self.to_ribbon_item())
+            self._ribbon_json = cached
+        return cached
+    
     def to_dict(self) -> dict:
         """Convert to full dictionary for API responses"""
         return {
@@ -196,9 +249,6 @@ class FeedEvent(Base):
         trade_intent: str
     ) -> "FeedEvent":
         """Factory method for new listing events"""
-        import h3 as h3_lib
-        lat, lng = h3_lib.h3_to_geo(h3_index)
-        
         event = cls(
             event_type=FeedEventType.NEW_LISTING,
             entity_type='listing',
@@ -212,10 +262,9 @@ class FeedEvent(Base):
                 "condition": condition,
                 "image_url": image_url,
                 "trade_intent": trade_intent
-            },
-            display_text=f"New listing: {title} - ${price}" if price else f"New listing: {title} (Trade)"
+            }
         )
-        event.set_h3_indexes(lat, lng)
+        event.set_h3_indexes()
         return event
     
     @classmethod
@@ -230,9 +279,6 @@ class FeedEvent(Base):
         image_url: str
     ) -> "FeedEvent":
         """Factory method for price drop events"""
-        import h3 as h3_lib
-        lat, lng = h3_lib.h3_to_geo(h3_index)
-        
         drop_percent = ((old_price - new_price) / old_price) * 100
         
         event = cls(
@@ -247,10 +293,9 @@ class FeedEvent(Base):
                 "new_price": new_price,
                 "drop_percent": round(drop_percent, 1),
                 "image_url": image_url
-            },
-            display_text=f"Price drop: {title} ${old_price} → ${new_price} ({drop_percent:.0f}% off)"
+            }
         )
-        event.set_h3_indexes(lat, lng)
+        event.set_h3_indexes()
         return event
     
     @classmethod
@@ -264,9 +309,6 @@ class FeedEvent(Base):
         image_url: str
     ) -> "FeedEvent":
         """Factory method for item sold events"""
-        import h3 as h3_lib
-        lat, lng = h3_lib.h3_to_geo(h3_index)
-        
         event = cls(
             event_type=FeedEventType.ITEM_SOLD,
             entity_type='listing',
@@ -277,8 +319,7 @@ class FeedEvent(Base):
                 "brand": brand,
                 "price": price,
                 "image_url": image_url
-            },
-            display_text=f"Just sold nearby: {title}"
+            }
         )
-        event.set_h3_indexes(lat, lng)
+        event.set_h3_indexes()
         return event
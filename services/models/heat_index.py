@@ -4,11 +4,26 @@ Tracks what's driving demand in immediate areas based on engagement signals.
 """
 
 import uuid
-from datetime import datetime, timedelta
-from sqlalchemy import Column, String, Integer, DateTime, Float, Index
-from sqlalchemy.dialects.postgresql import UUID, JSON, ARRAY
+from datetime import datetime, timedelta, timezone
+import h3
+import numpy as np
+from sqlalchemy import Column, String, Integer, DateTime, Float, Index, CheckConstraint, bindparam, text, select, update
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, insert
+from sqlalchemy.orm import object_session
 from sqlalchemy.sql import func
 from services.database import Base
+from services.core.h3_geo import coords_to_h3_vec, get_hex_geojson_ring, h3_to_parent_vec, h3_to_strings
+from services.models.types import H3Int, SmallIntEnum
+
+
+# Position is the stored SMALLINT heat_trending.kind; only ever append
+TRENDING_KINDS = ('brand', 'sku', 'size')
+
+# Same weights and level cut-offs as NeighborhoodHeatIndex.compute_heat_score,
+# in (save, dm, trade_request, listing, view) velocity order
+HEAT_WEIGHTS = np.array([25, 30, 20, 15, 10], dtype=np.float64)
+HEAT_LEVELS = np.array(['cold', 'warm', 'hot', 'fire'])
+HEAT_LEVEL_THRESHOLDS = np.array([30, 60, 80], dtype=np.float64)
 
 
 class NeighborhoodHeatIndex(Base):
@@ -28,11 +43,11 @@ class NeighborhoodHeatIndex(Base):
     
     # Core identity - one record per H3 hex
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    h3_index = Column(String(15), unique=True, nullable=False, index=True)  # Resolution 9
+    h3_index = Column(H3Int, unique=True, nullable=False, index=True)  # Resolution 9, BIGINT cell
     
     # Parent hexes for aggregation queries
-    h3_index_r8 = Column(String(15), nullable=True, index=True)
-    h3_index_r7 = Column(String(15), nullable=True, index=True)
+    h3_index_r8 = Column(H3Int, nullable=True, index=True)
+    h3_index_r7 = Column(H3Int, nullable=True, index=True)
     
     # Velocity metrics (activity per hour, rolling window)
     save_velocity = Column(Float, default=0.0, nullable=False)
@@ -50,34 +65,7 @@ class NeighborhoodHeatIndex(Base):
     heat_score = Column(Float, default=0.0, nullable=False)
     heat_level = Column(String(20), default='cold', nullable=False)  # cold, warm, hot, fire
     
-    # Trending data (top items driving demand)
-    trending_brands = Column(JSON, nullable=True)
-    """
-    Example:
-    [
-        {"brand": "Nike", "score": 85, "change": 12},
-        {"brand": "Jordan", "score": 72, "change": -3},
-        {"brand": "New Balance", "score": 45, "change": 8}
-    ]
-    """
-    
-    trending_skus = Column(JSON, nullable=True)
-    """
-    Example:
-    [
-        {"sku": "DH6927-061", "name": "Jordan 4 Bred", "score": 92},
-        {"sku": "FQ8060-121", "name": "Air Max 1 Patta", "score": 78}
-    ]
-    """
-    
-    trending_sizes = Column(JSON, nullable=True)
-    """
-    Example:
-    [
-        {"size": "10", "demand_ratio": 1.8},
-        {"size": "9.5", "demand_ratio": 1.5}
-    ]
-    """
+    # Trending brands/SKUs/sizes live in heat_trending (see top_trending)
     
     hot_searches = Column(ARRAY(String), nullable=True)
     """Top search terms in this zone: ["bred 4", "panda dunk", "travis scott"]"""
@@ -107,8 +95,6 @@ class NeighborhoodHeatIndex(Base):
     
     def set_h3_indexes(self, lat: float = None, lng: float = None):
         """Set parent H3 indexes from the primary index or coordinates"""
-        import h3
-        
         if lat is not None and lng is not None:
             self.h3_index = h3.geo_to_h3(lat, lng, 9)
         
@@ -116,6 +102,14 @@ class NeighborhoodHeatIndex(Base):
             self.h3_index_r8 = h3.h3_to_parent(self.h3_index, 8)
             self.h3_index_r7 = h3.h3_to_parent(self.h3_index, 7)
     
+    @staticmethod
+    def set_h3_indexes_bulk(rows: list, lats, lngs):
+        """set_h3_indexes for many rows at once; parents are derived from the r9 cells as arrays"""
+        cells = coords_to_h3_vec(lats, lngs, 9)
+        for row, h3_index, r8, r7 in zip(rows, h3_to_strings(cells), h3_to_strings(h3_to_parent_vec(cells, 8)),
+                                         h3_to_strings(h3_to_parent_vec(cells, 7))):
+            row.h3_index, row.h3_index_r8, row.h3_index_r7 = h3_index, r8, r7
+    
     def compute_heat_score(self):
         """
         Compute composite heat score from velocity metrics.
@@ -143,11 +137,46 @@ class NeighborhoodHeatIndex(Base):
         else:
             self.heat_level = 'cold'
     
+    @classmethod
+    def recompute_heat_scores_bulk(cls, db, h3_indexes: list = None) -> int:
+        """
+        compute_heat_score for many rows at once (all rows if h3_indexes is
+        None): velocities are read into one array, scored with a single
+        matrix-vector product, and written back in one executemany UPDATE.
+        
+        Returns:
+            Number of rows updated
+        """
+        query = select(cls.id, cls.save_velocity, cls.dm_velocity, cls.trade_request_velocity,
+                       cls.listing_velocity, cls.view_velocity)
+        if h3_indexes is not None:
+            query = query.where(cls.h3_index.in_(list(h3_indexes)))
+        rows = db.execute(query).all()
+        if not rows:
+            return 0
+        
+        ids = [row[0] for row in rows]
+        velocities = np.array([row[1:] for row in rows], dtype=np.float64)
+        scores = np.minimum(np.nan_to_num(velocities) @ HEAT_WEIGHTS, 100.0)
+        levels = HEAT_LEVELS[np.searchsorted(HEAT_LEVEL_THRESHOLDS, scores, side='right')]
+        
+        db.execute(update(cls), [
+            {'id': id_, 'heat_score': score, 'heat_level': level}
+            for id_, score, level in zip(ids, scores.tolist(), levels.tolist())
+        ])
+        return len(ids)
+    
     def get_center_coords(self) -> tuple:
         """Get center coordinates of this hex"""
-        import h3
         return h3.h3_to_geo(self.h3_index)
     
+    def top_trending(self, kind: str, limit: int = 10) -> list:
+        """Highest-count heat_trending rows of one kind for this hex"""
+        db = object_session(self)
+        if db is None:
+            return []
+        return HeatTrending.top(db, self.h3_index, kind, limit)
+    
     def to_dict(self) -> dict:
         """Convert to dictionary for API responses"""
         lat, lng = self.get_center_coords()
@@ -171,9 +200,18 @@ class NeighborhoodHeatIndex(Base):
                 "active_users": self.active_users,
             },
             "trending": {
-                "brands": self.trending_brands or [],
-                "skus": self.trending_skus or [],
-                "sizes": self.trending_sizes or [],
+                "brands": [
+                    {"brand": t.key, "score": t.count * 10}
+                    for t in self.top_trending('brand')
+                ],
+                "skus": [
+                    {"sku": t.key, "name": t.label, "score": t.count * 10}
+                    for t in self.top_trending('sku')
+                ],
+                "sizes": [
+                    {"size": t.key, "score": t.count * 10}
+                    for t in self.top_trending('size')
+                ],
                 "searches": self.hot_searches or [],
             },
             "price": {
@@ -187,11 +225,6 @@ class NeighborhoodHeatIndex(Base):
     
     def to_map_feature(self) -> dict:
         """Convert to GeoJSON feature for map rendering"""
-        import h3
-        
-        boundary = h3.h3_to_geo_boundary(self.h3_index, geo_json=True)
-        lat, lng = h3.h3_to_geo(self.h3_index)
-        
         return {
             "type": "Feature",
             "properties": {
@@ -202,25 +235,113 @@ class NeighborhoodHeatIndex(Base):
             },
             "geometry": {
                 "type": "Polygon",
-                "coordinates": [boundary]
+                "coordinates": [get_hex_geojson_ring(self.h3_index)]
             }
         }
     
     @classmethod
     def get_or_create(cls, db, h3_index: str) -> "NeighborhoodHeatIndex":
         """Get existing heat index or create new one for hex"""
-        import h3
-        
         existing = db.query(cls).filter(cls.h3_index == h3_index).first()
         if existing:
             return existing
         
         # Create new
-        lat, lng = h3.h3_to_geo(h3_index)
         new_index = cls(h3_index=h3_index)
-        new_index.set_h3_indexes(lat, lng)
-        new_index.window_start = datetime.utcnow() - timedelta(hours=24)
-        new_index.window_end = datetime.utcnow()
+        new_index.set_h3_indexes()
+        now = datetime.now(timezone.utc)
+        new_index.window_start = now - timedelta(hours=24)
+        new_index.window_end = now
         
         db.add(new_index)
         return new_index
+
+
+class HeatTrending(Base):
+    """
+    Per-hex trending counter, one narrow row per (hex, kind, key).
+    
+    Bumping a brand/SKU/size is a single B-tree upsert instead of rewriting
+    a JSON array on the heat index row, and "top brands in this hex" is an
+    index range scan on ix_heat_trending_top.
+    """
+    __tablename__ = 'heat_trending'
+    
+    h3_index = Column(H3Int, primary_key=True)  # Resolution 9
+    kind = Column(SmallIntEnum(TRENDING_KINDS), primary_key=True)
+    key = Column(String(100), primary_key=True)  # Brand name, SKU or size
+    count = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    label = Column(String(200), nullable=True)  # Display name, e.g. a SKU's listing title
+    
+    __table_args__ = (
+        Index('ix_heat_trending_top', h3_index, kind, count.desc()),
+        CheckConstraint(f'kind BETWEEN 0 AND {len(TRENDING_KINDS) - 1}', name='valid_heat_trending_kind'),
+    )
+    
+    @classmethod
+    def top(cls, db, h3_index: str, kind: str, limit: int = 10) -> list:
+        """Top keys of one kind in a hex, highest count first"""
+        return db.query(cls).filter(
+            cls.h3_index == h3_index,
+            cls.kind == kind
+        ).order_by(cls.count.desc()).limit(limit).all()
+    
+    @classmethod
+    def bump(cls, db, h3_index: str, kind: str, key: str, by: int = 1, label: str = None):
+        """Add to a counter, creating it on first use"""
+        stmt = insert(cls).values(h3_index=h3_index, kind=kind, key=key, count=by, label=label)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.h3_index, cls.kind, cls.key],
+            set_={'count': cls.count + stmt.excluded['count']}
+        )
+        db.execute(stmt)
+    
+    @classmethod
+    def refresh(cls, db, h3_indexes: list):
+        """Recount brands/SKUs/sizes of the active listings in the given hexes"""
+        db.query(cls).filter(cls.h3_index.in_(h3_indexes)).delete(synchronize_session=False)
+        # status = 0 is ACTIVE (LISTING_STATUSES)
+        db.execute(text("""
+            INSERT INTO heat_trending (h3_index, kind, key, count, label)
+            SELECT h3_index, 0, brand, count(*), NULL              -- brand
+            FROM listings
+            WHERE status = 0 AND h3_index = ANY(:hexes)
+            GROUP BY h3_index, brand
+            UNION ALL
+            SELECT h3_index, 1, sku, count(*), max(title)          -- sku
+            FROM listings
+            WHERE status = 0 AND h3_index = ANY(:hexes) AND sku IS NOT NULL
+            GROUP BY h3_index, sku
+            UNION ALL
+            SELECT h3_index, 2, size, count(*), NULL               -- size
+            FROM listings
+            WHERE status = 0 AND h3_index = ANY(:hexes)
+            GROUP BY h3_index, size
+        """).bindparams(bindparam('hexes', type_=ARRAY(H3Int))), {"hexes": list(h3_indexes)})
+
+
+class HeatIndexHourly(Base):
+    """
+    Per-hex activity counts in hourly buckets.
+    
+    Maintained by statement-level triggers (see migration 016) as listings,
+    saves, TRADE_REQUEST events and view counter flushes are written, so
+    windowed velocities and trends read hours-per-hex rows instead of the
+    raw event tables. neighborhood_heat_index_mv sums the last 24 buckets.
+    """
+    __tablename__ = 'heat_index_hourly'
+    
+    h3_index = Column(H3Int, primary_key=True)  # Resolution 9
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # Start of the hour
+    listings = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    saves = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    trade_requests = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    views = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    
+    @classmethod
+    def series(cls, db, h3_index: str, hours: int = 24) -> list:
+        """Buckets for one hex over the last `hours` hours, oldest first (hours without activity are absent)"""
+        return db.query(cls).filter(
+            cls.h3_index == h3_index,
+            cls.bucket > func.now() - timedelta(hours=hours)
+        ).order_by(cls.bucket).all()
@@ -1,10 +1,11 @@
 import uuid
 from enum import Enum as PyEnum
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Text, Index, CheckConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index, CheckConstraint, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from services.database import Base
+from services.models.types import SmallIntEnum
 
 
 class TransactionType(PyEnum):
@@ -21,22 +22,28 @@ class TransactionType(PyEnum):
     CHECKOUT_TASK_REFUND = "CHECKOUT_TASK_REFUND"
     POST_REWARD = "POST_REWARD"
     CHECKIN_REWARD = "CHECKIN_REWARD"
+    STREAK_BONUS = "STREAK_BONUS"
+
+# Stored as SMALLINT ids (positions), mirrored in the laces_transaction_types table
+TRANSACTION_TYPES = tuple(t.value for t in TransactionType)
 
 
 class LacesLedger(Base):
+    """
+    Append-only LACES transactions. Inserting an entry is what moves a
+    balance: the laces_ledger_balance trigger adds amount to
+    users.laces_balance and records the result in balance_after.
+    """
     __tablename__ = 'laces_ledger'
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id', ondelete="CASCADE"), nullable=False, index=True)
     amount = Column(Integer, nullable=False)
-    transaction_type = Column(
-        Enum(*(t.value for t in TransactionType), name='transaction_type_enum'),
-        nullable=False
-    )
+    transaction_type = Column(SmallIntEnum(TRANSACTION_TYPES), nullable=False)
     related_post_id = Column(UUID(as_uuid=True), ForeignKey('posts.post_id', ondelete="SET NULL"), nullable=True)
     description = Column(Text, nullable=True)
     reference_id = Column(String(100), nullable=True)  # External reference for tracking
-    balance_after = Column(Integer, nullable=False, default=0)
+    balance_after = Column(Integer, nullable=False, server_default=text('0'))  # Set by the laces_ledger_balance trigger
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -46,7 +53,10 @@ class LacesLedger(Base):
     # Constraints and Indexes
     __table_args__ = (
         CheckConstraint('amount != 0', name='non_zero_amount'),
+        CheckConstraint(f'transaction_type BETWEEN 0 AND {len(TRANSACTION_TYPES) - 1}', name='valid_transaction_type'),
         Index('ix_laces_user_created', user_id, created_at.desc()),
         Index('ix_laces_type_created', transaction_type, created_at.desc()),
         Index('ix_laces_amount', amount),
+        # Time-window scans (append-only, so BRIN)
+        Index('ix_laces_created_at', created_at, postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
     )
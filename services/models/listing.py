@@ -4,15 +4,20 @@ Supports sale, trade, or both with authenticity tracking and engagement metrics.
 """
 
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+import h3
+import numpy as np
 from sqlalchemy import (
-    Column, String, Integer, Boolean, DateTime, ForeignKey, 
-    Text, DECIMAL, Index, CheckConstraint, Enum, Float
+    Column, String, Integer, SmallInteger, Boolean, DateTime, ForeignKey, 
+    Text, DECIMAL, Index, CheckConstraint, Float, Computed, text, table, column,
+    select, update, and_, or_
 )
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from services.database import Base
+from services.core.h3_geo import coords_to_h3_vec, h3_to_strings
+from services.models.types import H3Int, SmallIntEnum
 
 
 class ListingCondition:
@@ -42,30 +47,57 @@ class ListingStatus:
     DELETED = 'DELETED'     # User deleted
 
 
+# Stored as SMALLINT ids (positions), mirrored in the listing_* lookup tables;
+# only ever append
+LISTING_SIZE_TYPES = ('MENS', 'WOMENS', 'GS', 'PS', 'TD', 'UNISEX')
+LISTING_CONDITIONS = (
+    ListingCondition.DS, ListingCondition.VNDS, ListingCondition.EXCELLENT,
+    ListingCondition.GOOD, ListingCondition.FAIR, ListingCondition.BEAT,
+)
+LISTING_TRADE_INTENTS = (ListingIntent.SALE, ListingIntent.TRADE, ListingIntent.BOTH)
+LISTING_STATUSES = (
+    ListingStatus.ACTIVE, ListingStatus.PENDING, ListingStatus.SOLD,
+    ListingStatus.TRADED, ListingStatus.EXPIRED, ListingStatus.DELETED,
+)
+LISTING_VISIBILITIES = ('public', 'local', 'followers', 'private')
+
+# Engagement counters buffered in Redis (Listing.incr_counter): a hash of
+# pending deltas per listing, plus a set of listings with pending deltas
+LISTING_COUNTER_FIELDS = ('view_count', 'save_count', 'message_count')
+LISTING_COUNTERS_KEY = 'lst:{}'
+LISTING_COUNTERS_DIRTY = 'lst:dirty'
+
+# HyperLogLog of viewer ids per listing (Listing.record_view); kept for the
+# 30-day listing lifetime after the last view
+LISTING_VIEWERS_KEY = 'lst:{}:viewers'
+LISTING_VIEWERS_TTL = 30 * 24 * 3600
+
+# Saves queued in Redis (ListingSave.enqueue) as "listing_id:user_id" set
+# members, inserted in batches by flush_listing_saves. A flush moves its
+# batch to the processing set until the rows are committed; removing a
+# member from there cancels the in-flight save.
+LISTING_SAVES_QUEUE = 'lst:saves'
+LISTING_SAVES_PROCESSING = 'lst:saves:processing'
+
+
 class Listing(Base):
     __tablename__ = 'listings'
     
     # Core identity
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
     
     # Product information
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
-    brand = Column(String(100), nullable=False, index=True)
-    sku = Column(String(100), nullable=True, index=True)  # Style code (e.g., DZ5485-612)
+    brand = Column(String(100), nullable=False)
+    sku = Column(String(100), nullable=True)  # Style code (e.g., DZ5485-612)
     colorway = Column(String(200), nullable=True)
-    size = Column(String(20), nullable=False, index=True)
-    size_type = Column(
-        Enum('MENS', 'WOMENS', 'GS', 'PS', 'TD', 'UNISEX', name='size_type_enum'),
-        nullable=False, default='MENS'
-    )
+    size = Column(String(20), nullable=False)
+    size_type = Column(SmallIntEnum(LISTING_SIZE_TYPES), nullable=False, default='MENS')
     
     # Condition and authenticity
-    condition = Column(
-        Enum('DS', 'VNDS', 'EXCELLENT', 'GOOD', 'FAIR', 'BEAT', name='condition_enum'),
-        nullable=False, index=True
-    )
+    condition = Column(SmallIntEnum(LISTING_CONDITIONS), nullable=False, index=True)
     condition_notes = Column(Text, nullable=True)
     has_box = Column(Boolean, default=True, nullable=False)
     has_extras = Column(Boolean, default=False, nullable=False)  # Extra laces, etc.
@@ -73,6 +105,9 @@ class Listing(Base):
     # Media
     images = Column(ARRAY(String), nullable=False)  # Required: at least 1 image
     authenticity_photos = Column(ARRAY(String), nullable=True)  # Tag, receipt, etc.
+    # Generated from images, so feed reads don't carry the whole gallery
+    cover_image = Column(String, Computed("images[1]"))
+    image_count = Column(SmallInteger, Computed("cardinality(images)::smallint"))
     
     # Authenticity scoring (0-100)
     authenticity_score = Column(Integer, default=0, nullable=False)
@@ -80,23 +115,22 @@ class Listing(Base):
     is_verified = Column(Boolean, default=False, nullable=False)  # Staff verified
     
     # Pricing and trade intent
-    price = Column(DECIMAL(10, 2), nullable=True)  # Null if trade-only
-    original_price = Column(DECIMAL(10, 2), nullable=True)  # Track price drops
-    trade_intent = Column(
-        Enum('SALE', 'TRADE', 'BOTH', name='trade_intent_enum'),
-        nullable=False, default='SALE'
-    )
+    # NUMERIC in the database, returned as floats (no Decimal conversions when rendering)
+    price = Column(DECIMAL(10, 2, asdecimal=False), nullable=True)  # Null if trade-only
+    original_price = Column(DECIMAL(10, 2, asdecimal=False), nullable=True)  # Track price drops
+    trade_intent = Column(SmallIntEnum(LISTING_TRADE_INTENTS), nullable=False, default='SALE')
     trade_interests = Column(ARRAY(String), nullable=True)  # SKUs/brands wanted
     trade_notes = Column(Text, nullable=True)  # "Looking for Jordan 1s size 10"
     
     # Location - H3 indexed for hyperlocal queries
     location_id = Column(UUID(as_uuid=True), ForeignKey('locations.id', ondelete='SET NULL'), nullable=True)
-    h3_index = Column(String(15), nullable=False, index=True)  # Resolution 9 (~0.25mi)
-    h3_index_r8 = Column(String(15), nullable=True, index=True)  # Resolution 8 (~1mi) for broader queries
-    h3_index_r7 = Column(String(15), nullable=True, index=True)  # Resolution 7 (~3mi)
+    h3_index = Column(H3Int, nullable=False)  # Resolution 9 (~0.25mi), BIGINT cell
+    # Parent cells are generated by Postgres from h3_index, so they never drift
+    h3_index_r8 = Column(H3Int, Computed("h3_cell_to_parent_bigint(h3_index, 8)", persisted=True))  # Resolution 8 (~1mi) for broader queries
+    h3_index_r7 = Column(H3Int, Computed("h3_cell_to_parent_bigint(h3_index, 7)", persisted=True))  # Resolution 7 (~3mi)
     
     # Engagement metrics
-    view_count = Column(Integer, default=0, nullable=False)
+    view_count = Column(Integer, default=0, nullable=False)  # Unique viewers (Listing.record_view)
     save_count = Column(Integer, default=0, nullable=False)
     message_count = Column(Integer, default=0, nullable=False)
     share_count = Column(Integer, default=0, nullable=False)
@@ -106,16 +140,10 @@ class Listing(Base):
     demand_score = Column(Float, default=0.0, nullable=False)  # From heat index
     
     # Status and lifecycle
-    status = Column(
-        Enum('ACTIVE', 'PENDING', 'SOLD', 'TRADED', 'EXPIRED', 'DELETED', name='listing_status_enum'),
-        nullable=False, default='ACTIVE', index=True
-    )
+    status = Column(SmallIntEnum(LISTING_STATUSES), nullable=False, default='ACTIVE')
     
     # Visibility
-    visibility = Column(
-        Enum('public', 'local', 'followers', 'private', name='listing_visibility_enum'),
-        nullable=False, default='public'
-    )
+    visibility = Column(SmallIntEnum(LISTING_VISIBILITIES), nullable=False, default='public')
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -134,29 +162,33 @@ class Listing(Base):
     
     # Indexes and constraints
     __table_args__ = (
-        # H3 spatial indexes for hyperlocal queries
-        Index('ix_listings_h3_status', h3_index, status),
-        Index('ix_listings_h3_r8_status', h3_index_r8, status),
-        Index('ix_listings_h3_r7_status', h3_index_r7, status),
+        # H3 spatial indexes for hyperlocal queries (ACTIVE rows only, status = 0)
+        Index('ix_listings_h3_active', h3_index, postgresql_where=text("status = 0")),
+        Index('ix_listings_h3_r8_active', h3_index_r8, postgresql_where=text("status = 0")),
+        Index('ix_listings_h3_r7_active', h3_index_r7, postgresql_where=text("status = 0")),
         
         # Feed ranking indexes
-        Index('ix_listings_rank_score', rank_score.desc()),
+        Index('ix_listings_rank_active', rank_score.desc(), postgresql_where=text("status = 0")),
         Index('ix_listings_status_created', status, created_at.desc()),
-        Index('ix_listings_brand_status', brand, status),
-        Index('ix_listings_size_status', size, status),
+        Index('ix_listings_brand_active', brand, postgresql_where=text("status = 0")),
+        Index('ix_listings_size_active', size, postgresql_where=text("status = 0")),
         
         # Trade matching indexes
-        Index('ix_listings_trade_intent', trade_intent, status),
-        Index('ix_listings_sku_status', sku, status),
+        Index('ix_listings_trade_intent_active', trade_intent, postgresql_where=text("status = 0")),
+        Index('ix_listings_trade_interests', trade_interests, postgresql_using='gin', postgresql_where=text("status = 0")),
+        Index('ix_listings_sku_active', sku, postgresql_where=text("status = 0")),
         
         # Price filtering
-        Index('ix_listings_price_status', price, status),
+        Index('ix_listings_price_active', price, postgresql_where=text("status = 0")),
         
         # User listings
         Index('ix_listings_user_status', user_id, status, created_at.desc()),
         
         # Engagement
-        Index('ix_listings_save_count', save_count.desc()),
+        Index('ix_listings_save_count_active', save_count.desc(), postgresql_where=text("status = 0")),
+        
+        # Time-window scans (append-only, so BRIN)
+        Index('ix_listings_created_at', created_at, postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
         
         # Data quality constraints
         CheckConstraint('view_count >= 0', name='positive_view_count'),
@@ -164,54 +196,112 @@ class Listing(Base):
         CheckConstraint('message_count >= 0', name='positive_message_count'),
         CheckConstraint('authenticity_score >= 0 AND authenticity_score <= 100', name='valid_authenticity_score'),
         CheckConstraint('price >= 0 OR price IS NULL', name='positive_price'),
-        CheckConstraint("array_length(images, 1) >= 1", name='at_least_one_image'),
+        CheckConstraint('image_count >= 1', name='at_least_one_image'),
+        CheckConstraint(f'condition BETWEEN 0 AND {len(LISTING_CONDITIONS) - 1}', name='valid_condition'),
+        CheckConstraint(f'size_type BETWEEN 0 AND {len(LISTING_SIZE_TYPES) - 1}', name='valid_size_type'),
+        CheckConstraint(f'trade_intent BETWEEN 0 AND {len(LISTING_TRADE_INTENTS) - 1}', name='valid_trade_intent'),
+        CheckConstraint(f'status BETWEEN 0 AND {len(LISTING_STATUSES) - 1}', name='valid_status'),
+        CheckConstraint(f'visibility BETWEEN 0 AND {len(LISTING_VISIBILITIES) - 1}', name='valid_visibility'),
     )
     
     def set_h3_indexes(self, lat: float, lng: float):
-        """Set H3 indexes at multiple resolutions from coordinates"""
-        import h3
+        """Set the base H3 index from coordinates (r8/r7 parents are generated)"""
         self.h3_index = h3.geo_to_h3(lat, lng, 9)    # ~0.25mi
-        self.h3_index_r8 = h3.geo_to_h3(lat, lng, 8)  # ~1mi
-        self.h3_index_r7 = h3.geo_to_h3(lat, lng, 7)  # ~3mi
     
-    def record_view(self):
-        """Increment view count"""
-        self.view_count += 1
+    @staticmethod
+    def set_h3_indexes_bulk(listings: list, lats, lngs):
+        """set_h3_indexes for many listings at once, converting all coordinates in one pass"""
+        for listing, h3_index in zip(listings, h3_to_strings(coords_to_h3_vec(lats, lngs, 9))):
+            listing.h3_index = h3_index
     
-    def record_save(self):
-        """Increment save count"""
-        self.save_count += 1
-        self.demand_score += 1
+    @staticmethod
+    def incr_counter(redis, listing_id, field: str, delta: int = 1, intent_weight: float = 0) -> int:
+        """
+        Buffer an engagement counter change (view/save/message) in Redis
+        instead of updating the listing row; flush_listing_counters applies
+        the summed deltas, plus demand_score += intent_weight, in batches.
+        
+        Returns:
+            The field's pending (not yet flushed) delta
+        """
+        if field not in LISTING_COUNTER_FIELDS:
+            raise ValueError(f"Not a buffered listing counter: {field}")
+        
+        key = LISTING_COUNTERS_KEY.format(listing_id)
+        pipe = redis.pipeline(transaction=False)
+        pipe.hincrby(key, field, delta)
+        if intent_weight:
+            pipe.hincrbyfloat(key, 'demand_score', intent_weight)
+        pipe.sadd(LISTING_COUNTERS_DIRTY, str(listing_id))
+        return pipe.execute()[0]
     
-    def record_message(self):
-        """Increment message count"""
-        self.message_count += 1
-        self.demand_score += 2  # DMs indicate higher intent
+    @staticmethod
+    def record_view(redis, listing_id, viewer_id) -> bool:
+        """
+        Count a view once per viewer: PFADD to the listing's viewer
+        HyperLogLog, and buffer a view_count increment only when it reports
+        a new viewer, so view_count tracks unique viewers (to the sketch's
+        ~0.8% error) and repeat views cost one Redis round trip.
+        
+        Returns:
+            True if this looked like a new viewer
+        """
+        key = LISTING_VIEWERS_KEY.format(listing_id)
+        pipe = redis.pipeline(transaction=False)
+        pipe.pfadd(key, str(viewer_id))
+        pipe.expire(key, LISTING_VIEWERS_TTL)
+        if not pipe.execute()[0]:
+            return False
+        Listing.incr_counter(redis, listing_id, 'view_count')
+        return True
     
     def drop_price(self, new_price: float):
         """Record a price drop"""
-        if self.price and new_price < float(self.price):
+        if self.price and new_price < self.price:
             if not self.original_price:
                 self.original_price = self.price
             self.price = new_price
             return True
         return False
     
-    def mark_sold(self):
-        """Mark listing as sold"""
+    def mark_sold(self, now: datetime = None):
+        """Mark listing as sold (pass now to share one clock read across a batch)"""
         self.status = ListingStatus.SOLD
-        self.sold_at = datetime.utcnow()
+        self.sold_at = now or datetime.now(timezone.utc)
     
-    def mark_traded(self):
+    def mark_traded(self, now: datetime = None):
         """Mark listing as traded"""
         self.status = ListingStatus.TRADED
-        self.sold_at = datetime.utcnow()
+        self.sold_at = now or datetime.now(timezone.utc)
+    
+    @classmethod
+    def wants_any(cls, keys: list):
+        """
+        SQL filter for listings whose trade interests include any of the
+        given SKUs/brands. Uses && (not = ANY(trade_interests)) so the
+        ix_listings_trade_interests GIN index can serve it.
+        """
+        return cls.trade_interests.overlap(list(keys))
+    
+    @classmethod
+    def active_filter(cls):
+        """
+        SQL filter for is_active(): ACTIVE and not past expires_at, checked
+        against the database clock so expired rows never reach Python.
+        """
+        return and_(
+            cls.status == ListingStatus.ACTIVE,
+            or_(cls.expires_at.is_(None), cls.expires_at > func.now()),
+        )
     
-    def is_active(self) -> bool:
-        """Check if listing is active and not expired"""
+    def is_active(self, now: datetime = None) -> bool:
+        """
+        Check if listing is active and not expired. When checking many
+        listings, read the clock once and pass it as now.
+        """
         if self.status != ListingStatus.ACTIVE:
             return False
-        if self.expires_at and datetime.utcnow() > self.expires_at:
+        if self.expires_at and (now or datetime.now(timezone.utc)) > self.expires_at:
             return False
         return True
     
@@ -219,7 +309,69 @@ class Listing(Base):
         """Get percentage price drop from original"""
         if not self.original_price or not self.price:
             return 0.0
-        return ((float(self.original_price) - float(self.price)) / float(self.original_price)) * 100
+        return ((self.original_price - self.price) / self.original_price) * 100
+    
+    @staticmethod
+    def price_drop_percents(prices: np.ndarray, original_prices: np.ndarray) -> np.ndarray:
+        """get_price_drop_percent for many listings at once (missing prices as 0)"""
+        price_drops = np.zeros_like(prices)
+        np.divide((original_prices - prices) * 100, original_prices, out=price_drops,
+                  where=(original_prices != 0) & (prices != 0))
+        return price_drops
+    
+    @classmethod
+    def recompute_rank_scores_bulk(cls, db, h3_indexes: list = None) -> int:
+        """
+        Rank and demand scores for active listings (all hexes if h3_indexes
+        is None), as in compute_listing_rankings: the scored columns and the
+        hex's heat score are read as plain rows, not ORM instances, scored as
+        arrays and written back in one executemany UPDATE.
+        
+        Returns:
+            Number of listings updated
+        """
+        from services.models.heat_index import NeighborhoodHeatIndex
+        
+        query = select(
+            cls.id, cls.save_count, cls.message_count, cls.view_count, cls.authenticity_score,
+            cls.is_verified, cls.price, cls.original_price,
+            (func.extract('epoch', func.now() - cls.created_at) / 3600).label('age_hours'),
+            NeighborhoodHeatIndex.heat_score,
+        ).outerjoin(
+            NeighborhoodHeatIndex, NeighborhoodHeatIndex.h3_index == cls.h3_index
+        ).where(cls.status == ListingStatus.ACTIVE)
+        if h3_indexes is not None:
+            query = query.where(cls.h3_index.in_(list(h3_indexes)))
+        rows = db.execute(query).all()
+        if not rows:
+            return 0
+        
+        ids = [row[0] for row in rows]
+        (saves, messages, views, authenticity, verified, prices, original_prices,
+         age_hours, heat_scores) = np.array(
+            [row[1:] for row in rows], dtype=np.float64
+        ).T  # None (no price/heat index/created_at) becomes NaN
+        prices, original_prices, heat_scores = (np.nan_to_num(x) for x in (prices, original_prices, heat_scores))
+        
+        # Engagement (0-30), normalized by the busiest listing
+        engagement = (saves / (saves.max() or 1) * 15 + messages / (messages.max() or 1) * 10
+                      + views / (views.max() or 1) * 5)
+        # Demand from the hex's heat index (0-20)
+        demand = heat_scores / 100 * 20
+        # Freshness (0-10), linear decay over 7 days
+        freshness = np.maximum(0, 10 * (1 - np.nan_to_num(age_hours) / 168))
+        # Authenticity (0-10) plus verified bonus (5)
+        trust = authenticity / 10 + verified * 5
+        # Price drop bonus (0-5) for drops over 10%
+        drops = cls.price_drop_percents(prices, original_prices)
+        drop_bonus = np.where(drops > 10, np.minimum(5, drops / 5), 0)
+        
+        rank_scores = engagement + demand + freshness + trust + drop_bonus
+        db.execute(update(cls), [
+            {'id': id_, 'rank_score': rank_score, 'demand_score': demand_score}
+            for id_, rank_score, demand_score in zip(ids, rank_scores.tolist(), demand.tolist())
+        ])
+        return len(ids)
     
     def to_dict(self) -> dict:
         """Convert to dictionary for API responses"""
@@ -240,8 +392,8 @@ class Listing(Base):
             "images": self.images,
             "authenticity_score": self.authenticity_score,
             "is_verified": self.is_verified,
-            "price": float(self.price) if self.price else None,
-            "original_price": float(self.original_price) if self.original_price else None,
+            "price": self.price or None,
+            "original_price": self.original_price or None,
             "price_drop_percent": self.get_price_drop_percent(),
             "trade_intent": self.trade_intent,
             "trade_interests": self.trade_interests,
@@ -255,6 +407,45 @@ class Listing(Base):
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
     
+    @staticmethod
+    def to_feed_dicts(rows: list, distances: np.ndarray) -> list:
+        """
+        Feed item dicts (ListingFeedItem shape) for listing_feed_ranked_mv
+        rows, with price drops and rounded distances computed as array
+        operations.
+        """
+        prices = np.array([row.price or 0.0 for row in rows], dtype=np.float64)
+        original_prices = np.array([row.original_price or 0.0 for row in rows], dtype=np.float64)
+        price_drops = Listing.price_drop_percents(prices, original_prices)
+        
+        return [
+            {
+                "id": row.id,
+                "user_id": row.user_id,
+                "title": row.title,
+                "brand": row.brand,
+                "sku": row.sku,
+                "size": row.size,
+                "condition": row.condition,
+                "cover_image": row.cover_image,
+                "image_count": row.image_count,
+                "authenticity_score": row.authenticity_score,
+                "is_verified": row.is_verified,
+                "price": row.price or None,
+                "original_price": row.original_price or None,
+                "price_drop_percent": price_drop,
+                "trade_intent": row.trade_intent,
+                "distance_miles": distance,
+                "rank_score": row.rank_score,
+                "demand_score": row.demand_score,
+                "view_count": row.view_count,
+                "save_count": row.save_count,
+                "status": row.status,
+                "created_at": row.created_at,
+            }
+            for row, price_drop, distance in zip(rows, price_drops.tolist(), np.round(distances, 2).tolist())
+        ]
+    
     def to_feed_item(self, distance_miles: float = None) -> dict:
         """Convert to feed item format with distance"""
         base = self.to_dict()
@@ -264,6 +455,23 @@ class Listing(Base):
         return base
 
 
+# Active, unexpired listings projected for feed reads (see migrations 011
+# and 019), indexed by hex and rank. Refreshed CONCURRENTLY every couple of
+# minutes by refresh_listing_feed, so feed reads never sort the live table;
+# prices are stored as float8, so rows need no Decimal conversion, and only
+# the cover image is carried, not the gallery.
+LISTING_FEED_COLUMNS = (
+    'id', 'user_id', 'title', 'brand', 'sku', 'size', 'condition', 'cover_image', 'image_count',
+    'authenticity_score', 'is_verified', 'price', 'original_price', 'trade_intent',
+    'rank_score', 'demand_score', 'view_count', 'save_count', 'status', 'created_at',
+    'h3_index', 'h3_index_r8', 'h3_index_r7',
+)
+listing_feed_ranked_mv = table('listing_feed_ranked_mv', *(
+    column(name, Float() if name in ('price', 'original_price') else Listing.__table__.c[name].type)
+    for name in LISTING_FEED_COLUMNS
+))
+
+
 class ListingSave(Base):
     """Track user saves/bookmarks on listings"""
     __tablename__ = 'listing_saves'
@@ -282,3 +490,24 @@ class ListingSave(Base):
         # Unique constraint: user can only save a listing once
         Index('ix_listing_saves_unique', user_id, listing_id, unique=True),
     )
+    
+    @staticmethod
+    def enqueue(redis, listing_id, user_id) -> bool:
+        """
+        Queue a save for flush_listing_saves instead of inserting it now.
+        Returns False if the same save is already queued.
+        """
+        return bool(redis.sadd(LISTING_SAVES_QUEUE, f"{listing_id}:{user_id}"))
+    
+    @staticmethod
+    def dequeue(redis, listing_id, user_id) -> bool:
+        """
+        Cancel a save that hasn't been committed yet, whether still queued or
+        claimed by a running flush (which then deletes the row itself once
+        its insert commits). False if neither held it.
+        """
+        member = f"{listing_id}:{user_id}"
+        pipe = redis.pipeline(transaction=True)
+        pipe.srem(LISTING_SAVES_QUEUE, member)
+        pipe.srem(LISTING_SAVES_PROCESSING, member)
+        return any(pipe.execute())
@@ -1,12 +1,13 @@
-import uuid
-import hashlib
 from datetime import datetime, timedelta
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Enum, Text, Index, CheckConstraint
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from sqlalchemy import Table, Column, String, Integer, SmallInteger, Boolean, DateTime, ForeignKey, Enum, Text, Index, CheckConstraint, Computed, LargeBinary, text
+from sqlalchemy.dialects.postgresql import UUID, insert
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.associationproxy import association_proxy
 from geoalchemy2 import Geography
 from services.database import Base
+from services.core.geohash_utils import GEOHASH_INT_PRECISION
+from services.models.types import GeohashInt, SmallIntEnum
 import geohash2
 
 class SignalType:
@@ -19,24 +20,43 @@ class SignalType:
     DROP_ALERT = 'DROP_ALERT'              # "YZY just dropped on Adidas app"
     GENERAL = 'GENERAL'                    # "Anyone camping tonight?"
 
+# Longest tag name the tags table accepts
+TAG_NAME_MAX_LENGTH = 64
+
+# Stored as SMALLINT ids (positions), mirrored in the signal_types table
+SIGNAL_TYPES = (
+    SignalType.SPOTTED, SignalType.STOCK_CHECK, SignalType.LINE_UPDATE, SignalType.INTEL_REPORT,
+    SignalType.HEAT_CHECK, SignalType.DROP_ALERT, SignalType.GENERAL,
+)
+
+# sha256 over user, ~5km area (5-char geohash prefix), type and the first 100
+# chars of text. Computed by Postgres (pgcrypto) on every write.
+DEDUPE_HASH_SQL = (
+    "digest(user_id::text || ':' || (geohash >> 35)::text || ':' || signal_type::text || ':' "
+    "|| btrim(lower(left(coalesce(text_content, ''), 100))), 'sha256')"
+)
+
+signal_tags = Table(
+    'signal_tags', Base.metadata,
+    Column('signal_id', UUID(as_uuid=True), ForeignKey('signals.id', ondelete="CASCADE"), primary_key=True),
+    Column('tag_id', SmallInteger, ForeignKey('tags.id'), primary_key=True),
+    Index('ix_signal_tags_tag', 'tag_id', 'signal_id'),
+)
+
 class Signal(Base):
     __tablename__ = 'signals'
     
     # Core identity
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuidv7()"))  # Time-ordered
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id', ondelete="CASCADE"), nullable=False, index=True)
     
     # Geospatial data - core to the signal
     geom = Column(Geography(geometry_type='POINT', srid=4326), nullable=False)
-    geohash = Column(String(12), nullable=False, index=True)  # Auto-generated from geom
+    geohash = Column(GeohashInt, nullable=False)  # Auto-generated from geom; indexed via ix_signals_geohash_time
     city = Column(String(100), nullable=True, index=True)     # For city-based filtering
     
     # Signal content
-    signal_type = Column(
-        Enum('SPOTTED', 'STOCK_CHECK', 'LINE_UPDATE', 'INTEL_REPORT', 'HEAT_CHECK', 'DROP_ALERT', 'GENERAL', 
-             name='signal_type_enum'), 
-        nullable=False, index=True
-    )
+    signal_type = Column(SmallIntEnum(SIGNAL_TYPES), nullable=False, index=True)
     text_content = Column(Text, nullable=True)
     media_url = Column(String(500), nullable=True)
     
@@ -44,26 +64,22 @@ class Signal(Base):
     store_id = Column(UUID(as_uuid=True), ForeignKey('stores.id', ondelete="SET NULL"), nullable=True)
     drop_id = Column(UUID(as_uuid=True), ForeignKey('drops.id', ondelete="SET NULL"), nullable=True)
     
-    # Community engagement
-    reputation_score = Column(Integer, default=0, nullable=False)  # Community-driven trust score
-    boost_count = Column(Integer, default=0, nullable=False)       # Number of boosts received
-    view_count = Column(Integer, default=0, nullable=False)        # View tracking
-    reply_count = Column(Integer, default=0, nullable=False)       # Comment count
+    # Community engagement (hot counters live in SignalCounters)
+    reputation_score = Column(SmallInteger, default=0, nullable=False)  # Community-driven trust score
     
     # Tags and metadata
-    tags = Column(ARRAY(String), nullable=True)                   # ["jordan4", "footlocker", "restock"]
     brand = Column(String(100), nullable=True, index=True)        # "Nike", "Adidas", "Jordan"
     product_sku = Column(String(100), nullable=True)              # "DZ5485-612"
     
     # Deduplication and quality control
-    dedupe_hash = Column(String(64), nullable=True, index=True)   # For duplicate detection
+    dedupe_hash = Column(LargeBinary, Computed(DEDUPE_HASH_SQL, persisted=True))  # For duplicate detection
     is_verified = Column(Boolean, default=False, nullable=False) # Mod-verified accuracy
     is_flagged = Column(Boolean, default=False, nullable=False)  # Community-flagged content
     
     # Temporal data
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
-    expires_at = Column(DateTime(timezone=True), nullable=True)   # For time-sensitive signals
+    expires_at = Column(DateTime(timezone=False), nullable=True)  # For time-sensitive signals (naive UTC)
     
     # Privacy and visibility
     visibility = Column(
@@ -73,60 +89,60 @@ class Signal(Base):
     
     # Relationships
     user = relationship("User", back_populates="signals")
+    counters = relationship("SignalCounters", uselist=False, lazy="joined", cascade="all, delete-orphan")
+    tag_objects = relationship("Tag", secondary="signal_tags", lazy="selectin")
+    
+    # Tag names, e.g. ["jordan4", "footlocker", "restock"]; assign via set_tags()
+    tags = association_proxy("tag_objects", "name")
     # store = relationship("Store")  # Will create when Store model exists
     # drop = relationship("Drop")    # Will create when Drop model exists
     
     # Constraints and Indexes
     __table_args__ = (
         # Performance indexes
-        Index('ix_signals_geom', geom, postgresql_using='gist'),
-        Index('ix_signals_geohash_time', geohash, created_at.desc()),
+        Index('ix_signals_geom', geom, postgresql_using='spgist'),
+        Index('ix_signals_geohash_time', geohash, created_at.desc(),
+              postgresql_include=['id', 'signal_type', 'reputation_score', 'user_id']),
         Index('ix_signals_type_time', signal_type, created_at.desc()),
         Index('ix_signals_city_time', city, created_at.desc()),
         Index('ix_signals_user_time', user_id, created_at.desc()),
-        Index('ix_signals_reputation', reputation_score.desc()),
+        Index('ix_signals_reputation', reputation_score, postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
         Index('ix_signals_brand_time', brand, created_at.desc()),
+        Index('ix_signals_dedupe', dedupe_hash, postgresql_using='hash'),
         
         # Composite indexes for common queries
-        Index('ix_signals_visibility_time', visibility, created_at.desc()),
+        Index('ix_signals_public_time', created_at.desc(), postgresql_where=text("visibility = 'public'")),
+        Index('ix_signals_local_time', created_at.desc(), postgresql_where=text("visibility = 'local'")),
+        Index('ix_signals_followers_time', created_at.desc(), postgresql_where=text("visibility = 'followers'")),
         Index('ix_signals_active', visibility, is_flagged, expires_at),
         
         # Data quality constraints
-        CheckConstraint('reputation_score >= 0', name='positive_reputation'),
-        CheckConstraint('boost_count >= 0', name='positive_boost_count'),
-        CheckConstraint('view_count >= 0', name='positive_view_count'),
-        CheckConstraint('reply_count >= 0', name='positive_reply_count'),
+        CheckConstraint('reputation_score BETWEEN 0 AND 32767', name='positive_reputation'),
+        CheckConstraint('signal_type BETWEEN 0 AND 6', name='valid_signal_type'),
     )
     
+    @property
+    def boost_count(self) -> int:
+        return self.counters.boost_count if self.counters else 0
+    
+    @property
+    def view_count(self) -> int:
+        return self.counters.view_count if self.counters else 0
+    
+    @property
+    def reply_count(self) -> int:
+        return self.counters.reply_count if self.counters else 0
+    
     @classmethod
-    def generate_geohash(cls, latitude: float, longitude: float, precision: int = 7) -> str:
+    def generate_geohash(cls, latitude: float, longitude: float, precision: int = GEOHASH_INT_PRECISION) -> str:
         """Generate geohash from coordinates"""
         return geohash2.encode(latitude, longitude, precision=precision)
     
-    @classmethod
-    def generate_dedupe_hash(cls, user_id: str, geohash: str, signal_type: str, text_content: str = None) -> str:
-        """Generate hash for duplicate detection"""
-        # Create hash from user, location (geohash precision 5), type, and content
-        geohash_coarse = geohash[:5] if geohash else ""
-        content_preview = (text_content or "")[:100].lower().strip()
-        
-        dedupe_string = f"{user_id}:{geohash_coarse}:{signal_type}:{content_preview}"
-        return hashlib.sha256(dedupe_string.encode()).hexdigest()
-    
     def set_coordinates(self, latitude: float, longitude: float):
         """Set coordinates and auto-generate geohash"""
         # PostGIS point creation will be handled by SQLAlchemy
         self.geohash = self.generate_geohash(latitude, longitude)
     
-    def generate_dedupe_hash_for_instance(self):
-        """Generate dedupe hash for this signal instance"""
-        self.dedupe_hash = self.generate_dedupe_hash(
-            str(self.user_id),
-            self.geohash,
-            self.signal_type,
-            self.text_content
-        )
-    
     def is_expired(self) -> bool:
         """Check if signal has expired"""
         if not self.expires_at:
@@ -141,9 +157,17 @@ class Signal(Base):
             self.visibility in ['public', 'local']
         )
     
+    def set_tags(self, db, names: list):
+        """Replace this signal's tags, creating any tag names not seen before"""
+        self.tag_objects = [Tag.get_or_create(db, name) for name in dict.fromkeys(names)]
+    
     def boost(self):
         """Increment boost count"""
-        self.boost_count += 1
+        if self.counters is None:
+            self.counters = SignalCounters(boost_count=1)
+        else:
+            # Atomic in-database increment on the narrow counters row
+            self.counters.boost_count = SignalCounters.boost_count + 1
         self.reputation_score += 2  # Boosts increase reputation
     
     def flag(self):
@@ -174,9 +198,48 @@ class Signal(Base):
                 "text_content": self.text_content,
                 "reputation_score": self.reputation_score,
                 "boost_count": self.boost_count,
-                "tags": self.tags,
+                "tags": list(self.tags),
                 "brand": self.brand,
                 "created_at": self.created_at.isoformat() if self.created_at else None,
                 "is_verified": self.is_verified
             }
-        }
\ No newline at end of file
+        }
+
+
+class SignalCounters(Base):
+    """Hot engagement counters for a signal, kept out of the wide signals row"""
+    __tablename__ = 'signal_counters'
+    
+    signal_id = Column(UUID(as_uuid=True), ForeignKey('signals.id', ondelete="CASCADE"), primary_key=True)
+    view_count = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    boost_count = Column(SmallInteger, default=0, server_default=text("0"), nullable=False)
+    reply_count = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    
+    __table_args__ = (
+        CheckConstraint('view_count >= 0', name='positive_view_count'),
+        CheckConstraint('boost_count BETWEEN 0 AND 32767', name='positive_boost_count'),
+        CheckConstraint('reply_count >= 0', name='positive_reply_count'),
+    )
+
+
+class Tag(Base):
+    """Shared vocabulary of signal tags"""
+    __tablename__ = 'tags'
+    
+    id = Column(SmallInteger, primary_key=True)
+    name = Column(String(TAG_NAME_MAX_LENGTH), unique=True, nullable=False)
+    
+    @classmethod
+    def get_or_create(cls, db, name: str) -> "Tag":
+        """
+        Get existing tag by name or create a new one. The insert is
+        ON CONFLICT DO NOTHING, so a concurrent create of the same name is
+        picked up by the re-select instead of failing on UNIQUE(name). Only
+        missing names are inserted, since a conflicting insert still uses
+        up a SMALLINT id.
+        """
+        tag = db.query(cls).filter(cls.name == name).first()
+        if tag is None:
+            db.execute(insert(cls).values(name=name).on_conflict_do_nothing(index_elements=[cls.name]))
+            tag = db.query(cls).filter(cls.name == name).one()
+        return tag
@@ -5,10 +5,21 @@ Surfaces two-way and three-way trade loops based on user inventory and wishlists
 
 import uuid
 from datetime import datetime, timedelta
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Float, Index, Enum
-from sqlalchemy.dialects.postgresql import UUID, JSON, ARRAY
+from sqlalchemy import (
+    Column, String, Integer, SmallInteger, Boolean, DateTime, ForeignKey, Float, Index, Enum, select,
+    values, column
+)
+from sqlalchemy.dialects.postgresql import UUID, JSON
+from sqlalchemy.orm import relationship, attribute_keyed_dict
 from sqlalchemy.sql import func
 from services.database import Base
+from services.models.listing import LISTING_CONDITIONS
+
+# Condition -> position from best (DS) to worst (BEAT)
+CONDITION_RANK = {condition: rank for rank, condition in enumerate(LISTING_CONDITIONS)}
+
+# User id sets at least this large are joined as VALUES rather than IN (...)
+VALUES_JOIN_MIN = 16
 
 
 class MatchType:
@@ -50,40 +61,12 @@ class TradeMatch(Base):
         nullable=False, index=True
     )
     
-    # Participants and their roles
-    participants = Column(JSON, nullable=False)
-    """
-    Two-way example:
-    [
-        {
-            "user_id": "uuid-1",
-            "offers_listing_id": "listing-a",
-            "wants_listing_id": "listing-b",
-            "offers_title": "Jordan 4 Bred Size 10",
-            "wants_title": "Dunk Low Panda Size 10"
-        },
-        {
-            "user_id": "uuid-2", 
-            "offers_listing_id": "listing-b",
-            "wants_listing_id": "listing-a",
-            "offers_title": "Dunk Low Panda Size 10",
-            "wants_title": "Jordan 4 Bred Size 10"
-        }
-    ]
-    
-    Three-way example:
-    [
-        {"user_id": "uuid-1", "offers_listing_id": "a", "wants_listing_id": "b"},
-        {"user_id": "uuid-2", "offers_listing_id": "b", "wants_listing_id": "c"},
-        {"user_id": "uuid-3", "offers_listing_id": "c", "wants_listing_id": "a"}
-    ]
-    """
-    
-    # All user IDs involved (for efficient querying)
-    user_ids = Column(ARRAY(UUID(as_uuid=True)), nullable=False)
-    
-    # All listing IDs involved
-    listing_ids = Column(ARRAY(UUID(as_uuid=True)), nullable=False)
+    # Participants and their roles (rows in trade_match_participants), keyed
+    # by user_id; two-way matches have two rows, three-way (A→B→C→A) three
+    participant_rows = relationship(
+        "TradeMatchParticipant", lazy="selectin", cascade="all, delete-orphan",
+        collection_class=attribute_keyed_dict("user_id"),
+    )
     
     # Location - common area for all participants
     h3_common = Column(String(15), nullable=True, index=True)  # Shared hex (if any)
@@ -121,10 +104,6 @@ class TradeMatch(Base):
     
     # Indexes
     __table_args__ = (
-        # User's matches
-        Index('ix_trade_matches_users', user_ids, postgresql_using='gin'),
-        Index('ix_trade_matches_listings', listing_ids, postgresql_using='gin'),
-        
         # Status queries
         Index('ix_trade_matches_status_created', status, created_at.desc()),
         
@@ -149,21 +128,26 @@ class TradeMatch(Base):
         if self.status == MatchStatus.SUGGESTED:
             self.status = MatchStatus.VIEWED
     
+    def _set_acceptance(self, user_id, response: dict) -> dict:
+        """
+        Store a user's response as a new dict; the plain JSON column only
+        detects reassignment, so mutating it in place was never flushed.
+        """
+        acceptances = dict(self.acceptances or {})
+        acceptances[str(user_id)] = response
+        self.acceptances = acceptances
+        return acceptances
+    
     def record_acceptance(self, user_id: str):
         """Record a user's acceptance of the trade"""
-        if not self.acceptances:
-            self.acceptances = {}
-        
-        self.acceptances[user_id] = {
+        acceptances = self._set_acceptance(user_id, {
             "accepted": True,
             "at": datetime.utcnow().isoformat()
-        }
+        })
         
         # Check if all parties have accepted
-        all_accepted = all(
-            self.acceptances.get(str(uid), {}).get("accepted", False)
-            for uid in self.user_ids
-        )
+        accepted_ids = {uid for uid, response in acceptances.items() if response.get("accepted")}
+        all_accepted = accepted_ids.issuperset(str(uid) for uid in self.participant_rows)
         
         if all_accepted:
             self.status = MatchStatus.ACCEPTED
@@ -172,14 +156,11 @@ class TradeMatch(Base):
     
     def record_decline(self, user_id: str):
         """Record a user's decline of the trade"""
-        if not self.acceptances:
-            self.acceptances = {}
-        
-        self.acceptances[user_id] = {
+        self._set_acceptance(user_id, {
             "accepted": False,
             "declined": True,
             "at": datetime.utcnow().isoformat()
-        }
+        })
         
         self.status = MatchStatus.DECLINED
     
@@ -188,12 +169,55 @@ class TradeMatch(Base):
         self.status = MatchStatus.COMPLETED
         self.completed_at = datetime.utcnow()
     
-    def get_user_role(self, user_id: str) -> dict:
+    @classmethod
+    def involving(cls, user_ids):
+        """
+        SQL filter for matches a user (one id) or any of a collection of
+        users takes part in. Sets of VALUES_JOIN_MIN ids or more are joined
+        as a VALUES list, which the planner treats as a relation (hash or
+        merge join) instead of testing an IN list against every row.
+        """
+        if isinstance(user_ids, (str, uuid.UUID)):
+            return cls.participant_rows.any(TradeMatchParticipant.user_id == user_ids)
+        
+        user_ids = list(user_ids)
+        if len(user_ids) < VALUES_JOIN_MIN:
+            return cls.participant_rows.any(TradeMatchParticipant.user_id.in_(user_ids))
+        ids = values(column('user_id', UUID(as_uuid=True)), name='ids').data([(user_id,) for user_id in user_ids])
+        return cls.id.in_(
+            select(TradeMatchParticipant.match_id).join(ids, ids.c.user_id == TradeMatchParticipant.user_id)
+        )
+    
+    @classmethod
+    def find_for_user(cls, db, user_ids):
+        """
+        Query for the user's (or users') matches, served by
+        ix_trade_match_participants_user; participant rows come with them,
+        so get_user_role needs no query.
+        """
+        return db.query(cls).filter(cls.involving(user_ids))
+    
+    @classmethod
+    def offering_all(cls, listing_ids: list):
+        """SQL filter for matches in which every one of the listings is offered"""
+        return cls.id.in_(
+            select(TradeMatchParticipant.match_id)
+            .where(TradeMatchParticipant.offers_listing_id.in_(listing_ids))
+            .group_by(TradeMatchParticipant.match_id)
+            .having(func.count() == len(set(listing_ids)))
+        )
+    
+    @property
+    def participants(self) -> list:
+        """Participant roles in trade order"""
+        return [
+            participant.to_dict()
+            for participant in sorted(self.participant_rows.values(), key=lambda p: p.role_index)
+        ]
+    
+    def get_user_role(self, user_id) -> "TradeMatchParticipant":
         """Get a specific user's role in the trade"""
-        for participant in self.participants:
-            if participant.get("user_id") == user_id:
-                return participant
-        return None
+        return self.participant_rows.get(uuid.UUID(str(user_id)))
     
     def to_dict(self) -> dict:
         """Convert to dictionary for API responses"""
@@ -218,21 +242,18 @@ class TradeMatch(Base):
         if not user_role:
             return self.to_dict()
         
-        # Find what user gets
-        other_participants = [p for p in self.participants if p.get("user_id") != user_id]
-        
         return {
             "id": str(self.id),
             "match_type": self.match_type,
             "you_offer": {
-                "listing_id": user_role.get("offers_listing_id"),
-                "title": user_role.get("offers_title"),
+                "listing_id": str(user_role.offers_listing_id) if user_role.offers_listing_id else None,
+                "title": user_role.offers_title,
             },
             "you_receive": {
-                "listing_id": user_role.get("wants_listing_id"),
-                "title": user_role.get("wants_title"),
+                "listing_id": str(user_role.wants_listing_id) if user_role.wants_listing_id else None,
+                "title": user_role.wants_title,
             },
-            "other_parties": len(other_participants),
+            "other_parties": len(self.participant_rows) - 1,
             "locality_score": self.locality_score,
             "match_score": round(self.match_score, 2),
             "status": self.status,
@@ -254,26 +275,29 @@ class TradeMatch(Base):
         max_distance: float = None
     ) -> "TradeMatch":
         """Factory method for two-way trade matches"""
+        user_a_id, user_b_id, listing_a_id, listing_b_id = (
+            uuid.UUID(str(id_)) for id_ in (user_a_id, user_b_id, listing_a_id, listing_b_id)
+        )
         return cls(
             match_type=MatchType.TWO_WAY,
-            participants=[
-                {
-                    "user_id": user_a_id,
-                    "offers_listing_id": listing_a_id,
-                    "wants_listing_id": listing_b_id,
-                    "offers_title": listing_a_title,
-                    "wants_title": listing_b_title,
-                },
-                {
-                    "user_id": user_b_id,
-                    "offers_listing_id": listing_b_id,
-                    "wants_listing_id": listing_a_id,
-                    "offers_title": listing_b_title,
-                    "wants_title": listing_a_title,
-                }
-            ],
-            user_ids=[user_a_id, user_b_id],
-            listing_ids=[listing_a_id, listing_b_id],
+            participant_rows={
+                user_a_id: TradeMatchParticipant(
+                    role_index=0,
+                    user_id=user_a_id,
+                    offers_listing_id=listing_a_id,
+                    wants_listing_id=listing_b_id,
+                    offers_title=listing_a_title,
+                    wants_title=listing_b_title,
+                ),
+                user_b_id: TradeMatchParticipant(
+                    role_index=1,
+                    user_id=user_b_id,
+                    offers_listing_id=listing_b_id,
+                    wants_listing_id=listing_a_id,
+                    offers_title=listing_b_title,
+                    wants_title=listing_a_title,
+                ),
+            },
             h3_common=h3_common,
             locality_score=locality_score,
             max_distance_miles=max_distance,
@@ -281,6 +305,35 @@ class TradeMatch(Base):
         )
 
 
+class TradeMatchParticipant(Base):
+    """One user's side of a trade match: what they give and what they get"""
+    __tablename__ = 'trade_match_participants'
+    
+    match_id = Column(UUID(as_uuid=True), ForeignKey('trade_matches.id', ondelete="CASCADE"), primary_key=True)
+    role_index = Column(SmallInteger, primary_key=True)  # Position in the trade loop
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    offers_listing_id = Column(UUID(as_uuid=True), nullable=True)
+    wants_listing_id = Column(UUID(as_uuid=True), nullable=True)
+    offers_title = Column(String(200), nullable=True)
+    wants_title = Column(String(200), nullable=True)
+    
+    __table_args__ = (
+        # User's matches
+        Index('ix_trade_match_participants_user', user_id, match_id),
+        # Existing match for a set of listings
+        Index('ix_trade_match_participants_offers', offers_listing_id, match_id),
+    )
+    
+    def to_dict(self) -> dict:
+        return {
+            "user_id": str(self.user_id),
+            "offers_listing_id": str(self.offers_listing_id) if self.offers_listing_id else None,
+            "wants_listing_id": str(self.wants_listing_id) if self.wants_listing_id else None,
+            "offers_title": self.offers_title,
+            "wants_title": self.wants_title,
+        }
+
+
 class UserWishlist(Base):
     """
     User wishlist items for trade matching.
@@ -357,16 +410,12 @@ class UserWishlist(Base):
             if float(listing.price) > self.max_price:
                 return False
         
-        # Condition check
+        # Condition check (unknown conditions don't filter)
         if self.min_condition and listing.condition:
-            condition_order = ['DS', 'VNDS', 'EXCELLENT', 'GOOD', 'FAIR', 'BEAT']
-            try:
-                min_idx = condition_order.index(self.min_condition)
-                listing_idx = condition_order.index(listing.condition)
-                if listing_idx > min_idx:  # Worse condition
-                    return False
-            except ValueError:
-                pass
+            min_rank = CONDITION_RANK.get(self.min_condition)
+            listing_rank = CONDITION_RANK.get(listing.condition)
+            if min_rank is not None and listing_rank is not None and listing_rank > min_rank:  # Worse condition
+                return False
         
         return True
     
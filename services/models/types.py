@@ -0,0 +1,60 @@
+from sqlalchemy import BigInteger, SmallInteger
+from sqlalchemy.types import TypeDecorator
+from services.core.geohash_utils import gh_encode, gh_decode
+
+
+class GeohashInt(TypeDecorator):
+    """Geohash stored as a 60-bit BIGINT, exposed to Python as a 12-char string.
+
+    Integer values (e.g. bounds from gh_prefix_range) are passed through as-is.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        return gh_encode(value)
+
+    def process_result_value(self, value, dialect):
+        return gh_decode(value) if value is not None else None
+
+
+class H3Int(TypeDecorator):
+    """H3 cell stored as a BIGINT, exposed to Python as the usual hex string.
+
+    Valid cells keep the top (reserved) bit clear, so they fit a signed BIGINT.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        return int(value, 16)
+
+    def process_result_value(self, value, dialect):
+        return format(value, 'x') if value is not None else None
+
+
+class SmallIntEnum(TypeDecorator):
+    """String enum stored as a SMALLINT position in a fixed tuple of names.
+
+    Only ever append to the names tuple; existing positions are stored data.
+    Matching lookup tables (signal_types etc.) hold the same id -> name map.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, names):
+        super().__init__()
+        self.names = tuple(names)
+        self._ids = {name: i for i, name in enumerate(self.names)}
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        return self._ids[value]
+
+    def process_result_value(self, value, dialect):
+        return self.names[value] if value is not None else None
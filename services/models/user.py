@@ -28,7 +28,7 @@ class User(Base):
     is_verified = Column(Boolean, default=False, nullable=False)
     is_admin = Column(Boolean, default=False, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
-    laces_balance = Column(Integer, default=100, nullable=False)
+    laces_balance = Column(Integer, default=100, nullable=False)  # Moved by laces_ledger inserts (trigger)
     total_posts = Column(Integer, default=0, nullable=False)
     total_boosts_sent = Column(Integer, default=0, nullable=False)
     total_boosts_received = Column(Integer, default=0, nullable=False)
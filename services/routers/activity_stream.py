@@ -8,34 +8,79 @@ Clients subscribe to geographic channels based on their location.
 import json
 import asyncio
 import logging
-from typing import Set
+from functools import lru_cache
+from typing import Collection, FrozenSet, Optional, Set
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
 import h3
+import redis.asyncio as redis
 
-from services.core.redis_client import get_redis
+from services.core.redis_client import REDIS_URL, get_redis
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["activity-stream"])
 
+# Feed events are published to feed:{h3_index} (see routers.feed_v2)
+FEED_CHANNEL_PATTERN = "feed:*"
+
+# Frames buffered per connection; a client this far behind loses the oldest
+OUTBOX_SIZE = 256
+
 
 class ConnectionManager:
-    """Manages WebSocket connections and their subscriptions"""
+    """
+    Manages WebSocket connections and their subscriptions. Each process
+    holds one Redis pattern subscription to every feed channel and fans
+    messages out in-process through a channel -> connections index, so
+    Redis tracks one subscriber per process rather than one per hex per
+    client. Every connection has its own outbound queue and sender task,
+    so a slow socket never holds up the listener or other clients.
+    """
     
     def __init__(self):
         # Map of websocket -> set of subscribed channels
         self.active_connections: dict[WebSocket, Set[str]] = {}
+        # Map of channel -> websockets subscribed to it
+        self.channel_connections: dict[str, Set[WebSocket]] = {}
+        # Map of websocket -> (outbound frame queue, task sending from it)
+        self.outboxes: dict[WebSocket, tuple[asyncio.Queue, asyncio.Task]] = {}
+        self._feed_listener: Optional[asyncio.Task] = None
     
-    async def connect(self, websocket: WebSocket, channels: Set[str]):
+    async def connect(self, websocket: WebSocket, channels: FrozenSet[str]):
         """Accept connection and register channel subscriptions"""
         await websocket.accept()
-        self.active_connections[websocket] = channels
+        self.active_connections[websocket] = set()
+        outbox = asyncio.Queue(maxsize=OUTBOX_SIZE)
+        self.outboxes[websocket] = (outbox, asyncio.create_task(self._send_outbox(websocket, outbox)))
+        self.update_channels(websocket, channels)
+        if self._feed_listener is None or self._feed_listener.done():
+            self._feed_listener = asyncio.create_task(self._listen_feed())
         logger.info(f"WebSocket connected, subscribed to {len(channels)} channels")
     
+    def update_channels(self, websocket: WebSocket, channels: FrozenSet[str]) -> tuple[Set[str], Set[str]]:
+        """Replace a connection's channels; returns (added, removed)"""
+        current = self.active_connections.setdefault(websocket, set())
+        added, removed = channels - current, current - channels
+        for channel in removed:
+            websockets = self.channel_connections.get(channel)
+            if websockets is not None:
+                websockets.discard(websocket)
+                if not websockets:
+                    del self.channel_connections[channel]
+        for channel in added:
+            self.channel_connections.setdefault(channel, set()).add(websocket)
+        current.difference_update(removed)
+        current.update(added)
+        return added, removed
+    
     def disconnect(self, websocket: WebSocket):
         """Remove connection"""
         if websocket in self.active_connections:
+            self.update_channels(websocket, frozenset())
             del self.active_connections[websocket]
+            _, sender = self.outboxes.pop(websocket)
+            if sender is not asyncio.current_task():
+                sender.cancel()
             logger.info("WebSocket disconnected")
     
     async def send_to_websocket(self, websocket: WebSocket, message: dict):
@@ -45,17 +90,99 @@ class ConnectionManager:
         except Exception as e:
             logger.error(f"Failed to send to websocket: {e}")
     
-    def get_connections_for_channel(self, channel: str) -> list[WebSocket]:
-        """Get all websockets subscribed to a channel"""
-        return [
-            ws for ws, channels in self.active_connections.items()
-            if channel in channels
-        ]
+    def broadcast(self, channel: str, frame: str) -> int:
+        """
+        Queue an already-encoded JSON message for every websocket on a
+        channel without waiting on any send; each connection's sender task
+        delivers it.
+        
+        Returns:
+            Number of websockets the message was queued for
+        """
+        queued = 0
+        for websocket in self.get_connections_for_channel(channel):
+            outbox, _ = self.outboxes.get(websocket, (None, None))
+            if outbox is None:  # Sender already dropped it
+                continue
+            if outbox.full():
+                outbox.get_nowait()  # Drop the stalest frame, keep the live ones
+            outbox.put_nowait(frame)
+            queued += 1
+        return queued
+    
+    async def _send_outbox(self, websocket: WebSocket, outbox: asyncio.Queue):
+        """Send a connection's queued frames in order; drops the connection if a send fails"""
+        try:
+            while True:
+                await websocket.send_text(await outbox.get())
+        except Exception as e:
+            logger.warning(f"Dropping websocket after failed send: {e}")
+            self.disconnect(websocket)
+    
+    def get_connections_for_channel(self, channel: str) -> Collection[WebSocket]:
+        """
+        Get all websockets subscribed to a channel: the index entry itself,
+        not a copy, so copy it before awaiting anything
+        """
+        return self.channel_connections.get(channel, ())
+    
+    async def _listen_feed(self):
+        """
+        Forward feed events from Redis to the connections subscribed to
+        their channel. Runs while clients are connected, reconnecting after
+        errors, and unsubscribes once the last one leaves.
+        """
+        while self.active_connections:
+            redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+            pubsub = redis_client.pubsub()
+            try:
+                await pubsub.psubscribe(FEED_CHANNEL_PATTERN)
+                while self.active_connections:
+                    # Time out once a second to notice the last client leaving
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is None or message["type"] != "pmessage":
+                        continue
+                    # Drop events for hexes nobody here watches
+                    if not self.get_connections_for_channel(message["channel"]):
+                        continue
+                    self.broadcast(message["channel"], feed_event_frame(message["channel"], message["data"]))
+            except Exception as e:
+                logger.error(f"Feed listener error: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+                await redis_client.close()
 
 
 manager = ConnectionManager()
 
 
+def feed_event_frame(channel: str, data: str) -> str:
+    """
+    Outbound feed_event message around a published event. Publishers send
+    encoded ribbon JSON (FeedEvent.to_ribbon_json), so it is spliced in
+    as-is: one string per event for every subscriber, with no parse and
+    re-encode.
+    """
+    return f'{{"type":"feed_event","channel":{json.dumps(channel)},"data":{data}}}'
+
+
+@lru_cache(maxsize=4096)
+def _activity_channels(center_r7: str, center_r8: str, center_r9: str, k: int) -> FrozenSet[str]:
+    # Resolution 7 ring for broad coverage, plus the r8/r9 cells for more granular events
+    return frozenset(
+        [f"feed:{hex_id}" for hex_id in h3.k_ring(center_r7, k)] + [f"feed:{center_r8}", f"feed:{center_r9}"]
+    )
+
+
+def activity_channels(lat: float, lng: float, k: int) -> FrozenSet[str]:
+    """
+    Feed channels for a location. Cached per (r7, r8, r9 cell, k), so GPS
+    pings that stay in the same cells skip the ring traversal.
+    """
+    return _activity_channels(h3.geo_to_h3(lat, lng, 7), h3.geo_to_h3(lat, lng, 8), h3.geo_to_h3(lat, lng, 9), k)
+
+
 @router.websocket("/ws/activity")
 async def activity_stream(
     websocket: WebSocket,
@@ -88,33 +215,13 @@ async def activity_stream(
         }
     }
     """
-    # Get H3 hexes to subscribe to at resolution 7 (broader coverage)
-    center_h3 = h3.geo_to_h3(lat, lng, 7)
+    # H3 hexes to subscribe to, as feed channel names
     k = int(radius * 0.8)
-    hexes = list(h3.k_ring(center_h3, k))
-    
-    # Create channel names
-    channels = {f"feed:{hex_id}" for hex_id in hexes}
-    
-    # Also subscribe to resolution 8 and 9 for more granular events
-    center_h3_r8 = h3.geo_to_h3(lat, lng, 8)
-    center_h3_r9 = h3.geo_to_h3(lat, lng, 9)
-    channels.add(f"feed:{center_h3_r8}")
-    channels.add(f"feed:{center_h3_r9}")
+    channels = activity_channels(lat, lng, k)
     
     await manager.connect(websocket, channels)
     
     try:
-        # Get Redis client
-        redis_client = await get_redis()
-        pubsub = redis_client.pubsub()
-        
-        # Subscribe to all channels
-        for channel in channels:
-            await pubsub.subscribe(channel)
-        
-        logger.info(f"Subscribed to {len(channels)} Redis channels")
-        
         # Send initial connection confirmation
         await websocket.send_json({
             "type": "connected",
@@ -125,83 +232,29 @@ async def activity_stream(
             }
         })
         
-        # Create tasks for receiving from Redis and handling client messages
-        async def listen_redis():
-            """Listen for Redis pub/sub messages"""
-            async for message in pubsub.listen():
-                if message["type"] == "message":
-                    try:
-                        data = json.loads(message["data"])
-                        await websocket.send_json({
-                            "type": "feed_event",
-                            "channel": message["channel"],
-                            "data": data
-                        })
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid JSON in Redis message: {message['data']}")
-                    except Exception as e:
-                        logger.error(f"Error processing Redis message: {e}")
-                        break
-        
-        async def listen_client():
-            """Listen for client messages (ping/pong, location updates)"""
-            while True:
-                try:
-                    data = await websocket.receive_json()
-                    
-                    if data.get("type") == "ping":
-                        await websocket.send_json({"type": "pong"})
+        # Feed events arrive through the manager's shared listener; handle
+        # client messages (ping/pong, location updates) until disconnect
+        while True:
+            data = await websocket.receive_json()
+            
+            if data.get("type") == "ping":
+                await websocket.send_json({"type": "pong"})
+            
+            elif data.get("type") == "update_location":
+                # Client moved - update subscriptions
+                new_lat = data.get("lat")
+                new_lng = data.get("lng")
+                if new_lat and new_lng:
+                    channels = activity_channels(new_lat, new_lng, k)
+                    manager.update_channels(websocket, channels)
                     
-                    elif data.get("type") == "update_location":
-                        # Client moved - update subscriptions
-                        new_lat = data.get("lat")
-                        new_lng = data.get("lng")
-                        if new_lat and new_lng:
-                            # Unsubscribe from old channels
-                            for channel in channels:
-                                await pubsub.unsubscribe(channel)
-                            
-                            # Calculate new channels
-                            new_center = h3.geo_to_h3(new_lat, new_lng, 7)
-                            new_hexes = list(h3.k_ring(new_center, k))
-                            channels.clear()
-                            channels.update({f"feed:{hex_id}" for hex_id in new_hexes})
-                            
-                            # Subscribe to new channels
-                            for channel in channels:
-                                await pubsub.subscribe(channel)
-                            
-                            await websocket.send_json({
-                                "type": "location_updated",
-                                "data": {
-                                    "center": {"lat": new_lat, "lng": new_lng},
-                                    "channels_count": len(channels)
-                                }
-                            })
-                
-                except WebSocketDisconnect:
-                    break
-                except Exception as e:
-                    logger.error(f"Error receiving client message: {e}")
-                    break
-        
-        # Run both listeners concurrently
-        redis_task = asyncio.create_task(listen_redis())
-        client_task = asyncio.create_task(listen_client())
-        
-        # Wait for either to complete (usually client disconnect)
-        done, pending = await asyncio.wait(
-            [redis_task, client_task],
-            return_when=asyncio.FIRST_COMPLETED
-        )
-        
-        # Cancel pending tasks
-        for task in pending:
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
+                    await websocket.send_json({
+                        "type": "location_updated",
+                        "data": {
+                            "center": {"lat": new_lat, "lng": new_lng},
+                            "channels_count": len(channels)
+                        }
+                    })
     
     except WebSocketDisconnect:
         logger.info("Client disconnected")
@@ -210,11 +263,6 @@ async def activity_stream(
     finally:
         # Cleanup
         manager.disconnect(websocket)
-        try:
-            await pubsub.unsubscribe()
-            await pubsub.close()
-        except Exception:
-            pass
 
 
 @router.websocket("/ws/listing/{listing_id}")
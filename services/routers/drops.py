@@ -10,7 +10,7 @@ from pydantic import BaseModel
 
 from services.database import get_db
 from services.core.auth import get_current_active_user, get_current_admin_user
-from services.models.drop import Drop, DropStatus
+from services.models.drop import Drop, DropStatus, DropRegion
 from services.models.user import User
 
 router = APIRouter(prefix="/drops", tags=["drops"])
@@ -85,7 +85,7 @@ async def list_drops(
         query = query.filter(Drop.status == status)
     
     if region:
-        query = query.filter(Drop.regions.any(region))
+        query = query.filter(Drop.region_links.any(DropRegion.region == region))
     
     if city:
         # Filter by stores in city (join with stores table)
@@ -135,7 +135,7 @@ async def list_drops(
             retail_price=float(drop.retail_price) if drop.retail_price else None,
             image_url=drop.image_url,
             status=drop.status,
-            regions=drop.regions,
+            regions=list(drop.regions),
             release_type=drop.release_type,
             links=drop.links,
             hype_score=drop.hype_score,
@@ -175,7 +175,7 @@ async def get_drop(drop_id: str, db: Session = Depends(get_db)):
         retail_price=float(drop.retail_price) if drop.retail_price else None,
         image_url=drop.image_url,
         status=drop.status,
-        regions=drop.regions,
+        regions=list(drop.regions),
         release_type=drop.release_type,
         links=drop.links,
         hype_score=drop.hype_score,
@@ -219,7 +219,7 @@ async def create_drop(
         release_at=drop_data.release_at,
         retail_price=drop_data.retail_price,
         image_url=drop_data.image_url,
-        regions=drop_data.regions,
+        regions=drop_data.regions or [],
         release_type=drop_data.release_type,
         links=drop_data.links,
         original_source="manual",
@@ -240,7 +240,7 @@ async def create_drop(
         retail_price=float(drop.retail_price) if drop.retail_price else None,
         image_url=drop.image_url,
         status=drop.status,
-        regions=drop.regions,
+        regions=list(drop.regions),
         release_type=drop.release_type,
         links=drop.links,
         hype_score=drop.hype_score,
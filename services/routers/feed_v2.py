@@ -15,36 +15,53 @@ Endpoints:
 import uuid
 from datetime import datetime, timedelta
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, or_
+from sqlalchemy import desc, or_, select, func
 
 from services.core.database import get_db
 from services.core.security import get_current_user
 from services.core.redis_client import get_redis
 from services.core.h3_geo import (
-    coords_to_h3, get_radius_hexes, estimate_distance_miles
+    coords_to_h3, get_radius_hexes, get_radius_hexes_compacted, get_kring_size,
+    estimate_distances_miles, COMPACT_MIN_K
 )
+from services.core.ranking import rank_candidates
 from services.models.user import User
-from services.models.listing import Listing, ListingSave, ListingStatus
-from services.models.feed_event import FeedEvent
-from services.models.heat_index import NeighborhoodHeatIndex
+from services.models.listing import (
+    Listing, ListingSave, LISTING_CONDITIONS, LISTING_TRADE_INTENTS, listing_feed_ranked_mv
+)
+from services.models.feed_event import FeedEvent, FEED_EVENT_TYPES
+from services.models.heat_index import NeighborhoodHeatIndex, HeatTrending
 from services.models.trade_match import TradeMatch, MatchStatus
 from services.models.location import Location
 from services.schemas.listing import (
-    ListingCreate, ListingResponse, ListingFeedItem,
+    ListingCreate, ListingResponse,
     HyperlocalFeedResponse, HeatIndexResponse, ActivityRibbonItem,
     ActivityRibbonResponse, TradeMatchResponse, TradeMatchListResponse,
     PriceDropRequest
 )
 
-import json
 import logging
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+
+def _json_response(payload: dict):
+    """
+    Encode a payload already in its response_model shape straight to JSON
+    with orjson, skipping per-field model validation.
+    """
+    return Response(content=orjson.dumps(payload, option=orjson.OPT_UTC_Z), media_type="application/json")
+
 router = APIRouter(prefix="/v2/feed", tags=["feed-v2"])
 
+# Best-ranked listings re-ranked with proximity per hyperlocal request
+FEED_CANDIDATE_POOL = 500
+
 
 # =============================================================================
 # HYPERLOCAL FEED
@@ -79,88 +96,96 @@ async def get_hyperlocal_feed(
     # Get H3 hexes covering the search radius
     center_h3 = coords_to_h3(lat, lng, 9)
     
+    # Read from the pre-projected feed view (active, unexpired listings only)
+    feed = listing_feed_ranked_mv.c
+    
     # Determine which resolution to query based on radius
-    if radius <= 0.5:
-        hex_column = Listing.h3_index
-        search_hexes = get_radius_hexes(lat, lng, radius)
+    if get_kring_size(radius) >= COMPACT_MIN_K:
+        # Wide rings: exact cover as compacted r9/r8/r7 cells, one short IN per column
+        hex_columns = {9: feed.h3_index, 8: feed.h3_index_r8, 7: feed.h3_index_r7}
+        hex_filter = or_(*(
+            hex_columns[resolution].in_(hexes)
+            for resolution, hexes in get_radius_hexes_compacted(lat, lng, radius).items()
+        ))
+    elif radius <= 0.5:
+        hex_filter = feed.h3_index.in_(get_radius_hexes(lat, lng, radius))
     elif radius <= 1.5:
-        hex_column = Listing.h3_index_r8
-        search_hexes = get_radius_hexes(lat, lng, radius)
         # Convert to r8 hexes
         import h3
-        search_hexes = list(set(h3.h3_to_parent(h, 8) for h in search_hexes))
-    else:
-        hex_column = Listing.h3_index_r7
         search_hexes = get_radius_hexes(lat, lng, radius)
+        hex_filter = feed.h3_index_r8.in_(list(set(h3.h3_to_parent(h, 8) for h in search_hexes)))
+    else:
         import h3
-        search_hexes = list(set(h3.h3_to_parent(h, 7) for h in search_hexes))
-    
-    # Build base query
-    query = db.query(Listing).filter(
-        Listing.status == ListingStatus.ACTIVE,
-        hex_column.in_(search_hexes)
-    )
+        search_hexes = get_radius_hexes(lat, lng, radius)
+        hex_filter = feed.h3_index_r7.in_(list(set(h3.h3_to_parent(h, 7) for h in search_hexes)))
     
-    # Apply filters
+    # Build filters
+    filters = [hex_filter]
     if brand:
-        query = query.filter(Listing.brand.ilike(f"%{brand}%"))
+        filters.append(feed.brand.ilike(f"%{brand}%"))
     if size:
-        query = query.filter(Listing.size == size)
+        filters.append(feed.size == size)
+    # Enum filters are bound as their SMALLINT ids
     if condition:
-        query = query.filter(Listing.condition == condition)
+        if condition not in LISTING_CONDITIONS:
+            raise HTTPException(status_code=400, detail=f"Unknown condition: {condition}")
+        filters.append(feed.condition == condition)
     if trade_intent:
-        query = query.filter(Listing.trade_intent == trade_intent)
+        if trade_intent not in LISTING_TRADE_INTENTS:
+            raise HTTPException(status_code=400, detail=f"Unknown trade intent: {trade_intent}")
+        filters.append(feed.trade_intent == trade_intent)
     if min_price is not None:
-        query = query.filter(Listing.price >= min_price)
+        filters.append(feed.price >= min_price)
     if max_price is not None:
-        query = query.filter(Listing.price <= max_price)
+        filters.append(feed.price <= max_price)
     
     # Get total count before pagination
-    total_count = query.count()
-    
-    # Apply sorting
-    if sort_by == "price":
-        query = query.order_by(Listing.price.asc().nullslast())
-    elif sort_by == "newest":
-        query = query.order_by(desc(Listing.created_at))
+    total_count = db.execute(
+        select(func.count()).select_from(listing_feed_ranked_mv).where(*filters)
+    ).scalar_one()
+    
+    if sort_by in ("price", "newest"):
+        order_by = [feed.price.asc().nullslast()] if sort_by == "price" else [desc(feed.created_at)]
+        rows = db.execute(
+            select(listing_feed_ranked_mv).where(*filters).order_by(*order_by).offset(offset).limit(limit)
+        ).all()
+        distances = estimate_distances_miles(center_h3, [row.h3_index for row in rows])
     elif sort_by == "distance":
-        # For distance sorting, we'd need to compute actual distances
-        # For now, use h3 index ordering as proxy
-        query = query.order_by(Listing.h3_index)
-    else:  # rank (default)
-        query = query.order_by(desc(Listing.rank_score), desc(Listing.created_at))
-    
-    # Paginate
-    listings = query.offset(offset).limit(limit).all()
-    
-    # Compute distances and convert to feed items
-    feed_items = []
-    for listing in listings:
-        distance = estimate_distance_miles(center_h3, listing.h3_index)
-        item = ListingFeedItem(
-            id=listing.id,
-            user_id=listing.user_id,
-            title=listing.title,
-            brand=listing.brand,
-            sku=listing.sku,
-            size=listing.size,
-            condition=listing.condition,
-            images=listing.images,
-            authenticity_score=listing.authenticity_score,
-            is_verified=listing.is_verified,
-            price=float(listing.price) if listing.price else None,
-            original_price=float(listing.original_price) if listing.original_price else None,
-            price_drop_percent=listing.get_price_drop_percent(),
-            trade_intent=listing.trade_intent,
-            distance_miles=round(distance, 2),
-            rank_score=listing.rank_score,
-            demand_score=listing.demand_score,
-            view_count=listing.view_count,
-            save_count=listing.save_count,
-            status=listing.status,
-            created_at=listing.created_at
-        )
-        feed_items.append(item)
+        # Nearest first over the whole filtered set: estimate every match's
+        # distance from its hex (reading only id and hex, best-ranked first
+        # so ties keep rank order), then load just the page's rows
+        hex_rows = db.execute(
+            select(feed.id, feed.h3_index).where(*filters)
+            .order_by(desc(feed.rank_score), desc(feed.created_at))
+        ).all()
+        all_distances = estimate_distances_miles(center_h3, [row.h3_index for row in hex_rows])
+        order = np.argsort(all_distances, kind='stable')[offset:offset + limit]
+        page_rows = {
+            row.id: row for row in db.execute(
+                select(listing_feed_ranked_mv).where(feed.id.in_([hex_rows[i].id for i in order]))
+            ).all()
+        }
+        # A concurrent view refresh can drop a row between the two reads
+        order = [i for i in order if hex_rows[i].id in page_rows]
+        rows = [page_rows[hex_rows[i].id] for i in order]
+        distances = all_distances[order]
+    else:
+        # rank (default) depends on the viewer: take the best-ranked
+        # candidates, then order them by fused rank + proximity score in one
+        # array pass and paginate in memory
+        candidates = db.execute(
+            select(listing_feed_ranked_mv).where(*filters)
+            .order_by(desc(feed.rank_score), desc(feed.created_at))
+            .limit(max(FEED_CANDIDATE_POOL, offset + limit))
+        ).all()
+        candidate_distances = estimate_distances_miles(center_h3, [row.h3_index for row in candidates])
+        order = rank_candidates(candidate_distances, [row.rank_score for row in candidates], radius)
+        order = order[offset:offset + limit]
+        rows = [candidates[i] for i in order]
+        distances = candidate_distances[order]
+    
+    # Convert to feed items
+    feed_items = Listing.to_feed_dicts(rows, distances)
     
     # Get heat level for the area
     heat_index = db.query(NeighborhoodHeatIndex).filter(
@@ -168,13 +193,13 @@ async def get_hyperlocal_feed(
     ).first()
     heat_level = heat_index.heat_level if heat_index else "cold"
     
-    return HyperlocalFeedResponse(
-        listings=feed_items,
-        total_count=total_count,
-        radius_miles=radius,
-        center_h3=center_h3,
-        heat_level=heat_level
-    )
+    return _json_response({
+        "listings": feed_items,
+        "total_count": total_count,
+        "radius_miles": radius,
+        "center_h3": center_h3,
+        "heat_level": heat_level,
+    })
 
 
 # =============================================================================
@@ -274,17 +299,15 @@ async def get_activity_ribbon(
         FeedEvent.created_at >= datetime.utcnow() - timedelta(hours=24)
     )
     
-    # Filter by event types if specified
+    # Filter by event types if specified (bound as their SMALLINT ids)
     if event_types:
+        unknown = set(event_types).difference(FEED_EVENT_TYPES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown event types: {', '.join(sorted(unknown))}")
         query = query.filter(FeedEvent.event_type.in_(event_types))
     
     # Exclude expired events
-    query = query.filter(
-        or_(
-            FeedEvent.expires_at.is_(None),
-            FeedEvent.expires_at > datetime.utcnow()
-        )
-    )
+    query = query.filter(FeedEvent.active_filter())
     
     events = query.order_by(desc(FeedEvent.created_at)).limit(limit).all()
     
@@ -326,9 +349,7 @@ async def get_trade_matches(
     user_id = str(current_user.user_id)
     
     # Query matches involving this user
-    query = db.query(TradeMatch).filter(
-        TradeMatch.user_ids.contains([current_user.user_id])
-    )
+    query = TradeMatch.find_for_user(db, current_user.user_id)
     
     if status_filter:
         query = query.filter(TradeMatch.status == status_filter)
@@ -380,7 +401,7 @@ async def accept_trade_match(
     if not match:
         raise HTTPException(status_code=404, detail="Trade match not found")
     
-    if current_user.user_id not in match.user_ids:
+    if current_user.user_id not in match.participant_rows:
         raise HTTPException(status_code=403, detail="Not a participant in this trade")
     
     match.record_acceptance(str(current_user.user_id))
@@ -401,7 +422,7 @@ async def decline_trade_match(
     if not match:
         raise HTTPException(status_code=404, detail="Trade match not found")
     
-    if current_user.user_id not in match.user_ids:
+    if current_user.user_id not in match.participant_rows:
         raise HTTPException(status_code=403, detail="Not a participant in this trade")
     
     match.record_decline(str(current_user.user_id))
@@ -481,6 +502,12 @@ async def create_listing(
     )
     db.add(event)
     
+    # Keep the hex's trending counters warm until the next heat index refresh
+    HeatTrending.bump(db, listing.h3_index, 'brand', listing.brand)
+    HeatTrending.bump(db, listing.h3_index, 'size', listing.size)
+    if listing.sku:
+        HeatTrending.bump(db, listing.h3_index, 'sku', listing.sku, label=listing.title)
+    
     db.commit()
     db.refresh(listing)
     
@@ -488,7 +515,7 @@ async def create_listing(
     try:
         await redis_client.publish(
             f"feed:{listing.h3_index}",
-            json.dumps(event.to_ribbon_item())
+            event.to_ribbon_json()
         )
     except Exception as e:
         logger.warning(f"Failed to publish feed event: {e}")
@@ -532,7 +559,8 @@ async def create_listing(
 async def get_listing(
     listing_id: uuid.UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    redis_client = Depends(get_redis)
 ):
     """Get listing details"""
     listing = db.query(Listing).filter(Listing.id == listing_id).first()
@@ -540,10 +568,9 @@ async def get_listing(
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
     
-    # Record view (don't count own views)
+    # Record view (don't count own views or repeat views); buffered, no row write per view
     if listing.user_id != current_user.user_id:
-        listing.record_view()
-        db.commit()
+        Listing.record_view(redis_client, listing.id, current_user.user_id)
     
     return ListingResponse(
         id=listing.id,
@@ -584,7 +611,8 @@ async def get_listing(
 async def save_listing(
     listing_id: uuid.UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    redis_client = Depends(get_redis)
 ):
     """Save/bookmark a listing"""
     listing = db.query(Listing).filter(Listing.id == listing_id).first()
@@ -598,31 +626,26 @@ async def save_listing(
         ListingSave.user_id == current_user.user_id
     ).first()
     
-    if existing:
+    # Queued saves are inserted (and counted) in batches by flush_listing_saves
+    if existing or not ListingSave.enqueue(redis_client, listing_id, current_user.user_id):
         raise HTTPException(status_code=400, detail="Already saved")
     
-    # Create save
-    save = ListingSave(
-        listing_id=listing_id,
-        user_id=current_user.user_id
-    )
-    db.add(save)
-    
-    # Update listing metrics
-    listing.record_save()
-    
-    db.commit()
-    
-    return {"message": "Listing saved", "save_count": listing.save_count}
+    return {"message": "Listing saved", "save_count": listing.save_count + 1}
 
 
 @listings_router.delete("/{listing_id}/save")
 async def unsave_listing(
     listing_id: uuid.UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    redis_client = Depends(get_redis)
 ):
     """Remove save from a listing"""
+    # Not committed yet: nothing to delete here (a flush holding the save
+    # removes its row after committing)
+    if ListingSave.dequeue(redis_client, listing_id, current_user.user_id):
+        return {"message": "Save removed"}
+    
     save = db.query(ListingSave).filter(
         ListingSave.listing_id == listing_id,
         ListingSave.user_id == current_user.user_id
@@ -632,14 +655,11 @@ async def unsave_listing(
         raise HTTPException(status_code=404, detail="Save not found")
     
     db.delete(save)
-    
-    # Update listing metrics
-    listing = db.query(Listing).filter(Listing.id == listing_id).first()
-    if listing:
-        listing.save_count = max(0, listing.save_count - 1)
-    
     db.commit()
     
+    # Update listing metrics (the flush keeps counts from going below zero)
+    Listing.incr_counter(redis_client, listing_id, 'save_count', -1)
+    
     return {"message": "Save removed"}
 
 
@@ -673,7 +693,7 @@ async def drop_listing_price(
         title=listing.title,
         old_price=old_price,
         new_price=price_data.new_price,
-        image_url=listing.images[0] if listing.images else None
+        image_url=listing.cover_image
     )
     db.add(event)
     
@@ -683,7 +703,7 @@ async def drop_listing_price(
     try:
         await redis_client.publish(
             f"feed:{listing.h3_index}",
-            json.dumps(event.to_ribbon_item())
+            event.to_ribbon_json()
         )
     except Exception as e:
         logger.warning(f"Failed to publish price drop event: {e}")
@@ -721,7 +741,7 @@ async def mark_listing_sold(
         title=listing.title,
         brand=listing.brand,
         price=float(listing.price) if listing.price else None,
-        image_url=listing.images[0] if listing.images else None
+        image_url=listing.cover_image
     )
     db.add(event)
     
@@ -731,7 +751,7 @@ async def mark_listing_sold(
     try:
         await redis_client.publish(
             f"feed:{listing.h3_index}",
-            json.dumps(event.to_ribbon_item())
+            event.to_ribbon_json()
         )
     except Exception as e:
         logger.warning(f"Failed to publish sold event: {e}")
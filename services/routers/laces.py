@@ -7,7 +7,7 @@ from pydantic import BaseModel, UUID4
 import uuid
 
 from services.database import get_db
-from services.models.laces import LacesLedger as LacesLedgerModel
+from services.models.laces import LacesLedger as LacesLedgerModel, TRANSACTION_TYPES
 from services.models.user import User
 from services.models.post import Post
 from services.models.dropzone import DropZoneCheckIn
@@ -68,15 +68,9 @@ async def grant_laces(
         related_post_id=related_post_id
     )
     
+    # The ledger trigger updates the user balance (floored at zero)
     db.add(ledger_entry)
     
-    # Update user balance
-    user.laces_balance += amount
-    
-    # Ensure balance doesn't go negative
-    if user.laces_balance < 0:
-        user.laces_balance = 0
-    
     db.commit()
     db.refresh(ledger_entry)
     db.refresh(user)
@@ -210,6 +204,8 @@ async def get_laces_ledger(
     query = db.query(LacesLedgerModel).filter(LacesLedgerModel.user_id == user_id)
     
     if transaction_type:
+        if transaction_type not in TRANSACTION_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unknown transaction type: {transaction_type}")
         query = query.filter(LacesLedgerModel.transaction_type == transaction_type)
     
     # Get total count for pagination
@@ -259,6 +255,8 @@ async def grant_laces_admin(
     Grant LACES tokens (admin/task only)
     """
     # TODO: Verify admin permissions or task auth
+    if grant_request.transaction_type not in TRANSACTION_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown transaction type: {grant_request.transaction_type}")
     
     result = await grant_laces(
         db=db,
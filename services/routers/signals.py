@@ -13,9 +13,9 @@ from services.core.cache import CacheStrategy
 from services.database import get_db
 from services.core.auth import get_current_active_user
 from services.core.redis_client import get_redis
-from services.models.signal import Signal, SignalType
+from services.models.signal import Signal, SignalType, Tag, TAG_NAME_MAX_LENGTH
 from services.models.user import User
-from services.core.geohash_utils import GeohashUtils, SignalAggregator
+from services.core.geohash_utils import SignalAggregator
 from worker.processors.signal_processing import refresh_heatmap_cache
 
 router = APIRouter(prefix="/signals", tags=["signals"])
@@ -47,6 +47,12 @@ class SignalCreate(BaseModel):
             raise ValueError(f'visibility must be one of {valid_visibility}')
         return v
     
+    @validator('tags')
+    def validate_tags(cls, v):
+        if v and any(not 1 <= len(tag) <= TAG_NAME_MAX_LENGTH for tag in v):
+            raise ValueError(f'tags must be between 1 and {TAG_NAME_MAX_LENGTH} characters')
+        return v
+    
     @validator('latitude')
     def validate_latitude(cls, v):
         if not -90 <= v <= 90:
@@ -115,14 +121,15 @@ async def create_signal(
         signal_type=signal_data.signal_type,
         text_content=signal_data.text_content,
         media_url=signal_data.media_url,
-        tags=signal_data.tags,
         brand=signal_data.brand,
         product_sku=signal_data.product_sku,
         visibility=signal_data.visibility
     )
     
+    signal.set_tags(db, signal_data.tags or [])
+    
     # Set coordinates and geohash
-    signal.geohash = GeohashUtils.encode(signal_data.latitude, signal_data.longitude)
+    signal.geohash = Signal.generate_geohash(signal_data.latitude, signal_data.longitude)
     
     # Create PostGIS point
     signal.geom = func.ST_SetSRID(func.ST_MakePoint(signal_data.longitude, signal_data.latitude), 4326)
@@ -131,25 +138,27 @@ async def create_signal(
     if signal_data.expires_hours:
         signal.expires_at = datetime.utcnow() + timedelta(hours=signal_data.expires_hours)
     
-    # Generate dedupe hash
-    signal.generate_dedupe_hash_for_instance()
+    # Insert signal; the database computes its dedupe hash
+    db.add(signal)
+    db.flush()
     
     # Check for duplicates in the last hour
     duplicate = db.query(Signal).filter(
         and_(
             Signal.dedupe_hash == signal.dedupe_hash,
+            Signal.id != signal.id,
             Signal.created_at >= datetime.utcnow() - timedelta(hours=1)
         )
     ).first()
     
     if duplicate:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Similar signal already exists in this location"
         )
     
     # Save signal
-    db.add(signal)
     db.commit()
     db.refresh(signal)
     
@@ -173,7 +182,7 @@ async def create_signal(
         signal_type=signal.signal_type,
         text_content=signal.text_content,
         media_url=signal.media_url,
-        tags=signal.tags,
+        tags=list(signal.tags),
         brand=signal.brand,
         reputation_score=signal.reputation_score,
         boost_count=signal.boost_count,
@@ -244,7 +253,7 @@ async def list_signals(
     if tags:
         tag_list = [t.strip() for t in tags.split(',')]
         for tag in tag_list:
-            query = query.filter(Signal.tags.any(tag))
+            query = query.filter(Signal.tag_objects.any(Tag.name == tag))
     
     # Get total count
     total = query.count()
@@ -273,7 +282,7 @@ async def list_signals(
             signal_type=signal.signal_type,
             text_content=signal.text_content,
             media_url=signal.media_url,
-            tags=signal.tags,
+            tags=list(signal.tags),
             brand=signal.brand,
             reputation_score=signal.reputation_score,
             boost_count=signal.boost_count,
@@ -74,6 +74,7 @@ class StoresList(BaseModel):
 @router.get("/", response_model=StoresList)
 async def list_stores(
     city: Optional[str] = Query(None, description="Filter by city"),
+    q: Optional[str] = Query(None, description="Full-text search over store name and city"),
     retailer_type: Optional[str] = Query(None, description="Filter by retailer type"),
     near_lat: Optional[float] = Query(None, description="Latitude for proximity search"),
     near_lng: Optional[float] = Query(None, description="Longitude for proximity search"),
@@ -93,6 +94,9 @@ async def list_stores(
     if city:
         query = query.filter(Store.city.ilike(f"%{city}%"))
     
+    if q:
+        query = query.filter(Store.name_tsv.op('@@')(func.plainto_tsquery('english', q)))
+    
     if retailer_type:
         query = query.filter(Store.retailer_type == retailer_type)
     
@@ -149,7 +153,7 @@ async def list_stores(
             retailer_type=store.retailer_type,
             phone=store.phone,
             website_url=store.website_url,
-            features=store.features,
+            features=list(store.features),
             release_methods=store.get_release_methods_display(),
             is_verified=store.is_verified,
             is_active=store.is_active,
@@ -193,7 +197,7 @@ async def get_store(store_id: str, db: Session = Depends(get_db)):
         retailer_type=store.retailer_type,
         phone=store.phone,
         website_url=store.website_url,
-        features=store.features,
+        features=list(store.features),
         release_methods=store.get_release_methods_display(),
         is_verified=store.is_verified,
         is_active=store.is_active,
@@ -230,7 +234,7 @@ async def create_store(
         retailer_type=store_data.retailer_type,
         phone=store_data.phone,
         website_url=store_data.website_url,
-        features=store_data.features,
+        features=store_data.features or [],
         release_methods=store_data.release_methods,
         is_verified=True  # Admin-created stores are verified
     )
@@ -252,7 +256,7 @@ async def create_store(
         retailer_type=store.retailer_type,
         phone=store.phone,
         website_url=store.website_url,
-        features=store.features,
+        features=list(store.features),
         release_methods=store.get_release_methods_display(),
         is_verified=store.is_verified,
         is_active=store.is_active,
@@ -172,7 +172,8 @@ class ListingFeedItem(BaseModel):
     size: str
     condition: str
     
-    images: List[str]
+    cover_image: Optional[str]
+    image_count: int
     authenticity_score: int
     is_verified: bool
     
@@ -10,13 +10,13 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from faker import Faker
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, text
 
 from services.core.database import SessionLocal
 from services.models.user import User
 from services.models.listing import Listing
 from services.models.feed_event import FeedEvent
-from services.models.heat_index import NeighborhoodHeatIndex
+from services.models.heat_index import NeighborhoodHeatIndex, HeatTrending
 from services.models.trade_match import TradeMatch, MatchStatus, UserWishlist
 from services.models.location import Location
 from geoalchemy2.elements import WKTElement
@@ -271,6 +271,10 @@ def seed_listings(num_listings: int = 100):
         print("🔥 Updating heat indexes...")
         update_heat_indexes(db)
         
+        # The hyperlocal feed reads the materialized view, not listings
+        db.execute(text("REFRESH MATERIALIZED VIEW listing_feed_ranked_mv"))
+        db.commit()
+        
     except Exception as e:
         print(f"❌ Error: {e}")
         db.rollback()
@@ -300,13 +304,9 @@ def update_heat_indexes(db: Session):
         ).scalar()
         heat_index.avg_listing_price = float(avg_price) if avg_price else None
         
-        brand_counts = db.query(Listing.brand, func.count(Listing.id)).filter(
-            Listing.h3_index == h3_index, Listing.status == 'ACTIVE'
-        ).group_by(Listing.brand).order_by(func.count(Listing.id).desc()).limit(3).all()
-        
-        heat_index.trending_brands = [{"brand": b, "score": c * 10} for b, c in brand_counts]
         heat_index.compute_heat_score()
     
+    HeatTrending.refresh(db, [h3_index for (h3_index,) in h3_indexes])
     db.commit()
     print(f"  Updated {len(h3_indexes)} heat indexes")
 
@@ -318,6 +318,7 @@ def clear_listings():
     try:
         db.query(FeedEvent).delete()
         db.query(Listing).delete()
+        db.query(HeatTrending).delete()
         db.query(NeighborhoodHeatIndex).delete()
         db.commit()
         print("✅ Cleared")
@@ -43,78 +43,20 @@ def compute_listing_rankings(self, h3_indexes: Optional[List[str]] = None):
         from sqlalchemy.orm import sessionmaker
         import os
         
-        from services.models.listing import Listing, ListingStatus
-        from services.models.heat_index import NeighborhoodHeatIndex
+        from services.models.listing import Listing
         
         database_url = os.getenv("DATABASE_URL")
         engine = create_engine(database_url)
         Session = sessionmaker(bind=engine)
         
         with Session() as db:
-            # Query listings to rank
-            query = db.query(Listing).filter(Listing.status == ListingStatus.ACTIVE)
-            
-            if h3_indexes:
-                query = query.filter(Listing.h3_index.in_(h3_indexes))
-            
-            listings = query.all()
-            logger.info(f"Computing rankings for {len(listings)} listings")
-            
-            # Get max values for normalization
-            max_saves = max((listing.save_count for listing in listings), default=1) or 1
-            max_messages = max((listing.message_count for listing in listings), default=1) or 1
-            max_views = max((listing.view_count for listing in listings), default=1) or 1
-            
-            now = datetime.utcnow()
-            
-            for listing in listings:
-                # Engagement score (0-30)
-                save_score = (listing.save_count / max_saves) * 15
-                message_score = (listing.message_count / max_messages) * 10
-                view_score = (listing.view_count / max_views) * 5
-                engagement_score = save_score + message_score + view_score
-                
-                # Demand score from heat index (0-20)
-                heat_index = db.query(NeighborhoodHeatIndex).filter(
-                    NeighborhoodHeatIndex.h3_index == listing.h3_index
-                ).first()
-                demand_score = (heat_index.heat_score / 100 * 20) if heat_index else 0
-                
-                # Freshness score (0-10) - exponential decay over 7 days
-                age_hours = (now - listing.created_at).total_seconds() / 3600
-                freshness_score = max(0, 10 * (1 - (age_hours / 168)))  # 168 hours = 7 days
-                
-                # Authenticity score (0-10)
-                auth_score = listing.authenticity_score / 10
-                
-                # Verified bonus
-                verified_bonus = 5 if listing.is_verified else 0
-                
-                # Price drop bonus (if recently dropped)
-                price_drop_bonus = 0
-                if listing.original_price and listing.price:
-                    drop_percent = listing.get_price_drop_percent()
-                    if drop_percent > 10:
-                        price_drop_bonus = min(5, drop_percent / 5)
-                
-                # Total rank score
-                listing.rank_score = (
-                    engagement_score +
-                    demand_score +
-                    freshness_score +
-                    auth_score +
-                    verified_bonus +
-                    price_drop_bonus
-                )
-                
-                listing.demand_score = demand_score
-            
+            listings_updated = Listing.recompute_rank_scores_bulk(db, h3_indexes or None)
             db.commit()
-            logger.info(f"Updated rankings for {len(listings)} listings")
+            logger.info(f"Updated rankings for {listings_updated} listings")
             
             return {
                 "success": True,
-                "listings_updated": len(listings),
+                "listings_updated": listings_updated,
                 "computed_at": datetime.utcnow().isoformat()
             }
             
@@ -130,17 +72,16 @@ def update_heat_indexes(self, h3_indexes: Optional[List[str]] = None):
     
     Computes:
     - Velocity metrics (activity per hour)
-    - Trending brands/SKUs
+    - Trending brands/SKUs/sizes
     - Price trends
     """
     try:
-        from sqlalchemy import create_engine, func
+        from sqlalchemy import create_engine, text
         from sqlalchemy.orm import sessionmaker
         import os
         
-        from services.models.listing import Listing, ListingSave, ListingStatus
-        from services.models.feed_event import FeedEvent
-        from services.models.heat_index import NeighborhoodHeatIndex
+        from services.models.heat_index import NeighborhoodHeatIndex, HeatTrending
+        from services.models.types import H3Int
         
         database_url = os.getenv("DATABASE_URL")
         engine = create_engine(database_url)
@@ -150,16 +91,20 @@ def update_heat_indexes(self, h3_indexes: Optional[List[str]] = None):
             now = datetime.utcnow()
             window_start = now - timedelta(hours=24)
             
-            # Get unique hexes with activity
-            if h3_indexes:
-                hexes_to_update = h3_indexes
-            else:
-                # Get hexes with recent listings
-                hexes_query = db.query(Listing.h3_index).filter(
-                    Listing.status == ListingStatus.ACTIVE,
-                    Listing.created_at >= window_start
-                ).distinct()
-                hexes_to_update = [r[0] for r in hexes_query.all()]
+            # Velocity/volume metrics for every hex with recent listings come
+            # from one roll-up of the hourly buckets (heat_index_hourly)
+            db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY neighborhood_heat_index_mv"))
+            metrics = {
+                row.h3_index: row
+                for row in db.execute(
+                    text("SELECT * FROM neighborhood_heat_index_mv").columns(h3_index=H3Int)
+                )
+            }
+            
+            # Get unique hexes with activity (recent active listings)
+            hexes_to_update = h3_indexes or [
+                hex_id for hex_id, row in metrics.items() if row.new_listings
+            ]
             
             logger.info(f"Updating heat indexes for {len(hexes_to_update)} hexes")
             
@@ -167,96 +112,36 @@ def update_heat_indexes(self, h3_indexes: Optional[List[str]] = None):
                 # Get or create heat index
                 heat_index = NeighborhoodHeatIndex.get_or_create(db, hex_id)
                 
-                # Count active listings
-                active_listings = db.query(func.count(Listing.id)).filter(
-                    Listing.h3_index == hex_id,
-                    Listing.status == ListingStatus.ACTIVE
-                ).scalar()
-                
-                # Count new listings in window
-                new_listings = db.query(func.count(Listing.id)).filter(
-                    Listing.h3_index == hex_id,
-                    Listing.created_at >= window_start
-                ).scalar()
-                
-                # Count saves in window
-                saves_count = db.query(func.count(ListingSave.id)).join(
-                    Listing, ListingSave.listing_id == Listing.id
-                ).filter(
-                    Listing.h3_index == hex_id,
-                    ListingSave.created_at >= window_start
-                ).scalar()
-                
-                # Count feed events by type
-                events = db.query(
-                    FeedEvent.event_type,
-                    func.count(FeedEvent.id)
-                ).filter(
-                    FeedEvent.h3_index == hex_id,
-                    FeedEvent.created_at >= window_start
-                ).group_by(FeedEvent.event_type).all()
-                
-                event_counts = dict(events)
+                hex_metrics = metrics.get(hex_id)
                 
                 # Compute velocities (per hour)
-                hours = 24
-                heat_index.listing_velocity = new_listings / hours
-                heat_index.save_velocity = saves_count / hours
-                heat_index.dm_velocity = event_counts.get('TRADE_REQUEST', 0) / hours
-                heat_index.trade_request_velocity = event_counts.get('TRADE_REQUEST', 0) / hours
-                heat_index.view_velocity = 0  # Would need view tracking
-                
-                heat_index.active_listings = active_listings
-                
-                # Get trending brands
-                brand_counts = db.query(
-                    Listing.brand,
-                    func.count(Listing.id).label('count')
-                ).filter(
-                    Listing.h3_index == hex_id,
-                    Listing.status == ListingStatus.ACTIVE
-                ).group_by(Listing.brand).order_by(
-                    func.count(Listing.id).desc()
-                ).limit(5).all()
-                
-                heat_index.trending_brands = [
-                    {"brand": brand, "score": count * 10}
-                    for brand, count in brand_counts
-                ]
-                
-                # Get trending SKUs
-                sku_counts = db.query(
-                    Listing.sku,
-                    Listing.title,
-                    func.count(Listing.id).label('count')
-                ).filter(
-                    Listing.h3_index == hex_id,
-                    Listing.status == ListingStatus.ACTIVE,
-                    Listing.sku.isnot(None)
-                ).group_by(Listing.sku, Listing.title).order_by(
-                    func.count(Listing.id).desc()
-                ).limit(5).all()
-                
-                heat_index.trending_skus = [
-                    {"sku": sku, "name": title, "score": count * 10}
-                    for sku, title, count in sku_counts
-                ]
-                
-                # Compute average price
-                avg_price = db.query(func.avg(Listing.price)).filter(
-                    Listing.h3_index == hex_id,
-                    Listing.status == ListingStatus.ACTIVE,
-                    Listing.price.isnot(None)
-                ).scalar()
-                
-                heat_index.avg_listing_price = float(avg_price) if avg_price else None
+                if hex_metrics:
+                    heat_index.listing_velocity = hex_metrics.listing_velocity
+                    heat_index.save_velocity = hex_metrics.save_velocity
+                    heat_index.dm_velocity = hex_metrics.trade_request_velocity
+                    heat_index.trade_request_velocity = hex_metrics.trade_request_velocity
+                    heat_index.view_velocity = hex_metrics.view_velocity
+                    heat_index.active_listings = hex_metrics.active_listings
+                    heat_index.avg_listing_price = hex_metrics.avg_listing_price
+                else:
+                    heat_index.listing_velocity = 0.0
+                    heat_index.save_velocity = 0.0
+                    heat_index.dm_velocity = 0.0
+                    heat_index.trade_request_velocity = 0.0
+                    heat_index.view_velocity = 0.0
+                    heat_index.active_listings = 0
+                    heat_index.avg_listing_price = None
                 
                 # Update time window
                 heat_index.window_start = window_start
                 heat_index.window_end = now
-                
-                # Compute composite heat score
-                heat_index.compute_heat_score()
+            
+            # Composite heat scores for all hexes in one pass
+            db.flush()
+            NeighborhoodHeatIndex.recompute_heat_scores_bulk(db, hexes_to_update)
+            
+            # Trending brands/SKUs/sizes for all hexes in one statement
+            HeatTrending.refresh(db, hexes_to_update)
             
             db.commit()
             logger.info(f"Updated {len(hexes_to_update)} heat indexes")
@@ -319,7 +204,7 @@ def find_trade_matches(self, user_id: Optional[str] = None):
                 # Get user's trade listings
                 user_listings = db.query(Listing).filter(
                     Listing.user_id == user.user_id,
-                    Listing.status == ListingStatus.ACTIVE,
+                    Listing.active_filter(),
                     Listing.trade_intent.in_(['TRADE', 'BOTH'])
                 ).all()
                 
@@ -328,7 +213,7 @@ def find_trade_matches(self, user_id: Optional[str] = None):
                     ListingSave, ListingSave.listing_id == Listing.id
                 ).filter(
                     ListingSave.user_id == user.user_id,
-                    Listing.status == ListingStatus.ACTIVE,
+                    Listing.active_filter(),
                     Listing.trade_intent.in_(['TRADE', 'BOTH'])
                 ).all()
                 
@@ -352,8 +237,8 @@ def find_trade_matches(self, user_id: Optional[str] = None):
                         
                         if user_offers:
                             # Check if match already exists
-                            existing = db.query(TradeMatch).filter(
-                                TradeMatch.listing_ids.contains([user_offers.id, wanted.id])
+                            existing = db.query(TradeMatch.id).filter(
+                                TradeMatch.offering_all([user_offers.id, wanted.id])
                             ).first()
                             
                             if not existing:
@@ -419,6 +304,7 @@ def cleanup_expired_feed_data():
         from services.models.feed_event import FeedEvent
         from services.models.trade_match import TradeMatch, MatchStatus
         from services.models.listing import Listing, ListingStatus
+        from services.models.heat_index import HeatIndexHourly
         
         database_url = os.getenv("DATABASE_URL")
         engine = create_engine(database_url)
@@ -432,6 +318,11 @@ def cleanup_expired_feed_data():
                 FeedEvent.created_at < now - timedelta(days=7)
             ).delete()
             
+            # Keep 30 days of hourly heat buckets for trends
+            db.query(HeatIndexHourly).filter(
+                HeatIndexHourly.bucket < now - timedelta(days=30)
+            ).delete()
+            
             # Expire old trade matches
             expired_matches = db.query(TradeMatch).filter(
                 TradeMatch.expires_at < now,
@@ -469,6 +360,260 @@ def cleanup_expired_feed_data():
         raise
 
 
+@shared_task
+def refresh_listing_feed():
+    """
+    Rebuild listing_feed_ranked_mv, the projection the hyperlocal feed reads.
+    CONCURRENTLY keeps the view readable during the refresh.
+    """
+    try:
+        from sqlalchemy import create_engine, text
+        import os
+        
+        database_url = os.getenv("DATABASE_URL")
+        engine = create_engine(database_url)
+        
+        with engine.begin() as conn:
+            conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY listing_feed_ranked_mv"))
+        
+        return {
+            "success": True,
+            "refreshed_at": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Listing feed refresh failed: {e}")
+        raise
+
+
+@shared_task
+def flush_listing_counters(batch_size: int = 1000):
+    """
+    Apply engagement counter deltas buffered in Redis by Listing.incr_counter.
+    
+    Each pending listing's hash is read and deleted atomically, then all
+    deltas are written with one executemany UPDATE (col = col + delta), so
+    row writes scale with listings touched per interval, not with events.
+    If the UPDATE fails the deltas are added back to Redis for the next run.
+    """
+    listing_ids, pending = None, None
+    try:
+        from sqlalchemy import create_engine, update, bindparam, func
+        from sqlalchemy.orm import sessionmaker
+        import os
+        
+        from services.models.listing import (
+            Listing, LISTING_COUNTER_FIELDS, LISTING_COUNTERS_KEY, LISTING_COUNTERS_DIRTY
+        )
+        
+        listing_ids = redis_client.spop(LISTING_COUNTERS_DIRTY, batch_size)
+        if not listing_ids:
+            return {"success": True, "listings_flushed": 0}
+        
+        pipe = redis_client.pipeline(transaction=True)
+        for listing_id in listing_ids:
+            key = LISTING_COUNTERS_KEY.format(listing_id)
+            pipe.hgetall(key)
+            pipe.delete(key)
+        pending = pipe.execute()[::2]
+        
+        params = [
+            {
+                "listing_id": listing_id,
+                **{f"d_{field}": int(deltas.get(field, 0)) for field in LISTING_COUNTER_FIELDS},
+                "d_demand_score": float(deltas.get("demand_score", 0)),
+            }
+            for listing_id, deltas in zip(listing_ids, pending) if deltas
+        ]
+        if not params:
+            return {"success": True, "listings_flushed": 0}
+        
+        listings = Listing.__table__
+        stmt = (
+            update(listings)
+            .where(listings.c.id == bindparam("listing_id"))
+            .values(
+                **{field: func.greatest(listings.c[field] + bindparam(f"d_{field}"), 0)
+                   for field in LISTING_COUNTER_FIELDS},
+                demand_score=listings.c.demand_score + bindparam("d_demand_score"),
+            )
+        )
+        
+        database_url = os.getenv("DATABASE_URL")
+        engine = create_engine(database_url)
+        Session = sessionmaker(bind=engine)
+        
+        with Session() as db:
+            db.execute(stmt, params)
+            db.commit()
+        
+        logger.info(f"Flushed engagement counters for {len(params)} listings")
+        
+        return {
+            "success": True,
+            "listings_flushed": len(params),
+            "flushed_at": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Listing counter flush failed: {e}")
+        if listing_ids:
+            _restore_listing_counters(listing_ids, pending)
+        raise
+
+
+def _restore_listing_counters(listing_ids, pending=None):
+    """Put counter deltas taken by a failed flush_listing_counters back in Redis"""
+    from services.models.listing import LISTING_COUNTERS_KEY, LISTING_COUNTERS_DIRTY
+    
+    pipe = redis_client.pipeline(transaction=False)
+    for listing_id, deltas in zip(listing_ids, pending or [None] * len(listing_ids)):
+        key = LISTING_COUNTERS_KEY.format(listing_id)
+        for field, delta in (deltas or {}).items():
+            if field == 'demand_score':
+                pipe.hincrbyfloat(key, field, float(delta))
+            else:
+                pipe.hincrby(key, field, int(delta))
+        pipe.sadd(LISTING_COUNTERS_DIRTY, listing_id)
+    pipe.execute()
+
+
+# Pop up to ARGV[1] queued saves into the processing set in one step, so a
+# save is always in exactly one of the two sets until its flush finishes
+_claim_listing_saves = redis_client.register_script("""
+local members = redis.call('SPOP', KEYS[1], ARGV[1])
+if #members > 0 then
+    redis.call('SADD', KEYS[2], unpack(members))
+end
+return members
+""")
+
+# Release a committed batch from the processing set, returning the members
+# that ListingSave.dequeue already removed (saves cancelled mid-flush)
+_release_listing_saves = redis_client.register_script("""
+local cancelled = {}
+for _, member in ipairs(ARGV) do
+    if redis.call('SREM', KEYS[1], member) == 0 then
+        table.insert(cancelled, member)
+    end
+end
+return cancelled
+""")
+
+
+@shared_task
+def flush_listing_saves(batch_size: int = 1000):
+    """
+    Insert saves queued in Redis by ListingSave.enqueue.
+    
+    The batch is claimed by moving it to the processing set atomically, then
+    one multi-row INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING
+    listing_id stores it (ix_listing_saves_unique drops duplicates, and the
+    joins skip saves whose listing or user has since been deleted), and one
+    executemany UPDATE adds the saves actually inserted to each listing's
+    save_count and demand_score (saves are an intent signal for demand).
+    Saves unsaved while the batch was in flight are deleted again after the
+    commit; if the flush fails, the rest go back on the queue for the next run.
+    """
+    members = None
+    try:
+        from collections import Counter
+        from uuid import UUID
+        from sqlalchemy import create_engine, update, delete, bindparam, select, values, column, func, tuple_
+        from sqlalchemy.dialects.postgresql import insert, UUID as PG_UUID
+        from sqlalchemy.orm import sessionmaker
+        import os
+        
+        from services.models.listing import Listing, ListingSave, LISTING_SAVES_QUEUE, LISTING_SAVES_PROCESSING
+        from services.models.user import User
+        
+        members = _claim_listing_saves(keys=[LISTING_SAVES_QUEUE, LISTING_SAVES_PROCESSING], args=[batch_size])
+        if not members:
+            return {"success": True, "saves_flushed": 0}
+        
+        rows = []
+        for member in members:
+            listing_id, user_id = member.split(':')
+            rows.append((UUID(listing_id), UUID(user_id)))
+        
+        batch = values(
+            column('listing_id', PG_UUID(as_uuid=True)), column('user_id', PG_UUID(as_uuid=True)), name='batch'
+        ).data(rows)
+        insert_stmt = insert(ListingSave).from_select(
+            ['listing_id', 'user_id', 'id'],
+            select(batch.c.listing_id, batch.c.user_id, func.gen_random_uuid())
+            .join(Listing, Listing.id == batch.c.listing_id)
+            .join(User, User.user_id == batch.c.user_id)
+        ).on_conflict_do_nothing(
+            index_elements=[ListingSave.user_id, ListingSave.listing_id]
+        ).returning(ListingSave.listing_id)
+        
+        listings = Listing.__table__
+        update_stmt = (
+            update(listings)
+            .where(listings.c.id == bindparam("listing_id"))
+            .values(
+                save_count=listings.c.save_count + bindparam("d_saves"),
+                demand_score=listings.c.demand_score + bindparam("d_saves"),
+            )
+        )
+        
+        database_url = os.getenv("DATABASE_URL")
+        engine = create_engine(database_url)
+        Session = sessionmaker(bind=engine)
+        
+        with Session() as db:
+            inserted = Counter(db.execute(insert_stmt).scalars())
+            if inserted:
+                db.execute(update_stmt, [
+                    {"listing_id": listing_id, "d_saves": count} for listing_id, count in inserted.items()
+                ])
+            db.commit()
+        
+        cancelled = _release_listing_saves(keys=[LISTING_SAVES_PROCESSING], args=members)
+        if cancelled:
+            # Same as unsave_listing for a committed save
+            cancelled_rows = [tuple(UUID(part) for part in member.split(':')) for member in cancelled]
+            with Session() as db:
+                removed = db.execute(
+                    delete(ListingSave)
+                    .where(tuple_(ListingSave.listing_id, ListingSave.user_id).in_(cancelled_rows))
+                    .returning(ListingSave.listing_id)
+                ).scalars().all()
+                db.commit()
+            for listing_id in removed:
+                Listing.incr_counter(redis_client, listing_id, 'save_count', -1)
+        
+        saves_flushed = sum(inserted.values())
+        logger.info(f"Flushed {saves_flushed} saves across {len(inserted)} listings")
+        
+        return {
+            "success": True,
+            "saves_flushed": saves_flushed,
+            "flushed_at": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Listing save flush failed: {e}")
+        if members:
+            _restore_listing_saves(members)
+        raise
+
+
+def _restore_listing_saves(members):
+    """
+    Put saves claimed by a failed flush_listing_saves back on the queue.
+    Members no longer in the processing set (cancelled or already released)
+    are skipped by SMOVE.
+    """
+    from services.models.listing import LISTING_SAVES_QUEUE, LISTING_SAVES_PROCESSING
+    
+    pipe = redis_client.pipeline(transaction=False)
+    for member in members:
+        pipe.smove(LISTING_SAVES_PROCESSING, LISTING_SAVES_QUEUE, member)
+    pipe.execute()
+
+
 @shared_task
 def broadcast_feed_event(channel: str, event_data: Dict[str, Any]):
     """
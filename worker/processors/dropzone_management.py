@@ -13,7 +13,6 @@ import math
 from worker.tasks import app
 from services.database import SessionLocal
 from services.models.dropzone import DropZone, DropZoneMember, DropZoneCheckIn, DropZoneStatus, MemberRole
-from services.models.user import User
 from services.models.laces import LacesLedger
 from services.core.redis_client import get_redis
 
@@ -329,12 +328,7 @@ def calculate_zone_streaks(self, zone_id: str = None):
                             description=f"{current_streak}-day streak at {zone.name}",
                             reference_id=str(zone.id)
                         )
-                        self.db.add(laces_entry)
-                        
-                        # Update user balance
-                        user = self.db.query(User).filter(User.user_id == member.user_id).first()
-                        if user:
-                            user.laces_balance += milestone_bonus
+                        self.db.add(laces_entry)  # Its trigger credits the balance
                         
                         bonus_laces_awarded += milestone_bonus
         
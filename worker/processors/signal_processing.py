@@ -6,7 +6,7 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from celery import Task
 from sqlalchemy import and_, func, text
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 
 # Import the main celery app and services directly
 from worker.tasks import app
@@ -45,15 +45,24 @@ def deduplicate_signals(self, time_window_hours: int = 1, batch_size: int = 1000
         # Calculate time window
         cutoff_time = datetime.utcnow() - timedelta(hours=time_window_hours)
         
-        # Find signals without dedupe_hash or created recently
-        signals_query = self.db.query(Signal).filter(
+        # dedupe_hash is computed by the database on insert, so look for
+        # unflagged signals that repeat an earlier signal's hash in the window
+        earlier = aliased(Signal)
+        earlier_duplicate = self.db.query(earlier.id).filter(
             and_(
-                Signal.created_at >= cutoff_time,
-                Signal.dedupe_hash.is_(None)
+                earlier.dedupe_hash == Signal.dedupe_hash,
+                earlier.created_at >= cutoff_time,
+                earlier.created_at < Signal.created_at
             )
-        ).limit(batch_size)
+        ).exists()
         
-        signals = signals_query.all()
+        signals = self.db.query(Signal).filter(
+            and_(
+                Signal.created_at >= cutoff_time,
+                Signal.is_flagged == False,
+                earlier_duplicate
+            )
+        ).limit(batch_size).all()
         
         if not signals:
             return {"processed": 0, "duplicates_found": 0}
@@ -62,27 +71,14 @@ def deduplicate_signals(self, time_window_hours: int = 1, batch_size: int = 1000
         duplicates_found = 0
         
         for signal in signals:
-            # Generate dedupe hash
-            signal.generate_dedupe_hash_for_instance()
-            
-            # Check for existing signals with same hash in time window
-            existing = self.db.query(Signal).filter(
-                and_(
-                    Signal.dedupe_hash == signal.dedupe_hash,
-                    Signal.created_at >= cutoff_time,
-                    Signal.id != signal.id
-                )
-            ).first()
+            # Mark as duplicate and reduce reputation
+            signal.is_flagged = True
+            signal.reputation_score -= 10
+            duplicates_found += 1
             
-            if existing:
-                # Mark as duplicate and reduce reputation
-                signal.is_flagged = True
-                signal.reputation_score -= 10
-                duplicates_found += 1
-                
-                # Log deduplication
-                redis_client.incr("signals:duplicates:total")
-                redis_client.incr(f"signals:duplicates:user:{signal.user_id}")
+            # Log deduplication
+            redis_client.incr("signals:duplicates:total")
+            redis_client.incr(f"signals:duplicates:user:{signal.user_id}")
             
             processed += 1
         
@@ -361,6 +357,17 @@ def refresh_heatmap_cache(self, precision_levels: List[int] = None, time_windows
     
     return {"refreshed_caches": results}
 
+@app.task(bind=True, base=DatabaseTask)
+def refresh_hot_drops_view(self):
+    """Refresh the mv_hot_drops_by_geohash roll-up without blocking readers"""
+    try:
+        self.db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_hot_drops_by_geohash"))
+        self.db.commit()
+        return {"refreshed_at": datetime.utcnow().isoformat()}
+    except Exception as e:
+        self.db.rollback()
+        self.retry(countdown=60, max_retries=3, exc=e)
+
 def get_city_from_coordinates(lat: float, lng: float) -> Optional[str]:
     """
     Simple city detection from coordinates
@@ -397,4 +404,7 @@ def periodic_signal_maintenance():
     refresh_heatmap_cache.delay(
         precision_levels=[6, 7],
         time_windows=[1, 24]
-    )
\ No newline at end of file
+    )
+    
+    # Refresh hot drops roll-up
+    refresh_hot_drops_view.delay()
\ No newline at end of file
@@ -302,7 +302,73 @@ def cleanup_old_data() -> Dict[str, Any]:
         logger.error(f"Cleanup failed: {e}")
         raise
 
+
+def _clear_cache_keys(redis_conn, patterns, batch_size: int = 500) -> int:
+    """
+    Delete keys matching each pattern. SCAN walks the keyspace in small steps
+    instead of blocking Redis like KEYS, and deletes go out in batches.
+    """
+    cleared = 0
+    for pattern in patterns:
+        batch = []
+        for key in redis_conn.scan_iter(match=pattern, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                cleared += redis_conn.delete(*batch)
+                batch = []
+        if batch:
+            cleared += redis_conn.delete(*batch)
+    return cleared
+
+
 # New Dharma tasks
+async def _warm_heatmap(zones: Optional[list] = None, redis_conn=None) -> Dict[str, Any]:
+    """
+    Clear heatmap cache tiles for posts + signals endpoints and pre-warm the
+    common zoom levels and time windows concurrently. Shared by the Celery
+    task and the API's in-process startup warmup.
+    """
+    redis_conn = redis_conn or redis_client
+
+    # Clear existing cache namespaces (posts + signals heatmaps)
+    base_patterns = ["heatmap", "signals:heatmap"]
+
+    key_patterns = []
+    if zones:
+        for zone in zones:
+            for base in base_patterns:
+                key_patterns.append(f"{base}:*{zone}*")
+    else:
+        key_patterns = [f"{base}:*" for base in base_patterns]
+
+    # The client is synchronous; keep its round trips off the event loop
+    cache_keys_cleared = await asyncio.to_thread(_clear_cache_keys, redis_conn, key_patterns)
+
+    # Pre-warm cache for common zoom levels and time windows
+    api_url = os.getenv("API_BASE_URL", "http://api:8000")
+    tiles = [(zoom, window) for zoom in (6, 7, 8) for window in ("1h", "24h", "7d")]
+
+    async def _warm_tile(client: httpx.AsyncClient, zoom: int, window: str) -> bool:
+        try:
+            response = await client.get(f"{api_url}/v1/heatmap", params={"zoom": zoom, "window": window})
+            if response.status_code == 200:
+                logger.info(f"Warmed heatmap tile zoom={zoom} window={window}")
+                return True
+        except Exception as e:
+            logger.warning(f"Failed to warm tile zoom={zoom} window={window}: {e}")
+        return False
+
+    async with httpx.AsyncClient(timeout=30) as client:
+        warmed = await asyncio.gather(*(_warm_tile(client, zoom, window) for zoom, window in tiles))
+
+    return {
+        'success': True,
+        'cache_keys_cleared': cache_keys_cleared,
+        'tiles_warmed': sum(warmed),
+        'zones_targeted': zones or 'all',
+        'refreshed_at': datetime.now().isoformat()
+    }
+
 @app.task(bind=True)
 def refresh_heatmap_cache(self, zones: Optional[list] = None) -> Dict[str, Any]:
     """
@@ -311,53 +377,7 @@ def refresh_heatmap_cache(self, zones: Optional[list] = None) -> Dict[str, Any]:
     """
     try:
         logger.info("Starting heatmap cache refresh")
-        
-        # Clear existing cache namespaces (posts + signals heatmaps)
-        cache_keys_cleared = 0
-        base_patterns = ["heatmap", "signals:heatmap"]
-
-        key_patterns = []
-        if zones:
-            for zone in zones:
-                for base in base_patterns:
-                    key_patterns.append(f"{base}:*{zone}*")
-        else:
-            key_patterns = [f"{base}:*" for base in base_patterns]
-
-        for pattern in key_patterns:
-            keys = redis_client.keys(pattern)
-            if keys:
-                redis_client.delete(*keys)
-                cache_keys_cleared += len(keys)
-        
-        # Pre-warm cache for common zoom levels and time windows
-        api_url = os.getenv("API_BASE_URL", "http://api:8000")
-        zoom_levels = [6, 7, 8]
-        time_windows = ["1h", "24h", "7d"]
-        
-        warmed_tiles = 0
-        
-        with httpx.Client(timeout=30) as client:
-            for zoom in zoom_levels:
-                for window in time_windows:
-                    try:
-                        response = client.get(
-                            f"{api_url}/v1/heatmap",
-                            params={"zoom": zoom, "window": window}
-                        )
-                        if response.status_code == 200:
-                            warmed_tiles += 1
-                            logger.info(f"Warmed heatmap tile zoom={zoom} window={window}")
-                    except Exception as e:
-                        logger.warning(f"Failed to warm tile zoom={zoom} window={window}: {e}")
-        
-        return {
-            'success': True,
-            'cache_keys_cleared': cache_keys_cleared,
-            'tiles_warmed': warmed_tiles,
-            'zones_targeted': zones or 'all',
-            'refreshed_at': datetime.now().isoformat()
-        }
+        return asyncio.run(_warm_heatmap(zones))
         
     except Exception as e:
         logger.error(f"Heatmap refresh failed: {e}")
@@ -459,10 +479,7 @@ def daily_laces_stipend() -> Dict[str, Any]:
                         amount=daily_stipend_amount,
                         transaction_type='DAILY_STIPEND'
                     )
-                    db.add(ledger_entry)
-                    
-                    # Update user balance
-                    user.laces_balance += daily_stipend_amount
+                    db.add(ledger_entry)  # Its trigger credits the balance
                     
                     stipends_distributed += 1
                     
@@ -559,7 +576,10 @@ from worker.feed_tasks import (
     compute_listing_rankings,
     update_heat_indexes,
     find_trade_matches,
-    cleanup_expired_feed_data
+    cleanup_expired_feed_data,
+    flush_listing_counters,
+    flush_listing_saves,
+    refresh_listing_feed
 )
 
 # Scheduled tasks
@@ -625,6 +645,27 @@ def setup_periodic_tasks(sender, **kwargs):
         name='Find trade matches'
     )
     
+    # Rebuild the hyperlocal feed view every 2 minutes
+    sender.add_periodic_task(
+        120.0,
+        refresh_listing_feed.s(),
+        name='Refresh listing feed view'
+    )
+    
+    # Insert queued listing saves every second
+    sender.add_periodic_task(
+        1.0,
+        flush_listing_saves.s(),
+        name='Flush listing saves'
+    )
+    
+    # Apply buffered listing view/save/message counters every minute
+    sender.add_periodic_task(
+        60.0,
+        flush_listing_counters.s(),
+        name='Flush listing counters'
+    )
+    
     # Clean up expired feed data every hour
     sender.add_periodic_task(
         3600.0,